@@ -0,0 +1,317 @@
+import itertools
+import logging
+import multiprocessing
+import threading
+import time
+
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from json_decoder import get_json_decoder
+from memgraph_client import MemgraphClient
+from sharding import shard_of
+
+logger = logging.getLogger("prometheus_handler")
+
+DEFAULT_WORKER_CONCURRENCY = 16
+# Time to wait before replacing a worker which exited, so that a worker which can't start isn't respawned in a loop.
+WORKER_RESPAWN_DELAY_SECONDS = 1.0
+
+_NAN = float("nan")
+
+
+class WorkerResult:
+    """
+    Metrics of a single instance pulled by a worker. 'values' holds one value per slot of the instance type's
+    layout, NaN for metrics which weren't received, and 'extras' the received keys which aren't in the layout,
+    as {section: {key: value}}.
+    """
+
+    __slots__ = (
+        "values",
+        "extras",
+        "fetch_seconds",
+        "response_bytes",
+        "decode_seconds",
+    )
+
+    def __init__(self, values, extras, fetch_seconds, response_bytes, decode_seconds):
+        self.values = values
+        self.extras = extras
+        self.fetch_seconds = fetch_seconds
+        self.response_bytes = response_bytes
+        self.decode_seconds = decode_seconds
+
+
+def _compile_layouts(layouts):
+    """
+    Turns the (section, key) layout of every instance type into {section: {key: slot}} and a NaN-filled array
+    which is copied for every response.
+    """
+    compiled = {}
+    for instance_type, layout in layouts.items():
+        slots = {}
+        for slot, (section, key) in enumerate(layout):
+            slots.setdefault(section, {})[key] = slot
+        compiled[instance_type] = (slots, array("d", [_NAN]) * len(layout))
+    return compiled
+
+
+def _pack(mg_data, slots, template, keep_extras):
+    values = array("d", template)
+    extras = {}
+    for section, section_data in mg_data.items():
+        section_slots = slots.get(section)
+        if section_slots is None or not isinstance(section_data, dict):
+            continue
+        for key, value in section_data.items():
+            slot = section_slots.get(key)
+            if slot is None:
+                if keep_extras:
+                    extras.setdefault(section, {})[key] = value
+                continue
+            try:
+                values[slot] = value
+            except TypeError:
+                # Values which aren't numbers can't be exported anyway.
+                pass
+    return values.tobytes(), extras
+
+
+class _WorkerState:
+    def __init__(self, conn, http_config, decode_json, layouts, keep_extras):
+        self._conn = conn
+        self._http_config = http_config
+        self._decode_json = decode_json
+        self._layouts = _compile_layouts(layouts)
+        self._keep_extras = keep_extras
+        self._send_lock = threading.Lock()
+        self._clients_lock = threading.Lock()
+        self._clients = {}
+
+    def _client(self, metrics_url):
+        with self._clients_lock:
+            client = self._clients.get(metrics_url)
+            if client is None:
+                client = self._clients[metrics_url] = MemgraphClient(
+                    metrics_url, self._http_config
+                )
+            return client
+
+    def forget(self, metrics_url):
+        with self._clients_lock:
+            client = self._clients.pop(metrics_url, None)
+        if client is not None:
+            client.close()
+
+    def pull(self, request_id, metrics_url, instance_type):
+        try:
+            started = time.perf_counter()
+            res = self._client(metrics_url).get()
+            fetch_seconds = time.perf_counter() - started
+            if res.status_code != 200:
+                raise Exception(
+                    f"Memgraph instance on {metrics_url} couldn't be reached."
+                )
+            started = time.perf_counter()
+            mg_data = self._decode_json(res.content)
+            decode_seconds = time.perf_counter() - started
+            slots, template = self._layouts[instance_type]
+            values, extras = _pack(mg_data, slots, template, self._keep_extras)
+            message = (
+                request_id,
+                None,
+                values,
+                extras,
+                fetch_seconds,
+                len(res.content),
+                decode_seconds,
+            )
+        except Exception as e:
+            message = (request_id, str(e), None, None, None, None, None)
+        with self._send_lock:
+            self._conn.send(message)
+
+
+def _worker_main(
+    conn, http_config, json_decoder, layouts, keep_extras, max_concurrency
+):
+    """
+    Entry point of a worker process. Receives (request_id, metrics_url, instance_type) requests, pulls and
+    decodes them on a thread pool and answers each with the packed values. None or a closed pipe stops it.
+    """
+    _, decode_json = get_json_decoder(json_decoder)
+    state = _WorkerState(conn, http_config, decode_json, layouts, keep_extras)
+    executor = ThreadPoolExecutor(
+        max_workers=max_concurrency, thread_name_prefix="mg-worker"
+    )
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        if message[0] == "forget":
+            executor.submit(state.forget, message[1])
+            continue
+        executor.submit(state.pull, *message)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+class _Worker:
+    def __init__(self, index, process, conn):
+        self.index = index
+        self.process = process
+        self.conn = conn
+        self.send_lock = threading.Lock()
+        # Futures of the requests sent to the worker by request id.
+        self.pending = {}
+        self.pending_lock = threading.Lock()
+        self.alive = True
+
+
+class WorkerPool:
+    """
+    Pulls and decodes the metrics of instances in 'worker_count' separate processes, so that decoding the
+    responses of large fleets isn't bound to the exporter's GIL. Every instance is always pulled by the same
+    worker. Workers answer with the values of an instance packed as doubles, one per slot of the layout of its
+    type, which the exporter process applies to its own metrics. A worker which exits fails its pending pulls
+    and is replaced by a new one.
+    Parameters:
+    layouts: Lists of (section, key) pairs by instance type, in the order of the slots of their update plans.
+    keep_extras: Whether keys which aren't in the layouts are sent along, e.g. for metric discovery.
+    """
+
+    def __init__(
+        self,
+        worker_count,
+        http_config,
+        json_decoder,
+        layouts,
+        keep_extras=False,
+        max_concurrency=DEFAULT_WORKER_CONCURRENCY,
+    ):
+        # Spawned workers don't inherit the exporter's threads and locks.
+        self._context = multiprocessing.get_context("spawn")
+        self._worker_args = (
+            http_config,
+            json_decoder,
+            layouts,
+            keep_extras,
+            max_concurrency,
+        )
+        self._request_ids = itertools.count()
+        self._closed = False
+        self._workers = [self._spawn(index) for index in range(worker_count)]
+
+    def _spawn(self, index):
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(child_conn, *self._worker_args),
+            name=f"mg-collection-worker-{index}",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        worker = _Worker(index, process, conn)
+        threading.Thread(
+            target=self._receive,
+            args=(worker,),
+            name=f"mg-worker-receiver-{index}",
+            daemon=True,
+        ).start()
+        return worker
+
+    @property
+    def worker_count(self):
+        return len(self._workers)
+
+    def _worker_of(self, instance):
+        return self._workers[shard_of(instance.key, len(self._workers))]
+
+    def fetch(self, instance):
+        """
+        Pulls the metrics of 'instance' through its worker and returns them as a WorkerResult.
+        Raises if the pull failed.
+        """
+        worker = self._worker_of(instance)
+        request_id = next(self._request_ids)
+        future = Future()
+        with worker.pending_lock:
+            if not worker.alive:
+                raise Exception(f"Collection worker {worker.index} exited.")
+            worker.pending[request_id] = future
+        try:
+            with worker.send_lock:
+                worker.conn.send((request_id, instance.metrics_url, instance.type))
+        except OSError:
+            # The worker exited before its receiver noticed, which fails the pending pulls.
+            pass
+        return future.result()
+
+    def forget(self, instance):
+        """
+        Closes the connections of the worker to 'instance'. Connections of a worker which exited are already
+        closed.
+        """
+        worker = self._worker_of(instance)
+        if not worker.alive:
+            return
+        try:
+            with worker.send_lock:
+                worker.conn.send(("forget", instance.metrics_url))
+        except OSError:
+            pass
+
+    def _receive(self, worker):
+        while True:
+            try:
+                message = worker.conn.recv()
+            except (EOFError, OSError):
+                break
+            request_id, error, values, extras, fetch_seconds, size, decode_seconds = (
+                message
+            )
+            with worker.pending_lock:
+                future = worker.pending.pop(request_id, None)
+            if future is None:
+                continue
+            if error is not None:
+                future.set_exception(Exception(error))
+                continue
+            unpacked = array("d")
+            unpacked.frombytes(values)
+            future.set_result(
+                WorkerResult(unpacked, extras, fetch_seconds, size, decode_seconds)
+            )
+        with worker.pending_lock:
+            worker.alive = False
+            pending = list(worker.pending.values())
+            worker.pending.clear()
+        for future in pending:
+            future.set_exception(Exception(f"Collection worker {worker.index} exited."))
+        worker.conn.close()
+        worker.process.join(timeout=1)
+        if self._closed:
+            return
+        logger.error(
+            "Collection worker %d exited with code %s, starting a new one.",
+            worker.index,
+            worker.process.exitcode,
+        )
+        time.sleep(WORKER_RESPAWN_DELAY_SECONDS)
+        if not self._closed:
+            self._workers[worker.index] = self._spawn(worker.index)
+
+    def shutdown(self):
+        self._closed = True
+        for worker in self._workers:
+            try:
+                with worker.send_lock:
+                    worker.conn.send(None)
+            except OSError:
+                pass
+        for worker in self._workers:
+            worker.process.join(timeout=1)
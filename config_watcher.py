@@ -0,0 +1,60 @@
+import os
+import signal
+import threading
+
+from file_sd import file_sd_paths
+
+
+class ConfigWatcher:
+    """
+    Tells when the configuration file should be reloaded: after the process received SIGHUP, or, if 'watch_file'
+    is set, after the modification time of the file changed. Files matching 'patterns', such as file_sd target
+    files, are always watched, including files which are created or deleted. Has to be created on the main thread.
+    """
+
+    def __init__(self, config_file, watch_file=False, patterns=None):
+        self._config_file = config_file
+        self._watch_file = watch_file
+        self._patterns = list(patterns or [])
+        self._reload_requested = threading.Event()
+        self._mtimes = self._modification_times()
+        signal.signal(signal.SIGHUP, self._on_sighup)
+
+    def watch(self, patterns):
+        """
+        Replaces the watched file patterns, e.g. after the configuration was reloaded.
+        """
+        self._patterns = list(patterns)
+        self._mtimes = self._modification_times()
+
+    def _on_sighup(self, signum, frame):
+        self._reload_requested.set()
+
+    def _modification_times(self):
+        paths = file_sd_paths(self._patterns)
+        if self._watch_file:
+            paths.append(self._config_file)
+        mtimes = {}
+        for path in paths:
+            try:
+                mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                mtimes[path] = None
+        return mtimes
+
+    def wait(self, timeout):
+        """
+        Sleeps for 'timeout' seconds, or until a reload is requested with SIGHUP.
+        """
+        self._reload_requested.wait(timeout)
+
+    def should_reload(self):
+        if self._reload_requested.is_set():
+            self._reload_requested.clear()
+            self._mtimes = self._modification_times()
+            return True
+        mtimes = self._modification_times()
+        if mtimes != self._mtimes:
+            self._mtimes = mtimes
+            return True
+        return False
@@ -0,0 +1,107 @@
+import threading
+import time
+
+from prometheus_client.metrics_core import CounterMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+
+
+class _CounterState:
+    """
+    Total of a single labeled counter. Memgraph reports counts since its process started, so when a received
+    value is lower than the previous one, the instance was restarted and the total reached before the restart
+    is carried over. A restart after which the count already reached the previous value by the next pull can't
+    be told apart from a counter which didn't grow, and the counts made before that restart are lost, like with
+    any Prometheus counter which resets between two scrapes.
+    """
+
+    __slots__ = ("offset", "last", "total", "created")
+
+    def __init__(self):
+        self.offset = 0.0
+        self.last = 0.0
+        self.total = 0.0
+        self.created = time.time()
+
+    def set(self, value):
+        if value < self.last:
+            self.offset += self.last
+        self.last = value
+        self.total = self.offset + value
+
+
+class CumulativeCounterCollector(Collector):
+    """
+    Exposes cumulative Memgraph counters as labeled counters. Each received value is the counter total, and
+    counter resets caused by Memgraph restarts are detected, so the exposed counters only ever grow.
+    """
+
+    def __init__(self, metrics, label_names=("instance_name",), registry=REGISTRY):
+        self._descriptions = dict(metrics)
+        self._label_names = list(label_names)
+        self._lock = threading.Lock()
+        # Counter states by metric name and label values.
+        self._states = {name: {} for name in self._descriptions}
+        if registry is not None:
+            registry.register(self)
+
+    def set_label_names(self, label_names):
+        """
+        Changes the label names of all metrics. Has to be called before any counter is set.
+        """
+        with self._lock:
+            if any(self._states.values()):
+                raise ValueError("Label names can't be changed once counters are set")
+            self._label_names = list(label_names)
+
+    def keys(self):
+        return self._descriptions.keys()
+
+    def descriptions(self):
+        """
+        Returns (name, description) pairs of the counters.
+        """
+        return self._descriptions.items()
+
+    def setter(self, name, labels):
+        """
+        Returns the method which sets the total of counter 'name' with label values 'labels'.
+        """
+        label_values = tuple(str(labels[label]) for label in self._label_names)
+        with self._lock:
+            state = self._states[name].get(label_values)
+            if state is None:
+                state = self._states[name][label_values] = _CounterState()
+        return state.set
+
+    def last_value(self, name, labels):
+        """
+        Returns the last value received for counter 'name' with label values 'labels', or None if none was.
+        """
+        label_values = tuple(str(labels[label]) for label in self._label_names)
+        with self._lock:
+            state = self._states[name].get(label_values)
+        return None if state is None else state.last
+
+    def remove(self, labels):
+        """
+        Removes the counters with label values 'labels' of all metrics.
+        """
+        label_values = tuple(str(labels[label]) for label in self._label_names)
+        with self._lock:
+            for states in self._states.values():
+                states.pop(label_values, None)
+
+    def describe(self):
+        for name, description in self._descriptions.items():
+            yield CounterMetricFamily(name, description, labels=self._label_names)
+
+    def collect(self):
+        with self._lock:
+            states = {
+                name: list(states.items()) for name, states in self._states.items()
+            }
+        for name, description in self._descriptions.items():
+            family = CounterMetricFamily(name, description, labels=self._label_names)
+            for label_values, state in states[name]:
+                family.add_metric(label_values, state.total, created=state.created)
+            yield family
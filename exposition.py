@@ -0,0 +1,295 @@
+import copy
+import gzip
+import logging
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+from prometheus_client.openmetrics.exposition import (
+    CONTENT_TYPE_LATEST as OPENMETRICS_CONTENT_TYPE,
+    generate_latest as generate_openmetrics,
+)
+
+from protobuf_exposition import CONTENT_TYPE_PROTOBUF, generate_protobuf
+
+logger = logging.getLogger("prometheus_handler")
+
+GZIP_COMPRESS_LEVEL = 6
+
+
+FORMAT_TEXT = "text"
+FORMAT_OPENMETRICS = "openmetrics"
+FORMAT_PROTOBUF = "protobuf"
+
+CONTENT_TYPES = {
+    FORMAT_TEXT: CONTENT_TYPE_LATEST,
+    FORMAT_OPENMETRICS: OPENMETRICS_CONTENT_TYPE,
+    FORMAT_PROTOBUF: CONTENT_TYPE_PROTOBUF,
+}
+
+# (format, gzipped) pairs rendered with every exposition before any scrape asks for them. Prometheus
+# prefers OpenMetrics and asks for gzip, other clients usually take the text format.
+PRERENDERED_FORMATS = frozenset(
+    (fmt, gzipped)
+    for fmt in (FORMAT_TEXT, FORMAT_OPENMETRICS)
+    for gzipped in (False, True)
+)
+
+
+class _Snapshot:
+    """
+    Registry-like view of already collected metric families, so that every format renders the same values.
+    """
+
+    def __init__(self, families):
+        self._families = families
+
+    def collect(self):
+        return iter(self._families)
+
+
+def _with_timestamp(families, timestamp):
+    stamped = []
+    for family in families:
+        family = copy.copy(family)
+        family.samples = [
+            (
+                sample
+                if sample.timestamp is not None
+                else sample._replace(timestamp=timestamp)
+            )
+            for sample in family.samples
+        ]
+        stamped.append(family)
+    return stamped
+
+
+class Rendered:
+    """
+    Snapshot of a registry taken at 'collected_at' (wall clock), with its rendered expositions.
+    Formats are rendered on first use, and once rendered, a buffer never changes.
+    """
+
+    def __init__(self, families, collected_at, sample_timestamps):
+        self._families = families
+        self._sample_timestamps = sample_timestamps
+        self._buffers = {}
+        self._lock = threading.Lock()
+        self.collected_at = collected_at
+        self.rendered_at = time.monotonic()
+
+    def get(self, fmt, gzipped):
+        body = self._buffers.get((fmt, gzipped))
+        if body is not None:
+            return body
+        with self._lock:
+            body = self._buffers.get((fmt, gzipped))
+            if body is None:
+                plain = self._buffers.get((fmt, False))
+                if plain is None:
+                    plain = self._render(fmt)
+                    self._buffers[(fmt, False)] = plain
+                if gzipped:
+                    body = gzip.compress(plain, compresslevel=GZIP_COMPRESS_LEVEL)
+                    self._buffers[(fmt, True)] = body
+                else:
+                    body = plain
+        return body
+
+    def _render(self, fmt):
+        if fmt == FORMAT_TEXT:
+            return generate_latest(_Snapshot(self._families))
+        # Only the formats which support sample timestamps carry the collection time.
+        timestamp = self.collected_at if self._sample_timestamps else None
+        if fmt == FORMAT_OPENMETRICS:
+            families = self._families
+            if timestamp is not None:
+                families = _with_timestamp(families, timestamp)
+            return generate_openmetrics(_Snapshot(families))
+        if fmt == FORMAT_PROTOBUF:
+            return generate_protobuf(self._families, timestamp)
+        raise ValueError(f"Unknown exposition format {fmt}")
+
+
+class ExpositionCache:
+    """
+    Keeps the last rendered exposition of a registry, so scrapes only write out a ready buffer.
+    The registry is collected and rendered by calling refresh() after every poll cycle. If 'max_age_seconds'
+    is set, a scrape which finds an older exposition renders a new one, and concurrent scrapes wait
+    for that single render. A refresh set with refresh_before_render() runs before the registry is collected.
+    Every render writes out PRERENDERED_FORMATS and the formats scrapes asked for through body() since the
+    cache was created, so a scrape doesn't pay for rendering its format.
+    """
+
+    def __init__(
+        self, registry=REGISTRY, max_age_seconds=None, sample_timestamps=False
+    ):
+        self._registry = registry
+        self._max_age_seconds = max_age_seconds
+        self._sample_timestamps = sample_timestamps
+        self._lock = threading.Lock()
+        self._rendered = None
+        self._refresh_source = None
+        # Replaced rather than updated, so that a render can iterate it while a scrape adds a format.
+        self._formats = PRERENDERED_FORMATS
+
+    def refresh_before_render(self, refresh):
+        """
+        Calls 'refresh' before every render, e.g. to pull Memgraph in scrape mode, so that no metric of the
+        registry is collected before the data it describes was updated.
+        """
+        self._refresh_source = refresh
+
+    def refresh(self):
+        with self._lock:
+            return self._render()
+
+    def get(self):
+        rendered = self._rendered
+        if self._is_fresh(rendered):
+            return rendered
+        with self._lock:
+            # Another scrape could have rendered the exposition while we were waiting on the lock.
+            rendered = self._rendered
+            if self._is_fresh(rendered):
+                return rendered
+            return self._render()
+
+    def body(self, fmt, gzipped):
+        """
+        Returns the last exposition rendered in 'fmt', and renders 'fmt' with every later exposition.
+        """
+        if (fmt, gzipped) not in self._formats:
+            self._formats = self._formats | {(fmt, gzipped)}
+        return self.get().get(fmt, gzipped)
+
+    def _is_fresh(self, rendered):
+        if rendered is None:
+            return False
+        if self._max_age_seconds is None:
+            return True
+        return time.monotonic() - rendered.rendered_at < self._max_age_seconds
+
+    def _render(self):
+        if self._refresh_source is not None:
+            self._refresh_source()
+        collected_at = time.time()
+        rendered = Rendered(
+            list(self._registry.collect()), collected_at, self._sample_timestamps
+        )
+        for fmt, gzipped in self._formats:
+            rendered.get(fmt, gzipped)
+        self._rendered = rendered
+        return rendered
+
+
+def choose_format(accept):
+    """
+    Picks the exposition format with the highest quality in the Accept header, the text format by default.
+    """
+    chosen = FORMAT_TEXT
+    chosen_quality = 0.0
+    for media_range in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        params = dict(param.split("=", 1) for param in params if "=" in param)
+        try:
+            quality = float(params.get("q", 1))
+        except ValueError:
+            continue
+        media_type = media_type.lower()
+        if (
+            media_type == "application/vnd.google.protobuf"
+            and params.get("proto") == "io.prometheus.client.MetricFamily"
+            and params.get("encoding") == "delimited"
+        ):
+            fmt = FORMAT_PROTOBUF
+        elif media_type == "application/openmetrics-text":
+            fmt = FORMAT_OPENMETRICS
+        elif media_type in ("text/plain", "text/*", "*/*"):
+            fmt = FORMAT_TEXT
+        else:
+            continue
+        if quality > chosen_quality:
+            chosen = fmt
+            chosen_quality = quality
+    return chosen
+
+
+def accepts_gzip(accept_encoding):
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() != "gzip":
+            continue
+        params = params.replace(" ", "")
+        return params not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def _make_handler(cache, prober=None):
+    class ExpositionHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self._write(include_body=True)
+
+        def do_HEAD(self):
+            self._write(include_body=False)
+
+        def _write(self, include_body):
+            url = urlsplit(self.path)
+            if url.path == "/favicon.ico":
+                self.send_error(404)
+                return
+            fmt = choose_format(self.headers.get("Accept"))
+            gzipped = accepts_gzip(self.headers.get("Accept-Encoding"))
+            try:
+                if url.path == "/probe" and prober is not None:
+                    rendered = self._probe(parse_qs(url.query))
+                    if rendered is None:
+                        return
+                    body = rendered.get(fmt, gzipped)
+                else:
+                    body = cache.body(fmt, gzipped)
+            except Exception as e:
+                logger.error("Error occurred while rendering metrics: %s", e)
+                self.send_error(500)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPES[fmt])
+            if gzipped:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Vary", "Accept, Accept-Encoding")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if include_body:
+                self.wfile.write(body)
+
+        def _probe(self, params):
+            target = params.get("target", [None])[0]
+            instance_type = params.get("type", ["data_instance"])[0]
+            if not target:
+                self.send_error(400, "Target parameter is missing")
+                return None
+            try:
+                return prober.probe(target, instance_type)
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return None
+
+        def log_message(self, format, *args):
+            pass
+
+    return ExpositionHandler
+
+
+def start_http_server(port, cache, addr="0.0.0.0", prober=None):
+    """
+    Starts an HTTP server in a daemon thread which serves the cached exposition.
+    If 'prober' is given, /probe?target=<host:port>&type=<instance type> is served by probing the target.
+    """
+    server = ThreadingHTTPServer((addr, port), _make_handler(cache, prober))
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
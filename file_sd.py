@@ -0,0 +1,112 @@
+import glob
+import json
+import logging
+import os
+import yaml
+
+logger = logging.getLogger("prometheus_handler")
+
+FILE_SD_CONFIGS = "file_sd_configs"
+NAME_LABEL = "name"
+TYPE_LABEL = "type"
+CLUSTER_LABEL = "cluster"
+SCHEME_LABEL = "__scheme__"
+DEFAULT_SCHEME = "http"
+
+
+def file_sd_patterns(config, config_dir=None):
+    """
+    Returns the file patterns listed under the 'files' of every entry of 'file_sd_configs'.
+    Relative patterns are resolved against 'config_dir', the directory of the configuration file.
+    """
+    return [
+        os.path.join(config_dir or "", pattern)
+        for file_sd_config in config.get(FILE_SD_CONFIGS, [])
+        for pattern in file_sd_config.get("files", [])
+    ]
+
+
+def file_sd_paths(patterns):
+    return sorted({path for pattern in patterns for path in glob.glob(pattern)})
+
+
+def _load_target_groups(path):
+    try:
+        with open(path, "r") as file:
+            if path.endswith(".json"):
+                return json.load(file) or []
+            return yaml.safe_load(file) or []
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        raise ValueError(f"Couldn't read targets from {path}: {e}")
+
+
+def _parse_target(target, scheme, path):
+    if "://" in target:
+        scheme, target = target.split("://", 1)
+    host, separator, port = target.rpartition(":")
+    if not separator or not port.isdigit():
+        raise ValueError(f"Target {target} in {path} has no port.")
+    return f"{scheme}://{host}", int(port)
+
+
+def _unknown_labels(static_labels, cluster, label_names):
+    unknown = sorted(set(static_labels) - set(label_names))
+    if cluster is not None and CLUSTER_LABEL not in label_names:
+        unknown.insert(0, CLUSTER_LABEL)
+    return unknown
+
+
+def discover_instances(patterns, label_names=None):
+    """
+    Reads the instances from Prometheus file_sd target files, in JSON or YAML, matching 'patterns'.
+    Every target group lists 'host:port' targets and the 'labels' shared by them: 'type' is the instance type,
+    'name' the instance name (the target itself if not set), 'cluster' the optional cluster name and
+    '__scheme__' the URL scheme. All other labels, except the ones starting with '__', are static labels of
+    the instances. Returns a dict with the keys of a configured instance and its 'cluster' and 'labels' for
+    every target.
+    If 'label_names' is given, target groups with a static label or a cluster which isn't among them are skipped,
+    since the label names of the series can't change while the exporter runs.
+    """
+    instances = []
+    for path in file_sd_paths(patterns):
+        groups = _load_target_groups(path)
+        if not isinstance(groups, list):
+            raise ValueError(f"Targets in {path} have to be a list of target groups.")
+        for group in groups:
+            labels = {
+                name: str(value) for name, value in group.get("labels", {}).items()
+            }
+            if TYPE_LABEL not in labels:
+                raise ValueError(f"Target group in {path} has no {TYPE_LABEL} label.")
+            scheme = labels.get(SCHEME_LABEL, DEFAULT_SCHEME)
+            static_labels = {
+                name: value
+                for name, value in labels.items()
+                if name not in (NAME_LABEL, TYPE_LABEL, CLUSTER_LABEL)
+                and not name.startswith("__")
+            }
+            if label_names is not None:
+                unknown = _unknown_labels(
+                    static_labels, labels.get(CLUSTER_LABEL), label_names
+                )
+                if unknown:
+                    logger.error(
+                        "Skipping target group %s in %s, label %s requires a restart of the exporter.",
+                        group.get("targets", []),
+                        path,
+                        ", ".join(unknown),
+                    )
+                    continue
+            for target in group.get("targets", []):
+                url, port = _parse_target(target, scheme, path)
+                instances.append(
+                    {
+                        "name": labels.get(NAME_LABEL, target),
+                        "url": url,
+                        "port": port,
+                        "type": labels[TYPE_LABEL],
+                        "cluster": labels.get(CLUSTER_LABEL),
+                        "labels": static_labels,
+                    }
+                )
+    return instances
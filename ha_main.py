@@ -1,95 +1,862 @@
+import json
 import logging
+import os
+import sys
+import threading
 import time
-import requests
 import yaml
 
-from prometheus_client import start_http_server
-
-from ha_model import update_metrics
+from concurrent.futures import ThreadPoolExecutor, wait
 
+from ha_model import (
+    all_metrics,
+    configure_labels,
+    default_model,
+    enable_metric_discovery,
+    select_sections,
+)
+from instance_health import HEALTH_HEALTHY, HealthConfig, InstanceHealth
+from leader_tracker import LeaderTracker
+from json_decoder import JSON_DECODER_AUTO, get_json_decoder
+from collection_workers import WorkerPool
+from config_watcher import ConfigWatcher
+from file_sd import discover_instances, file_sd_patterns
+from exposition import ExpositionCache, start_http_server
+from memgraph_client import HttpConfig, MemgraphClient
+from metric_discovery import DEFAULT_MAX_DISCOVERED_METRICS_PER_SECTION
+from self_metrics import (
+    configure_instance_labels,
+    default_instance_metrics,
+    default_poll_cycle_metrics,
+    InstanceTelemetry,
+)
+from probe import DEFAULT_MAX_PROBE_TARGETS, DEFAULT_PROBE_CACHE_TTL_SECONDS, Prober
+from sharding import ShardConfig
+from scrape_collector import (
+    COLLECTION_MODE_POLL,
+    COLLECTION_MODE_SCRAPE,
+    COLLECTION_MODES,
+    DEFAULT_SCRAPE_CACHE_TTL_SECONDS,
+    register_scrape_collector,
+)
 
 logger = logging.getLogger("prometheus_handler")
 
+INSTANCE_TYPES = ("coordinator", "data_instance")
+DEFAULT_MAX_CONCURRENCY = 16
+CONFIG_WATCH_INTERVAL_SECONDS = 1
+CLUSTER_LABEL = "cluster"
+INSTANCE_NAME_LABEL = "instance_name"
+
 
 class GeneralConfig:
-    def __init__(self, port, pull_frequency_seconds):
+    def __init__(
+        self,
+        port,
+        pull_frequency_seconds,
+        max_concurrency=DEFAULT_MAX_CONCURRENCY,
+        cycle_deadline_seconds=None,
+        collection_mode=COLLECTION_MODE_POLL,
+        scrape_cache_ttl_seconds=DEFAULT_SCRAPE_CACHE_TTL_SECONDS,
+        http_config=None,
+        sample_timestamps=False,
+        discover_metrics=False,
+        max_discovered_metrics_per_section=DEFAULT_MAX_DISCOVERED_METRICS_PER_SECTION,
+        json_decoder=JSON_DECODER_AUTO,
+        sections=None,
+        health_config=None,
+        stale_series_ttl_seconds=None,
+        enable_probe=False,
+        probe_cache_ttl_seconds=DEFAULT_PROBE_CACHE_TTL_SECONDS,
+        max_probe_targets=DEFAULT_MAX_PROBE_TARGETS,
+        shard_config=None,
+        watch_config_file=False,
+        follower_pull_frequency_seconds=None,
+        collection_workers=0,
+    ):
         self.port = port
         self.pull_frequency_seconds = pull_frequency_seconds
+        self.max_concurrency = max_concurrency
+        self.collection_mode = collection_mode
+        self.scrape_cache_ttl_seconds = scrape_cache_ttl_seconds
+        self.http_config = http_config or HttpConfig()
+        self.sample_timestamps = sample_timestamps
+        self.discover_metrics = discover_metrics
+        self.max_discovered_metrics_per_section = max_discovered_metrics_per_section
+        self.json_decoder = json_decoder
+        # Sections of the Memgraph metrics to export, all of them if None.
+        self.sections = sections
+        self.health_config = health_config or HealthConfig()
+        # Series of instances which weren't updated for this long are removed, never if None.
+        self.stale_series_ttl_seconds = stale_series_ttl_seconds
+        self.enable_probe = enable_probe
+        self.probe_cache_ttl_seconds = probe_cache_ttl_seconds
+        self.max_probe_targets = max_probe_targets
+        self.shard_config = shard_config or ShardConfig()
+        self.watch_config_file = watch_config_file
+        self.follower_pull_frequency_seconds = follower_pull_frequency_seconds
+        self.collection_workers = collection_workers
+        # If no deadline is given, a cycle may take at most one pull interval.
+        if cycle_deadline_seconds is None and pull_frequency_seconds > 0:
+            cycle_deadline_seconds = pull_frequency_seconds
+        self.cycle_deadline_seconds = cycle_deadline_seconds
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            port=data.get("port", 9115),
+            pull_frequency_seconds=data.get("pull_frequency_seconds", 0),
+            max_concurrency=data.get("max_concurrency", DEFAULT_MAX_CONCURRENCY),
+            cycle_deadline_seconds=data.get("cycle_deadline_seconds"),
+            collection_mode=data.get("collection_mode", COLLECTION_MODE_POLL),
+            scrape_cache_ttl_seconds=data.get(
+                "scrape_cache_ttl_seconds", DEFAULT_SCRAPE_CACHE_TTL_SECONDS
+            ),
+            http_config=HttpConfig.from_dict(data),
+            sample_timestamps=data.get("sample_timestamps", False),
+            discover_metrics=data.get("discover_metrics", False),
+            max_discovered_metrics_per_section=data.get(
+                "max_discovered_metrics_per_section",
+                DEFAULT_MAX_DISCOVERED_METRICS_PER_SECTION,
+            ),
+            json_decoder=data.get("json_decoder", JSON_DECODER_AUTO),
+            sections=data.get("sections"),
+            health_config=HealthConfig.from_dict(data),
+            stale_series_ttl_seconds=data.get("stale_series_ttl_seconds"),
+            enable_probe=data.get("enable_probe", False),
+            probe_cache_ttl_seconds=data.get(
+                "probe_cache_ttl_seconds", DEFAULT_PROBE_CACHE_TTL_SECONDS
+            ),
+            max_probe_targets=data.get("max_probe_targets", DEFAULT_MAX_PROBE_TARGETS),
+            shard_config=ShardConfig.from_dict(data),
+            watch_config_file=data.get("watch_config_file", False),
+            follower_pull_frequency_seconds=data.get("follower_pull_frequency_seconds"),
+            collection_workers=data.get("collection_workers", 0),
+        )
 
 
 class InstanceConfig:
-    def __init__(self, name, url, port, type):
+    def __init__(
+        self,
+        name,
+        url,
+        port,
+        type,
+        cluster=None,
+        labels=None,
+        pull_frequency_seconds=None,
+        follower_pull_frequency_seconds=None,
+    ):
         self.name = name
         self.url = url
         self.port = port
         self.type = type
+        self.metrics_url = f"{url}:{port}"
+        self.cluster = cluster
+        # Pull frequency of the instance, the exporter's pull_frequency_seconds if None.
+        self.pull_frequency_seconds = pull_frequency_seconds
+        # Pull frequency of a coordinator while it's a follower, its pull frequency if None.
+        self.follower_pull_frequency_seconds = follower_pull_frequency_seconds
+        # Label values of the series of the instance.
+        self.labels = dict(labels or {})
+        if cluster is not None:
+            self.labels[CLUSTER_LABEL] = cluster
+        self.labels[INSTANCE_NAME_LABEL] = name
+        # Identifies the instance across clusters.
+        self.key = name if cluster is None else f"{cluster}/{name}"
 
     def __str__(self):
+        if self.cluster is not None:
+            return f"InstanceConfig(cluster={self.cluster}, name={self.name}, url={self.url}, port={self.port})"
         return f"InstanceConfig(name={self.name}, url={self.url}, port={self.port})"
 
 
+def _instance_changed(old, new):
+    return (old.metrics_url, old.type, old.labels) != (
+        new.metrics_url,
+        new.type,
+        new.labels,
+    )
+
+
+def _cycles_between_pulls(pull_frequency_seconds, pull_interval_seconds):
+    if not pull_frequency_seconds or not pull_interval_seconds:
+        return 1
+    return max(1, round(pull_frequency_seconds / pull_interval_seconds))
+
+
 class HAExporterConfig:
     def __init__(self, config, instances):
         self.config = config
         self.instances = instances
 
 
+class InstancePoller:
+    """
+    Pulls metrics from all instances concurrently on a bounded thread pool.
+    Every cycle fans out one pull per instance and waits for them until the cycle deadline.
+    Pulls which haven't started by the deadline are cancelled, and instances whose pull is
+    still running are skipped in the next cycle instead of being queued up again.
+    Instances whose circuit is open after repeated failures are only pulled when their backoff has passed.
+    Series of instances which weren't updated successfully for 'stale_series_ttl_seconds' are removed until
+    the instance is updated again.
+    Instances with a pull frequency of their own, e.g. from a cluster, are pulled every that many seconds
+    rounded to a multiple of 'pull_interval_seconds', the interval between cycles.
+    With a 'worker_pool', instances are pulled and decoded by its worker processes and only their values are
+    applied by the poller.
+    Received values are applied to the HAModel 'model' and the self-metrics are reported to 'instance_metrics'
+    and 'poll_cycle_metrics', the ones of the exporter process in the default registry if they aren't given.
+    """
+
+    def __init__(
+        self,
+        instances,
+        max_concurrency,
+        cycle_deadline_seconds=None,
+        http_config=None,
+        decode_json=json.loads,
+        health_config=None,
+        stale_series_ttl_seconds=None,
+        pull_interval_seconds=None,
+        worker_pool=None,
+        model=None,
+        instance_metrics=None,
+        poll_cycle_metrics=None,
+    ):
+        self._model = model if model is not None else default_model()
+        self._instance_metrics = (
+            instance_metrics
+            if instance_metrics is not None
+            else default_instance_metrics()
+        )
+        self._poll_cycle_metrics = (
+            poll_cycle_metrics
+            if poll_cycle_metrics is not None
+            else default_poll_cycle_metrics()
+        )
+        self._http_config = http_config
+        self._worker_pool = worker_pool
+        self._health_config = health_config
+        self._pull_interval_seconds = pull_interval_seconds
+        self._instances = []
+        self._clients = {}
+        self._telemetry = {}
+        self._health = {}
+        # Instances are pulled every that many cycles, every cycle unless they have their own pull frequency.
+        self._pull_every = {}
+        self._follower_pull_every = {}
+        self._leaders = LeaderTracker()
+        self._cycle = 0
+        self._stale_series_ttl_seconds = stale_series_ttl_seconds
+        # Keys of instances whose series were removed.
+        self._evicted = set()
+        self._decode_json = decode_json
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency, thread_name_prefix="mg-poller"
+        )
+        self._in_flight = {}
+        # Held by poll cycles and instance updates, which can run on different threads in scrape mode.
+        self._lock = threading.Lock()
+        self._set_cycle_deadline(cycle_deadline_seconds)
+        for instance in instances:
+            self._add(instance)
+
+    def update(
+        self, instances, pull_interval_seconds=None, cycle_deadline_seconds=None
+    ):
+        """
+        Replaces the polled instances with 'instances' and returns the number of added and removed instances.
+        Instances which are configured the same way as before keep their connections, update plans and series.
+        Removed instances are forgotten once their running pull finished, together with their series,
+        and added ones are pulled from the next cycle on. Changed instances are removed and added again.
+        """
+        with self._lock:
+            current = {instance.key: instance for instance in self._instances}
+            updated = {instance.key: instance for instance in instances}
+            removed = [
+                instance
+                for key, instance in current.items()
+                if key not in updated or _instance_changed(instance, updated[key])
+            ]
+            running = [
+                self._in_flight[instance.key]
+                for instance in removed
+                if instance.key in self._in_flight
+            ]
+            wait(running)
+            for instance in removed:
+                self._forget(instance)
+            self._instances = []
+            self._pull_interval_seconds = pull_interval_seconds
+            self._set_cycle_deadline(cycle_deadline_seconds)
+            added = 0
+            for instance in instances:
+                if instance.key in self._clients:
+                    self._instances.append(instance)
+                    self._set_pull_frequency(instance)
+                else:
+                    self._add(instance)
+                    added += 1
+            return added, len(removed)
+
+    @property
+    def instance_count(self):
+        return len(self._instances)
+
+    def _add(self, instance):
+        # Worker processes keep the connections of the instances they pull.
+        self._clients[instance.key] = (
+            MemgraphClient(instance.metrics_url, self._http_config)
+            if self._worker_pool is None
+            else None
+        )
+        telemetry = InstanceTelemetry(instance.labels, self._instance_metrics)
+        self._telemetry[instance.key] = telemetry
+        self._health[instance.key] = InstanceHealth(
+            instance.key, self._health_config, telemetry.health
+        )
+        self._set_pull_frequency(instance)
+        self._model.compile_instance_update_plan(instance)
+        self._instances.append(instance)
+
+    def _forget(self, instance):
+        self._model.evict_instance(instance)
+        client = self._clients.pop(instance.key)
+        if client is not None:
+            client.close()
+        else:
+            self._worker_pool.forget(instance)
+        self._telemetry.pop(instance.key).remove()
+        del self._health[instance.key]
+        del self._pull_every[instance.key]
+        del self._follower_pull_every[instance.key]
+        self._leaders.forget(instance)
+        self._in_flight.pop(instance.key, None)
+        self._evicted.discard(instance.key)
+
+    def _set_pull_frequency(self, instance):
+        self._pull_every[instance.key] = _cycles_between_pulls(
+            instance.pull_frequency_seconds, self._pull_interval_seconds
+        )
+        self._follower_pull_every[instance.key] = _cycles_between_pulls(
+            instance.follower_pull_frequency_seconds or instance.pull_frequency_seconds,
+            self._pull_interval_seconds,
+        )
+
+    def _is_follower(self, instance):
+        # Followers are pulled at their own rate only while the leader answers, so that a new leader is found quickly.
+        if instance.type != "coordinator":
+            return False
+        leader = self._leaders.leader(instance.cluster)
+        return (
+            leader is not None
+            and leader != instance.key
+            and leader in self._health
+            and self._health[leader].state == HEALTH_HEALTHY
+        )
+
+    def _set_cycle_deadline(self, cycle_deadline_seconds):
+        self._cycle_deadline_seconds = cycle_deadline_seconds
+        if cycle_deadline_seconds is not None:
+            self._poll_cycle_metrics.deadline.set(cycle_deadline_seconds)
+
+    def poll_once(self):
+        """
+        Runs a single poll cycle and returns its duration in seconds.
+        """
+        with self._lock:
+            return self._poll_once()
+
+    def _poll_once(self):
+        started = time.monotonic()
+        futures = {}
+        cycle = self._cycle
+        self._cycle += 1
+        for instance in self._instances:
+            if self._is_follower(instance):
+                pull_every = self._follower_pull_every[instance.key]
+            else:
+                pull_every = self._pull_every[instance.key]
+            if cycle % pull_every:
+                continue
+            if not self._health[instance.key].should_pull(started):
+                continue
+            previous = self._in_flight.get(instance.key)
+            if previous is not None and not previous.done():
+                logger.warning(
+                    "Skipping instance %s, previous pull is still in progress.",
+                    instance.key,
+                )
+                continue
+            future = self._executor.submit(self._pull, instance)
+            self._in_flight[instance.key] = future
+            futures[future] = instance
+
+        _, not_done = wait(futures, timeout=self._cycle_deadline_seconds)
+        if not_done:
+            self._poll_cycle_metrics.deadline_exceeded.inc()
+        for future in not_done:
+            instance = futures[future]
+            if future.cancel():
+                logger.warning(
+                    "Pull for instance %s was cancelled, it didn't start before the cycle deadline of %ss.",
+                    instance.key,
+                    self._cycle_deadline_seconds,
+                )
+            else:
+                logger.warning(
+                    "Pull for instance %s didn't finish before the cycle deadline of %ss.",
+                    instance.key,
+                    self._cycle_deadline_seconds,
+                )
+
+        if self._stale_series_ttl_seconds is not None:
+            self._evict_stale_instances()
+        self._report_leaders()
+
+        cycle_duration = time.monotonic() - started
+        self._poll_cycle_metrics.duration.set(cycle_duration)
+        return cycle_duration
+
+    def _evict_stale_instances(self):
+        now = time.monotonic()
+        for instance in self._instances:
+            if instance.key in self._evicted:
+                continue
+            in_flight = self._in_flight.get(instance.key)
+            if in_flight is not None and not in_flight.done():
+                continue
+            stale_for = now - self._health[instance.key].last_success
+            if stale_for < self._stale_series_ttl_seconds:
+                continue
+            self._model.evict_instance(instance)
+            self._evicted.add(instance.key)
+            logger.warning(
+                "Removed the series of instance %s, it wasn't updated for %.0fs.",
+                instance.key,
+                stale_for,
+            )
+
+    def _report_leaders(self):
+        for instance in self._instances:
+            if instance.type == "coordinator":
+                self._telemetry[instance.key].leads(
+                    self._leaders.leader(instance.cluster) == instance.key
+                )
+
+    def _pull(self, instance):
+        if self._worker_pool is not None:
+            succeeded = collect_worker_metrics(
+                instance,
+                self._worker_pool,
+                self._telemetry[instance.key],
+                self._model,
+            )
+        else:
+            succeeded = collect_instance_metrics(
+                instance,
+                self._clients[instance.key],
+                self._telemetry[instance.key],
+                self._decode_json,
+                self._model,
+            )
+        health = self._health[instance.key]
+        if succeeded:
+            if instance.type == "coordinator":
+                self._leaders.observe(
+                    instance, self._model.become_leader_count(instance)
+                )
+            health.succeeded()
+            self._evicted.discard(instance.key)
+        else:
+            health.failed()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        for client in self._clients.values():
+            if client is not None:
+                client.close()
+        if self._worker_pool is not None:
+            self._worker_pool.shutdown()
+
+
 def load_yaml_config(filepath):
     with open(filepath, "r") as file:
         return yaml.safe_load(file)
 
 
-def pull_metrics(instance):
-    res = requests.get(f"{instance.url}:{instance.port}")
+def pull_metrics(instance, client, telemetry, decode_json):
+    started = time.perf_counter()
+    res = client.get()
+    telemetry.fetched(time.perf_counter() - started, len(res.content))
 
     if res.status_code != 200:
         raise Exception(
-            f"Memgraph instance on {instance.url}:{instance.port} couldn't be reached."
+            f"Memgraph instance on {instance.metrics_url} couldn't be reached."
+        )
+
+    started = time.perf_counter()
+    instance_metrics = decode_json(res.content)
+    telemetry.decoded(time.perf_counter() - started)
+    return instance_metrics
+
+
+def collect_instance_metrics(instance, client, telemetry, decode_json, model=None):
+    model = model if model is not None else default_model()
+    try:
+        instance_metrics = pull_metrics(instance, client, telemetry, decode_json)
+        started = time.perf_counter()
+        model.update_metrics(instance_metrics, instance)
+        telemetry.applied(time.perf_counter() - started)
+        telemetry.succeeded()
+        logger.info("Send update to Prometheus for instance %s", instance.key)
+        return True
+    except Exception as e:
+        telemetry.failed()
+        logger.error("Error occurred while updating metrics: %s", e)
+        return False
+
+
+def collect_worker_metrics(instance, worker_pool, telemetry, model=None):
+    model = model if model is not None else default_model()
+    try:
+        result = worker_pool.fetch(instance)
+        telemetry.fetched(result.fetch_seconds, result.response_bytes)
+        telemetry.decoded(result.decode_seconds)
+        started = time.perf_counter()
+        model.update_metric_values(result.values, result.extras, instance)
+        telemetry.applied(time.perf_counter() - started)
+        telemetry.succeeded()
+        logger.info("Send update to Prometheus for instance %s", instance.key)
+        return True
+    except Exception as e:
+        telemetry.failed()
+        logger.error("Error occurred while updating metrics: %s", e)
+        return False
+
+
+def start_worker_pool(general_config, json_decoder, model=None):
+    """
+    Starts the collection worker processes, or returns None if instances are pulled in the exporter process.
+    """
+    model = model if model is not None else default_model()
+    if not general_config.collection_workers:
+        return None
+    logger.info(
+        "HA exporter will pull instances in %d worker processes",
+        general_config.collection_workers,
+    )
+    return WorkerPool(
+        general_config.collection_workers,
+        general_config.http_config,
+        json_decoder,
+        model.instance_layouts(),
+        keep_extras=model.metric_discovery_enabled(),
+        max_concurrency=general_config.max_concurrency,
+    )
+
+
+def parse_instances(config, config_dir=None, label_names=None):
+    """
+    Returns the instances of 'config' and the label names of their series. Instances are listed either under
+    'instances', or under the 'instances' of named 'clusters', in which case their series are also labeled with
+    the cluster name and the static labels of the cluster. Instances can also be discovered from the target files
+    of 'file_sd_configs', whose relative paths are resolved against 'config_dir'.
+    On a reload, 'label_names' are the label names fixed at startup. Discovered target groups which don't fit
+    them are skipped, and instances listed in 'config' which don't fit them are rejected.
+    """
+    instances, label_names = _parse_instances(config, config_dir, label_names)
+    for instance in instances:
+        if instance.type not in INSTANCE_TYPES:
+            raise ValueError(f"Unknown instance type {instance.type}")
+    return instances, label_names
+
+
+def _configured_instances(config):
+    """
+    Yields every instance listed in 'config' with its cluster name, static labels and pull frequency.
+    """
+    if "clusters" in config and "instances" in config:
+        raise ValueError(
+            "Instances have to be listed either under instances or under clusters, not both."
+        )
+    for instance in config.get("instances", []):
+        yield instance, None, {}, None
+    for cluster in config.get("clusters", []):
+        labels = {name: str(value) for name, value in cluster.get("labels", {}).items()}
+        for instance in cluster.get("instances", []):
+            yield instance, cluster["name"], labels, cluster.get(
+                "pull_frequency_seconds"
+            )
+
+
+def _parse_instances(config, config_dir=None, label_names=None):
+    entries = list(_configured_instances(config))
+    for instance in discover_instances(
+        file_sd_patterns(config, config_dir), label_names
+    ):
+        entries.append((instance, instance["cluster"], instance["labels"], None))
+    static_label_names = sorted(
+        {name for _, _, labels, _ in entries for name in labels}
+    )
+    for name in (CLUSTER_LABEL, INSTANCE_NAME_LABEL):
+        if name in static_label_names:
+            raise ValueError(f"Label {name} is set by the exporter.")
+    # Without clusters and static labels the series only have the instance name label, as before clusters.
+    clustered = "clusters" in config or any(
+        cluster is not None for _, cluster, _, _ in entries
+    )
+    if label_names is not None:
+        added = set(static_label_names) - set(label_names)
+        if clustered and CLUSTER_LABEL not in label_names:
+            added.add(CLUSTER_LABEL)
+        if added:
+            raise ValueError(
+                f"Labels {', '.join(sorted(added))} aren't among the label names {label_names}, "
+                "which requires a restart."
+            )
+        clustered = CLUSTER_LABEL in label_names
+        static_label_names = [
+            name
+            for name in label_names
+            if name not in (CLUSTER_LABEL, INSTANCE_NAME_LABEL)
+        ]
+    if not clustered and not static_label_names:
+        instances = [
+            InstanceConfig(
+                name=instance["name"],
+                url=instance["url"],
+                port=instance["port"],
+                type=instance["type"],
+            )
+            for instance, _, _, _ in entries
+        ]
+        _check_duplicates(instances)
+        return instances, [INSTANCE_NAME_LABEL]
+
+    instances = []
+    for instance, cluster, labels, pull_frequency_seconds in entries:
+        # Instances without one of the static labels have it empty, which Prometheus treats as not set.
+        instance_labels = {name: "" for name in static_label_names}
+        instance_labels.update(labels)
+        instances.append(
+            InstanceConfig(
+                name=instance["name"],
+                url=instance["url"],
+                port=instance["port"],
+                type=instance["type"],
+                cluster=cluster or "",
+                labels=instance_labels,
+                pull_frequency_seconds=pull_frequency_seconds,
+            )
+        )
+    _check_duplicates(instances)
+    return instances, [CLUSTER_LABEL, *static_label_names, INSTANCE_NAME_LABEL]
+
+
+def _check_duplicates(instances):
+    keys = [instance.key for instance in instances]
+    duplicates = sorted({key for key in keys if keys.count(key) > 1})
+    if duplicates:
+        raise ValueError(
+            f"Instances {', '.join(duplicates)} are listed more than once."
+        )
+
+
+def apply_pull_frequencies(instances, general_config, exporter_config):
+    """
+    Sets the pull frequency of instances which don't have their own and returns the interval between poll cycles.
+    Clusters can have pull frequencies of their own, poll cycles then run at the shortest one.
+    """
+    poll_interval_seconds = general_config.pull_frequency_seconds
+    for instance in instances:
+        if instance.pull_frequency_seconds is None:
+            instance.pull_frequency_seconds = general_config.pull_frequency_seconds
+        if instance.type == "coordinator":
+            instance.follower_pull_frequency_seconds = (
+                general_config.follower_pull_frequency_seconds
+            )
+        if poll_interval_seconds > 0:
+            poll_interval_seconds = min(
+                poll_interval_seconds, instance.pull_frequency_seconds
+            )
+    if (
+        exporter_config.get("cycle_deadline_seconds") is None
+        and poll_interval_seconds > 0
+    ):
+        general_config.cycle_deadline_seconds = poll_interval_seconds
+    return poll_interval_seconds
+
+
+def _pull_interval(collection_mode, poll_interval_seconds):
+    # In scrape mode every scrape pulls all instances.
+    return poll_interval_seconds if collection_mode == COLLECTION_MODE_POLL else None
+
+
+def reload_config(config_file, poller, label_names, watcher):
+    """
+    Applies the instances and pull frequencies of 'config_file' and its file_sd target files to 'poller' and returns
+    the new interval between poll cycles, or None if the configuration couldn't be applied. Other options take
+    effect after a restart.
+    """
+    try:
+        config = load_yaml_config(config_file)
+        config_dir = os.path.dirname(config_file)
+        watcher.watch(file_sd_patterns(config, config_dir))
+        instances, _ = parse_instances(config, config_dir, label_names)
+        exporter_config = config.get("exporter", {})
+        general_config = GeneralConfig.from_dict(exporter_config)
+        instances = general_config.shard_config.select(instances)
+        poll_interval_seconds = apply_pull_frequencies(
+            instances, general_config, exporter_config
+        )
+        added, removed = poller.update(
+            instances,
+            _pull_interval(general_config.collection_mode, poll_interval_seconds),
+            general_config.cycle_deadline_seconds,
         )
+    except Exception as e:
+        logger.error("Error occurred while reloading the configuration: %s", e)
+        return None
+    logger.info(
+        "Reloaded the configuration, %d instances were added and %d removed",
+        added,
+        removed,
+    )
+    return poll_interval_seconds
 
-    return res.json()
+
+def start_serving(general_config, decode_json):
+    """
+    Starts the HTTP server and returns the exposition cache it serves from.
+    """
+    prober = None
+    if general_config.enable_probe:
+        logger.info("HA exporter will probe targets on /probe")
+        prober = Prober(
+            http_config=general_config.http_config,
+            decode_json=decode_json,
+            cache_ttl_seconds=general_config.probe_cache_ttl_seconds,
+            max_targets=general_config.max_probe_targets,
+            sample_timestamps=general_config.sample_timestamps,
+        )
+    if general_config.collection_mode == COLLECTION_MODE_SCRAPE:
+        exposition_cache = ExpositionCache(
+            max_age_seconds=general_config.scrape_cache_ttl_seconds,
+            sample_timestamps=general_config.sample_timestamps,
+        )
+    else:
+        # The exposition is rendered once per poll cycle and every scrape is served from it.
+        exposition_cache = ExpositionCache(
+            sample_timestamps=general_config.sample_timestamps
+        )
+    start_http_server(general_config.port, exposition_cache, prober=prober)
+    return exposition_cache
 
 
 def run(config_file):
     config = load_yaml_config(config_file)
-    instances = [
-        InstanceConfig(
-            name=instance["name"],
-            url=instance["url"],
-            port=instance["port"],
-            type=instance["type"],
-        )
-        for instance in config.get("instances", [])
-    ]
+    config_dir = os.path.dirname(config_file)
+    try:
+        instances, label_names = parse_instances(config, config_dir)
+    except ValueError as e:
+        logger.error("%s", e)
+        sys.exit(-1)
+    exporter_config = config.get("exporter", {})
+    try:
+        general_config = GeneralConfig.from_dict(exporter_config)
+    except ValueError as e:
+        logger.error("%s", e)
+        sys.exit(-1)
+    instances = general_config.shard_config.select(instances)
     instances_str = "\n\t".join(str(instance) for instance in instances)
     logger.info(
         "HA exporter will use the following instances to collect metrics:\n\t%s",
         instances_str,
     )
-    general_config = GeneralConfig(
-        port=config.get("exporter", {}).get("port", 9115),
-        pull_frequency_seconds=config.get("exporter", {}).get(
-            "pull_frequency_seconds", 0
-        ),
+    poll_interval_seconds = apply_pull_frequencies(
+        instances, general_config, exporter_config
     )
+    if general_config.collection_mode not in COLLECTION_MODES:
+        logger.error("Unknown collection mode %s", general_config.collection_mode)
+        sys.exit(-1)
+    try:
+        json_decoder, decode_json = get_json_decoder(general_config.json_decoder)
+        if label_names != [INSTANCE_NAME_LABEL]:
+            configure_labels(label_names)
+            configure_instance_labels(label_names)
+        if general_config.sections is not None:
+            select_sections(general_config.sections)
+    except ValueError as e:
+        logger.error("%s", e)
+        sys.exit(-1)
+    logger.info("HA exporter will decode responses with the %s decoder", json_decoder)
+    if general_config.discover_metrics:
+        enable_metric_discovery(general_config.max_discovered_metrics_per_section)
+    if general_config.collection_mode == COLLECTION_MODE_SCRAPE:
+        logger.info("HA exporter will pull metrics when it is scraped")
+    else:
+        logger.info(
+            "HA exporter will pull metrics every %ds",
+            general_config.pull_frequency_seconds,
+        )
     logger.info(
-        "HA exporter will pull metrics every %ds", general_config.pull_frequency_seconds
+        "HA exporter will pull at most %d instances concurrently",
+        general_config.max_concurrency,
     )
     logger.info("HA exporter is started on: localhost:%s\n\n", general_config.port)
     exporter = HAExporterConfig(instances=instances, config=general_config)
 
-    start_http_server(exporter.config.port)
+    # Serve right away, so that a restarted exporter answers scrapes before the workers are started
+    # and the first poll cycle finished.
+    exposition_cache = start_serving(exporter.config, decode_json)
+
+    poller = InstancePoller(
+        exporter.instances,
+        max_concurrency=exporter.config.max_concurrency,
+        cycle_deadline_seconds=exporter.config.cycle_deadline_seconds,
+        http_config=exporter.config.http_config,
+        decode_json=decode_json,
+        health_config=exporter.config.health_config,
+        stale_series_ttl_seconds=exporter.config.stale_series_ttl_seconds,
+        pull_interval_seconds=_pull_interval(
+            exporter.config.collection_mode, poll_interval_seconds
+        ),
+        worker_pool=start_worker_pool(exporter.config, json_decoder),
+    )
+    watcher = ConfigWatcher(
+        config_file,
+        exporter.config.watch_config_file,
+        file_sd_patterns(config, config_dir),
+    )
+
+    if exporter.config.collection_mode == COLLECTION_MODE_SCRAPE:
+        # Every scrape fans out to all instances, concurrent scrapes share one poll cycle.
+        register_scrape_collector(
+            poller.poll_once,
+            all_metrics(),
+            exporter.config.scrape_cache_ttl_seconds,
+            exposition_cache=exposition_cache,
+        )
+        while True:
+            watcher.wait(CONFIG_WATCH_INTERVAL_SECONDS)
+            if watcher.should_reload():
+                reload_config(config_file, poller, label_names, watcher)
 
     while True:
-        for instance in exporter.instances:
-            try:
-                instance_metrics = pull_metrics(instance)
-                update_metrics(instance_metrics, instance)
-                logger.info("Send update to Prometheus for instance %s", instance.name)
-            except Exception as e:
-                logger.error("Error occurred while updating metrics: %s", e)
-            finally:
-                time.sleep(exporter.config.pull_frequency_seconds)
+        if watcher.should_reload():
+            poll_interval_seconds = (
+                reload_config(config_file, poller, label_names, watcher)
+                or poll_interval_seconds
+            )
+        cycle_duration = poller.poll_once()
+        exposition_cache.refresh()
+        logger.info(
+            "Poll cycle for %d instances finished in %.3fs",
+            poller.instance_count,
+            cycle_duration,
+        )
+        watcher.wait(max(0.0, poll_interval_seconds - cycle_duration))
 
 
 if __name__ == "__main__":
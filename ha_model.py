@@ -1,273 +1,403 @@
-from functools import partial
 import logging
 import sys
+import threading
 from typing import Dict
 
-from prometheus_client import Counter, Gauge
-
-from metrics.general_metrics import general_data
-from metrics.trigger_metrics import trigger_data
-from metrics.transaction_metrics import txn_data
-from metrics.session_metrics import session_data
-from metrics.ttl_metrics import ttl_data
-from metrics.stream_metrics import stream_data
-from metrics.snapshot_metrics import snapshot_data
-from metrics.query_type_metrics import query_type_data
-from metrics.query_metrics import query_data
-from metrics.index_metrics import index_data
-from metrics.operator_metrics import operator_data
-from metrics.ha_metrics import (
-    ha_data_instances_metrics,
-    ha_coordinator_metrics,
-    ha_coordinators_agg_metrics,
-    ha_data_instances_counter_metrics,
+from prometheus_client import REGISTRY
+from prometheus_client.metrics_core import CounterMetricFamily, GaugeMetricFamily
+
+from metrics.catalog import (
+    COUNTER,
+    GAUGE_TYPES,
+    ROLE_COORDINATOR,
+    ROLE_DATA_INSTANCE,
+    metric_groups,
 )
+from counter_collector import CumulativeCounterCollector
+from lazy_gauges import LazyGauges
+from metric_discovery import MetricDiscovery
+from update_plan import compile_update_plan
+from leader_tracker import LEADER_COUNTER
+from self_metrics import UpdateMetrics, default_update_metrics
 
-# Metrics related to HA specific to each data instance
-PrometheusHADataInstancesMetrics = {
-    name: Gauge(name, description, ["instance_name"])
-    for name, description in ha_data_instances_metrics
-}
+logger = logging.getLogger("prometheus_handler")
 
-# Counter metrics for data instances
-PrometheusHADataInstancesCounterMetrics = {
-    name: Counter(name, description)
-    for name, description in ha_data_instances_counter_metrics
-}
 
-# Metrics specific to each coordinator
-PrometheusHACoordinatorMetrics = {
-    name: Gauge(name, description, ["instance_name"])
-    for name, description in ha_coordinator_metrics
-}
-# Metrics common to all coordinators
-PrometheusHACoordinatorsAggMetrics = {
-    name: Counter(name, description)
-    for name, description in ha_coordinators_agg_metrics
-}
+class HAModel:
+    """
+    Metrics of the HA exporter and the update plans of its instances, registered in 'registry'.
+    Gauges of every section are created the first time the section is used. Models with different
+    registries are independent of each other, so several exporters can run in one process. Applied and
+    skipped values are counted in 'update_metrics', new ones registered in 'registry' if None.
+    """
 
-PrometheusIndexData = {
-    name: Gauge(name, description, ["instance_name"])
-    for name, description in index_data
-}
-PrometheusGeneralData = {
-    name: Gauge(name, description, ["instance_name"])
-    for name, description in general_data
-}
-PrometheusOperatorData = {
-    name: Gauge(name, f"Number of times {name} has been called.", ["instance_name"])
-    for name in operator_data
-}
-PrometheusQueryData = {
-    name: Gauge(name, description, ["instance_name"])
-    for name, description in query_data
-}
-PrometheusQueryTypeData = {
-    name: Gauge(name, description, ["instance_name"])
-    for name, description in query_type_data
-}
-PrometheusSessionData = {
-    name: Gauge(name, description, ["instance_name"])
-    for name, description in session_data
-}
-PrometheusSnapshotData = {
-    name: Gauge(name, description, ["instance_name"])
-    for name, description in snapshot_data
-}
-PrometheusStreamData = {
-    name: Gauge(name, description, ["instance_name"])
-    for name, description in stream_data
-}
-PrometheusTransactionData = {
-    name: Gauge(name, description, ["instance_name"]) for name, description in txn_data
-}
-PrometheusTriggerData = {
-    name: Gauge(name, description, ["instance_name"])
-    for name, description in trigger_data
-}
-PrometheusTTLData = {
-    name: Gauge(name, description, ["instance_name"]) for name, description in ttl_data
-}
+    def __init__(
+        self, label_names=("instance_name",), registry=REGISTRY, update_metrics=None
+    ):
+        # Label names of all metrics, in order, see set_label_names().
+        self.label_names = list(label_names)
+        self.registry = registry
+        self._update_counts = (
+            update_metrics if update_metrics is not None else UpdateMetrics(registry)
+        )
+        # Gauge and counter sections of the metrics received from each type of instance, built from the
+        # catalog. Metrics which several types report, e.g. the General section, are shared between them.
+        self.instance_type_sections = {
+            ROLE_DATA_INSTANCE: ([], []),
+            ROLE_COORDINATOR: ([], []),
+        }
+        self._gauge_groups = []
+        self._counter_groups = []
+        for section, roles, metrics in metric_groups(GAUGE_TYPES):
+            gauges = LazyGauges(metrics, self.label_names, registry)
+            self._add_group(self._gauge_groups, 0, section, roles, gauges)
+        for section, roles, metrics in metric_groups((COUNTER,)):
+            collector = CumulativeCounterCollector(metrics, self.label_names, registry)
+            self._add_group(self._counter_groups, 1, section, roles, collector)
+        self.data_instance_sections, self.data_instance_counter_sections = (
+            self.instance_type_sections[ROLE_DATA_INSTANCE]
+        )
+        self.coordinator_sections, self.coordinator_counter_sections = (
+            self.instance_type_sections[ROLE_COORDINATOR]
+        )
 
+        # Names of the exported sections, all of them unless only some are selected.
+        self._exported_section_names = None
+        # Update plans compiled for each instance, by instance key.
+        self._update_plans = {}
+        self._discovery = None
 
-logger = logging.getLogger("prometheus_handler")
+    def _add_group(self, groups, index, section, roles, metrics):
+        instance_types = [role for role in roles if role in self.instance_type_sections]
+        if not instance_types:
+            # Metrics which only the standalone exporter exports.
+            return
+        groups.append((section, metrics))
+        for instance_type in instance_types:
+            self.instance_type_sections[instance_type][index].append((section, metrics))
 
+    def set_label_names(self, label_names):
+        """
+        Sets the label names of all metrics, e.g. ["cluster", "instance_name"]. Gauges which were created
+        already are registered again with the new label names, so this has to be called before sections are
+        selected, metric discovery is enabled or update plans are compiled.
+        """
+        self.label_names = list(label_names)
+        for _, prom_data in self._gauge_sections():
+            prom_data.set_label_names(self.label_names)
+        for _, collector in self._counter_sections():
+            collector.set_label_names(self.label_names)
 
-def safe_execute(func):
-    try:
-        func()
-    except Exception as e:
-        logger.error("Error occurred while updating metrics: %s", e)
+    def _gauge_sections(self):
+        """
+        Yields (section, gauges) pairs of all gauge sections, each of them once.
+        """
+        yield from self._gauge_groups
 
+    def _counter_sections(self):
+        yield from self._counter_groups
 
-def aggregate_gauges(mg_data, prom_data):
-    """
-    Aggregate gauge values.
-    """
-    for key, value in mg_data.items():
-        if key not in prom_data:
-            continue
-        prom_data[key].inc(amount=value)
+    def _is_exported(self, section):
+        return (
+            self._exported_section_names is None
+            or section in self._exported_section_names
+        )
 
+    def all_metrics(self):
+        """
+        Returns all metrics which the HA exporter exposes. Gauges of sections which weren't used yet are created.
+        """
+        for section, prom_data in self._gauge_sections():
+            if self._is_exported(section):
+                yield from prom_data.values()
+        for section, collector in self._counter_sections():
+            if self._is_exported(section):
+                yield collector
 
-def update_gauges(mg_data, prom_data, instance_name):
-    """
-    Updates metrics on Prometheus which are specific to an instance. Metrics specific to an instance are labeled with 'instance_name'.
-    """
-    for key, value in mg_data.items():
-        if key not in prom_data:
-            continue
-        prom_data[key].labels(instance_name=instance_name).set(value)
-
-
-def update_data_instance_metrics(mg_data, instance_name):
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Index"],
-            PrometheusIndexData,
-            instance_name,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Operator"],
-            PrometheusOperatorData,
-            instance_name,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Query"],
-            PrometheusQueryData,
-            instance_name,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["QueryType"],
-            PrometheusQueryTypeData,
-            instance_name,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Session"],
-            PrometheusSessionData,
-            instance_name,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Snapshot"],
-            PrometheusSnapshotData,
-            instance_name,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Stream"],
-            PrometheusStreamData,
-            instance_name,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Transaction"],
-            PrometheusTransactionData,
-            instance_name,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Trigger"],
-            PrometheusTriggerData,
-            instance_name,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["TTL"],
-            PrometheusTTLData,
-            instance_name,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["General"],
-            PrometheusGeneralData,
-            instance_name,
-        )
-    )
-
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["HighAvailability"],
-            PrometheusHADataInstancesMetrics,
-            instance_name,
+    def _created_metrics(self):
+        """
+        Returns all metrics which the HA exporter exposes, without creating the gauges of unused sections.
+        """
+        for section, prom_data in self._gauge_sections():
+            if self._is_exported(section):
+                yield from prom_data.built_values()
+        for section, collector in self._counter_sections():
+            if self._is_exported(section):
+                yield collector
+
+    def exported_sections(self, sections):
+        """
+        Returns the (section, metrics) pairs of 'sections' which are exported.
+        """
+        return [
+            (section, data) for section, data in sections if self._is_exported(section)
+        ]
+
+    def select_sections(self, section_names):
+        """
+        Exports only the metrics of the sections 'section_names'. Metrics of the other sections are removed from
+        the registry, and their values are skipped without being looked at.
+        Can be called only once, before update plans are compiled.
+        """
+        known = {section for section, _ in self._gauge_sections()}
+        unknown = set(section_names) - known
+        if unknown:
+            raise ValueError(f"Unknown sections {', '.join(sorted(unknown))}")
+        for section, prom_data in self._gauge_sections():
+            if section not in section_names:
+                prom_data.unregister()
+        for section, collector in self._counter_sections():
+            if section not in section_names:
+                self.registry.unregister(collector)
+        self._exported_section_names = frozenset(section_names)
+
+    def enable_metric_discovery(self, max_metrics_per_section):
+        """
+        Registers metrics which aren't in the static catalogs the first time an instance reports them.
+        Has to be called before update plans are compiled.
+        """
+        # Gauges of sections which weren't used yet aren't registered, so their names are reserved up front.
+        reserved_names = [
+            name for _, prom_data in self._gauge_sections() for name in prom_data
+        ]
+        reserved_names.extend(
+            name
+            for _, collector in self._counter_sections()
+            for name in collector.keys()
         )
-    )
-
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["HighAvailability"],
-            PrometheusHADataInstancesCounterMetrics,
-            instance_name,
+        self._discovery = MetricDiscovery(
+            self.label_names, max_metrics_per_section, self.registry, reserved_names
         )
-    )
 
+    def metric_discovery_enabled(self):
+        return self._discovery is not None
 
-def update_coordinator_metrics(mg_data, instance_name):
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["General"],
-            PrometheusGeneralData,
-            instance_name,
-        )
-    )
-
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["HighAvailability"],
-            PrometheusHACoordinatorMetrics,
-            instance_name,
+    def compile_instance_update_plan(self, instance):
+        """
+        Compiles the update plan for 'instance' and caches it, so that every later update of the instance
+        uses the pre-resolved labeled metrics. Raises ValueError for unknown instance types.
+        """
+        if instance.type not in self.instance_type_sections:
+            raise ValueError(f"Unknown instance type {instance.type}")
+        gauge_sections, counter_sections = self.instance_type_sections[instance.type]
+        plan = compile_update_plan(
+            self.exported_sections(gauge_sections),
+            instance.labels,
+            counter_sections=self.exported_sections(counter_sections),
+            discovery=self._discovery,
+            update_metrics=self._update_counts,
         )
-    )
+        self._update_plans[instance.key] = plan
+        return plan
 
-    safe_execute(
-        partial(
-            aggregate_gauges,
-            mg_data["HighAvailability"],
-            PrometheusHACoordinatorsAggMetrics,
+    def convert_metrics(self, mg_data: Dict[str, Dict[str, int]], instance_type):
+        """
+        Converts metrics received from a single instance of type 'instance_type' into unlabeled metric families,
+        without updating the exported metrics. Metrics which weren't received are left out.
+        """
+        gauge_sections, counter_sections = self.instance_type_sections[instance_type]
+        families = []
+        # The catalog's descriptions are enough, so probing doesn't create or register the exported metrics.
+        for sections, family_type in (
+            (gauge_sections, GaugeMetricFamily),
+            (counter_sections, CounterMetricFamily),
+        ):
+            for section, metrics in self.exported_sections(sections):
+                values = mg_data.get(section)
+                if not values:
+                    continue
+                for name, description in metrics.descriptions():
+                    if name in values:
+                        families.append(
+                            family_type(name, description, value=values[name])
+                        )
+        return families
+
+    def evict_instance(self, instance):
+        """
+        Removes the series of 'instance' from all metrics. Its update plan is dropped as well, so the series are
+        created again with fresh values when the instance is updated the next time.
+        """
+        self._update_plans.pop(instance.key, None)
+        label_values = [instance.labels[name] for name in self.label_names]
+        metrics = list(self._created_metrics())
+        if self._discovery is not None:
+            metrics.extend(self._discovery.metrics())
+        for metric in metrics:
+            if isinstance(metric, CumulativeCounterCollector):
+                metric.remove(instance.labels)
+                continue
+            try:
+                metric.remove(*label_values)
+            except KeyError:
+                # Older versions of prometheus_client raise if the instance has no series.
+                pass
+
+    def instance_layouts(self):
+        """
+        Returns the (section, key) pairs of the update plan slots of every instance type, in slot order.
+        """
+        layouts = {}
+        for instance_type, (
+            gauge_sections,
+            counter_sections,
+        ) in self.instance_type_sections.items():
+            plan = compile_update_plan(
+                self.exported_sections(gauge_sections),
+                counter_sections=self.exported_sections(counter_sections),
+            )
+            layouts[instance_type] = plan.layout()
+        return layouts
+
+    def become_leader_count(self, instance):
+        """
+        Returns the last BecomeLeaderSuccess count received from coordinator 'instance', or None if none was.
+        """
+        counters = dict(self.coordinator_counter_sections)["HighAvailability"]
+        return counters.last_value(LEADER_COUNTER, instance.labels)
+
+    def _update_plan(self, instance):
+        plan = self._update_plans.get(instance.key)
+        if plan is None:
+            plan = self.compile_instance_update_plan(instance)
+        return plan
+
+    def update_metrics(self, mg_data: Dict[str, Dict[str, int]], instance):
+        """
+        Updates data on Prometheus based on metrics received for instance 'instance'.
+        Parameters:
+        mg_data: Data received from Memgraph instance with name 'instance_name'.
+        instance: The instance whose data is being processed.
+        """
+        self._update_plan(instance).apply(mg_data)
+
+    def update_metric_values(self, values, extras, instance):
+        """
+        Updates data on Prometheus based on metrics of instance 'instance' pulled by a collection worker.
+        Parameters:
+        values: One value per slot of the layout of the instance type, see instance_layouts().
+        extras: Received keys which aren't in the layout, as {section: {key: value}}.
+        instance: The instance whose data is being processed.
+        """
+        self._update_plan(instance).apply_values(values, extras)
+
+
+# Model of the exporter process, registered in the default registry when it is first used. The functions
+# below work on it.
+_model = None
+_model_lock = threading.Lock()
+
+
+def default_model():
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = HAModel(update_metrics=default_update_metrics())
+        return _model
+
+
+# Sections of the model of the exporter process by module attribute, looked up by __getattr__() so that
+# importing the module doesn't create the model.
+_SECTIONS_ATTRIBUTES = {
+    "DATA_INSTANCE_SECTIONS": "data_instance_sections",
+    "DATA_INSTANCE_COUNTER_SECTIONS": "data_instance_counter_sections",
+    "COORDINATOR_SECTIONS": "coordinator_sections",
+    "COORDINATOR_COUNTER_SECTIONS": "coordinator_counter_sections",
+    "INSTANCE_TYPE_SECTIONS": "instance_type_sections",
+}
+_SECTION_ATTRIBUTES = {
+    **{
+        f"Prometheus{section}Data": ("data_instance_sections", section)
+        for section in (
+            "Index",
+            "General",
+            "Operator",
+            "Query",
+            "QueryType",
+            "Session",
+            "Snapshot",
+            "Stream",
+            "Transaction",
+            "Trigger",
+            "TTL",
         )
-    )
+    },
+    "PrometheusHADataInstancesMetrics": ("data_instance_sections", "HighAvailability"),
+    "PrometheusHADataInstancesCounters": (
+        "data_instance_counter_sections",
+        "HighAvailability",
+    ),
+    "PrometheusHACoordinatorMetrics": ("coordinator_sections", "HighAvailability"),
+    "PrometheusHACoordinatorsCounters": (
+        "coordinator_counter_sections",
+        "HighAvailability",
+    ),
+}
 
 
-def update_metrics(mg_data: Dict[str, Dict[str, int]], instance):
+def __getattr__(name):
+    if name in _SECTIONS_ATTRIBUTES:
+        return getattr(default_model(), _SECTIONS_ATTRIBUTES[name])
+    if name in _SECTION_ATTRIBUTES:
+        sections, section = _SECTION_ATTRIBUTES[name]
+        return dict(getattr(default_model(), sections))[section]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def configure_labels(label_names):
     """
-    Updates data on Prometheus based on metrics received for instance 'instance'.
-    Parameters:
-    mg_data: Data received from Memgraph instance with name 'instance_name'.
-    instance: The instance whose data is being processed.
+    Sets the label names of all HA metrics, e.g. ["cluster", "instance_name"], see HAModel.set_label_names().
     """
-    if instance.type == "data_instance":
-        update_data_instance_metrics(mg_data, instance.name)
-    elif instance.type == "coordinator":
-        update_coordinator_metrics(mg_data, instance.name)
-    else:
-        logger.error("Unknown instance type %s", instance.type)
+    default_model().set_label_names(label_names)
+
+
+def all_metrics():
+    return default_model().all_metrics()
+
+
+def exported_sections(sections):
+    return default_model().exported_sections(sections)
+
+
+def select_sections(section_names):
+    default_model().select_sections(section_names)
+
+
+def enable_metric_discovery(max_metrics_per_section):
+    default_model().enable_metric_discovery(max_metrics_per_section)
+
+
+def metric_discovery_enabled():
+    return default_model().metric_discovery_enabled()
+
+
+def compile_instance_update_plan(instance):
+    try:
+        return default_model().compile_instance_update_plan(instance)
+    except ValueError as e:
+        logger.error("%s", e)
         sys.exit(-1)
+
+
+def convert_metrics(mg_data: Dict[str, Dict[str, int]], instance_type):
+    return default_model().convert_metrics(mg_data, instance_type)
+
+
+def evict_instance(instance):
+    default_model().evict_instance(instance)
+
+
+def instance_layouts():
+    return default_model().instance_layouts()
+
+
+def become_leader_count(instance):
+    return default_model().become_leader_count(instance)
+
+
+def update_metrics(mg_data: Dict[str, Dict[str, int]], instance):
+    default_model().update_metrics(mg_data, instance)
+
+
+def update_metric_values(values, extras, instance):
+    default_model().update_metric_values(values, extras, instance)
@@ -0,0 +1,113 @@
+import logging
+import random
+import time
+
+logger = logging.getLogger("prometheus_handler")
+
+HEALTH_HEALTHY = "healthy"
+HEALTH_DEGRADED = "degraded"
+HEALTH_OPEN = "open"
+HEALTH_STATES = (HEALTH_HEALTHY, HEALTH_DEGRADED, HEALTH_OPEN)
+
+DEFAULT_FAILURE_THRESHOLD = 3
+DEFAULT_BACKOFF_INITIAL_SECONDS = 5
+DEFAULT_BACKOFF_MAX_SECONDS = 300
+DEFAULT_BACKOFF_JITTER = 0.2
+
+
+class HealthConfig:
+    def __init__(
+        self,
+        failure_threshold=DEFAULT_FAILURE_THRESHOLD,
+        backoff_initial_seconds=DEFAULT_BACKOFF_INITIAL_SECONDS,
+        backoff_max_seconds=DEFAULT_BACKOFF_MAX_SECONDS,
+        backoff_jitter=DEFAULT_BACKOFF_JITTER,
+    ):
+        self.failure_threshold = failure_threshold
+        self.backoff_initial_seconds = backoff_initial_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.backoff_jitter = backoff_jitter
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            failure_threshold=data.get("failure_threshold", DEFAULT_FAILURE_THRESHOLD),
+            backoff_initial_seconds=data.get(
+                "backoff_initial_seconds", DEFAULT_BACKOFF_INITIAL_SECONDS
+            ),
+            backoff_max_seconds=data.get(
+                "backoff_max_seconds", DEFAULT_BACKOFF_MAX_SECONDS
+            ),
+            backoff_jitter=data.get("backoff_jitter", DEFAULT_BACKOFF_JITTER),
+        )
+
+
+class InstanceHealth:
+    """
+    Circuit breaker of a single instance. A healthy instance becomes degraded when a pull fails and is still pulled
+    every cycle. After 'failure_threshold' failed pulls in a row the circuit opens, and the instance is only probed
+    once the backoff has passed. The backoff doubles with every failed probe up to the maximum, with random jitter
+    so that instances which went down together aren't probed together. Any successful pull makes it healthy again.
+    """
+
+    def __init__(self, instance_name, config=None, metric=None):
+        self._instance_name = instance_name
+        self._config = config or HealthConfig()
+        self._state = HEALTH_HEALTHY
+        self._consecutive_failures = 0
+        self._next_attempt = 0.0
+        # Time of the last successful pull, or of when the instance was added if it never succeeded.
+        self.last_success = time.monotonic()
+        # Enum child which the state is reported to.
+        self._metric = metric
+        if metric is not None:
+            metric.state(HEALTH_HEALTHY)
+
+    @property
+    def state(self):
+        return self._state
+
+    def should_pull(self, now=None):
+        """
+        Returns whether the instance should be pulled in the cycle starting at 'now'.
+        """
+        if self._state != HEALTH_OPEN:
+            return True
+        return (time.monotonic() if now is None else now) >= self._next_attempt
+
+    def succeeded(self):
+        if self._state == HEALTH_OPEN:
+            logger.info("Instance %s is reachable again.", self._instance_name)
+        self._consecutive_failures = 0
+        self.last_success = time.monotonic()
+        self._set_state(HEALTH_HEALTHY)
+
+    def failed(self):
+        self._consecutive_failures += 1
+        failures_while_open = (
+            self._consecutive_failures - self._config.failure_threshold
+        )
+        if failures_while_open < 0:
+            self._set_state(HEALTH_DEGRADED)
+            return
+        backoff = min(
+            self._config.backoff_max_seconds,
+            self._config.backoff_initial_seconds * 2 ** min(failures_while_open, 32),
+        )
+        backoff *= random.uniform(
+            1 - self._config.backoff_jitter, 1 + self._config.backoff_jitter
+        )
+        self._next_attempt = time.monotonic() + backoff
+        logger.warning(
+            "Instance %s failed %d pulls in a row, probing it again in %.1fs.",
+            self._instance_name,
+            self._consecutive_failures,
+            backoff,
+        )
+        self._set_state(HEALTH_OPEN)
+
+    def _set_state(self, state):
+        if state != self._state:
+            self._state = state
+            if self._metric is not None:
+                self._metric.state(state)
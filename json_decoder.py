@@ -0,0 +1,37 @@
+import json
+
+JSON_DECODER_AUTO = "auto"
+JSON_DECODER_STDLIB = "json"
+
+# Functions which decode a JSON document from raw bytes, by name, in order of preference.
+JSON_DECODERS = {}
+
+try:
+    import orjson
+
+    JSON_DECODERS["orjson"] = orjson.loads
+except ImportError:
+    pass
+
+try:
+    import simdjson
+
+    JSON_DECODERS["simdjson"] = simdjson.loads
+except ImportError:
+    pass
+
+JSON_DECODERS[JSON_DECODER_STDLIB] = json.loads
+
+
+def get_json_decoder(name=JSON_DECODER_AUTO):
+    """
+    Returns the name and the function of the JSON decoder 'name'. The 'auto' decoder is the fastest installed one,
+    falling back to the standard library decoder.
+    """
+    if name == JSON_DECODER_AUTO:
+        name = next(iter(JSON_DECODERS))
+    if name not in JSON_DECODERS:
+        raise ValueError(
+            f"JSON decoder {name} isn't installed, available decoders are: {', '.join(JSON_DECODERS)}"
+        )
+    return name, JSON_DECODERS[name]
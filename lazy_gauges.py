@@ -0,0 +1,86 @@
+import threading
+
+from collections.abc import Mapping
+
+from prometheus_client import REGISTRY, Gauge
+
+
+class LazyGauges(Mapping):
+    """
+    Gauges of a single section of a metric catalog, by metric name. The gauges are created and registered
+    together the first time any of them is looked up, so sections which are never received cost nothing.
+    Iterating over the names doesn't create them.
+    """
+
+    def __init__(self, catalog, label_names=("instance_name",), registry=REGISTRY):
+        # Descriptions by metric name.
+        self._descriptions = dict(catalog)
+        self._label_names = list(label_names)
+        self._registry = registry
+        self._lock = threading.Lock()
+        self._gauges = None
+
+    @property
+    def built(self):
+        return self._gauges is not None
+
+    def _build(self):
+        with self._lock:
+            if self._gauges is None:
+                self._gauges = {
+                    name: Gauge(
+                        name, description, self._label_names, registry=self._registry
+                    )
+                    for name, description in self._descriptions.items()
+                }
+            return self._gauges
+
+    def __getitem__(self, name):
+        gauges = self._gauges
+        if gauges is None:
+            gauges = self._build()
+        return gauges[name]
+
+    def __iter__(self):
+        return iter(self._descriptions)
+
+    def __len__(self):
+        return len(self._descriptions)
+
+    def __contains__(self, name):
+        return name in self._descriptions
+
+    def descriptions(self):
+        """
+        Returns (name, description) pairs of the gauges, without creating them.
+        """
+        return self._descriptions.items()
+
+    def built_values(self):
+        """
+        Returns the gauges if they were created already, without creating them.
+        """
+        gauges = self._gauges
+        return [] if gauges is None else list(gauges.values())
+
+    def set_label_names(self, label_names):
+        """
+        Changes the label names of the gauges. Gauges which were created already are created again.
+        """
+        with self._lock:
+            self._label_names = list(label_names)
+            self._unregister()
+            self._gauges = None
+
+    def unregister(self):
+        """
+        Removes the gauges from the registry, also the ones which are created later.
+        """
+        with self._lock:
+            self._unregister()
+            self._registry = None
+
+    def _unregister(self):
+        if self._gauges is not None and self._registry is not None:
+            for gauge in self._gauges.values():
+                self._registry.unregister(gauge)
@@ -0,0 +1,65 @@
+import logging
+import threading
+
+logger = logging.getLogger("prometheus_handler")
+
+# Counter which a coordinator increments every time it becomes the Raft leader.
+LEADER_COUNTER = "BecomeLeaderSuccess"
+
+
+class LeaderTracker:
+    """
+    Works out the Raft leader of the coordinators of every cluster from their BecomeLeaderSuccess counters.
+    A coordinator whose counter grew since its previous pull became the leader of its cluster, and stays it
+    until another coordinator of the cluster becomes leader. The leader isn't known until such an election
+    is seen, e.g. right after the exporter started or after the leader restarted, since the counts alone
+    don't tell which coordinator was elected last.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Last received count and cluster by coordinator key.
+        self._counts = {}
+        self._clusters = {}
+        # Leader key by cluster.
+        self._leaders = {}
+
+    def observe(self, instance, count):
+        """
+        Records the BecomeLeaderSuccess 'count' received from coordinator 'instance'.
+        """
+        if count is None:
+            return
+        with self._lock:
+            previous = self._counts.get(instance.key)
+            self._counts[instance.key] = count
+            self._clusters[instance.key] = instance.cluster
+            if previous is None:
+                return
+            if count > previous:
+                if self._leaders.get(instance.cluster) != instance.key:
+                    logger.info("Coordinator %s is the leader", instance.key)
+                self._leaders[instance.cluster] = instance.key
+            elif count < previous:
+                # The coordinator restarted, which doesn't tell whether it leads.
+                self._unseat(instance)
+
+    def forget(self, instance):
+        with self._lock:
+            self._counts.pop(instance.key, None)
+            self._clusters.pop(instance.key, None)
+            self._unseat(instance)
+
+    def leader(self, cluster):
+        """
+        Returns the key of the leader of 'cluster', or None if it isn't known.
+        """
+        with self._lock:
+            return self._leaders.get(cluster)
+
+    def _unseat(self, instance):
+        if self._leaders.get(instance.cluster) == instance.key:
+            logger.info(
+                "Coordinator %s is no longer known to be the leader", instance.key
+            )
+            del self._leaders[instance.cluster]
@@ -0,0 +1,97 @@
+import requests
+
+from collections import namedtuple
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CONNECT_TIMEOUT_SECONDS = 3
+DEFAULT_READ_TIMEOUT_SECONDS = 10
+DEFAULT_POOL_MAXSIZE = 2
+DEFAULT_MAX_RESPONSE_BYTES = 8 * 1024 * 1024
+
+_CHUNK_SIZE = 64 * 1024
+
+# Status code and raw body of a metrics response.
+MemgraphResponse = namedtuple("MemgraphResponse", ["status_code", "content"])
+
+
+class ResponseTooLargeError(Exception):
+    pass
+
+
+class HttpConfig:
+    def __init__(
+        self,
+        connect_timeout_seconds=DEFAULT_CONNECT_TIMEOUT_SECONDS,
+        read_timeout_seconds=DEFAULT_READ_TIMEOUT_SECONDS,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        max_response_bytes=DEFAULT_MAX_RESPONSE_BYTES,
+    ):
+        self.connect_timeout_seconds = connect_timeout_seconds
+        self.read_timeout_seconds = read_timeout_seconds
+        self.pool_maxsize = pool_maxsize
+        self.max_response_bytes = max_response_bytes
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            connect_timeout_seconds=data.get(
+                "connect_timeout_seconds", DEFAULT_CONNECT_TIMEOUT_SECONDS
+            ),
+            read_timeout_seconds=data.get(
+                "read_timeout_seconds", DEFAULT_READ_TIMEOUT_SECONDS
+            ),
+            pool_maxsize=data.get("pool_maxsize", DEFAULT_POOL_MAXSIZE),
+            max_response_bytes=data.get(
+                "max_response_bytes", DEFAULT_MAX_RESPONSE_BYTES
+            ),
+        )
+
+
+class MemgraphClient:
+    """
+    Pulls metrics from a single Memgraph instance. Connections are kept alive in a per-instance pool,
+    so the instance address is resolved and the TCP connection is opened only when a pooled connection
+    has to be (re)established, not on every pull.
+    Responses are read in chunks and abandoned as soon as they exceed the configured maximum size.
+    """
+
+    def __init__(self, url, http_config=None):
+        http_config = http_config or HttpConfig()
+        self._url = url
+        self._timeout = (
+            http_config.connect_timeout_seconds,
+            http_config.read_timeout_seconds,
+        )
+        self._max_response_bytes = http_config.max_response_bytes
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=http_config.pool_maxsize)
+        self._session = requests.Session()
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    @property
+    def url(self):
+        return self._url
+
+    def get(self):
+        with self._session.get(self._url, timeout=self._timeout, stream=True) as res:
+            content_length = res.headers.get("Content-Length")
+            if (
+                content_length is not None
+                and int(content_length) > self._max_response_bytes
+            ):
+                raise ResponseTooLargeError(
+                    f"Response of {self._url} has {content_length} bytes, more than the maximum of {self._max_response_bytes}."
+                )
+            chunks = []
+            size = 0
+            for chunk in res.iter_content(_CHUNK_SIZE):
+                size += len(chunk)
+                if size > self._max_response_bytes:
+                    raise ResponseTooLargeError(
+                        f"Response of {self._url} has more than the maximum of {self._max_response_bytes} bytes."
+                    )
+                chunks.append(chunk)
+            return MemgraphResponse(res.status_code, b"".join(chunks))
+
+    def close(self):
+        self._session.close()
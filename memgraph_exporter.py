@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+import threading
+
+from prometheus_client import CollectorRegistry
+
+from exposition import ExpositionCache, start_http_server
+from ha_main import (
+    GeneralConfig,
+    InstancePoller,
+    apply_pull_frequencies,
+    load_yaml_config,
+    parse_instances,
+    start_worker_pool,
+)
+from ha_model import HAModel
+from json_decoder import get_json_decoder
+from self_metrics import InstanceMetrics, PollCycleMetrics
+from sharding import ShardMetrics
+
+logger = logging.getLogger("prometheus_handler")
+
+
+class MemgraphExporter:
+    """
+    HA exporter which can be embedded into another Python process. It owns its CollectorRegistry, metrics and
+    poller, so several exporters with different configurations can run in one process without clashing.
+    'config' has the layout of ha_config.yaml and relative file_sd paths are resolved against 'config_dir'.
+    Instances are pulled when collect_once() is called, or every pull_frequency_seconds after start().
+    Parameters:
+    registry: Registry which all metrics of the exporter are registered in, a new one if None.
+    """
+
+    def __init__(self, config, registry=None, config_dir=None):
+        instances, label_names = parse_instances(config, config_dir)
+        exporter_config = config.get("exporter", {})
+        self.config = GeneralConfig.from_dict(exporter_config)
+        self.registry = registry if registry is not None else CollectorRegistry()
+        instances = self.config.shard_config.select(
+            instances, ShardMetrics(self.registry)
+        )
+        self._poll_interval_seconds = apply_pull_frequencies(
+            instances, self.config, exporter_config
+        )
+        json_decoder, decode_json = get_json_decoder(self.config.json_decoder)
+        self.model = HAModel(label_names, self.registry)
+        if self.config.sections is not None:
+            self.model.select_sections(self.config.sections)
+        if self.config.discover_metrics:
+            self.model.enable_metric_discovery(
+                self.config.max_discovered_metrics_per_section
+            )
+        self._poller = InstancePoller(
+            instances,
+            max_concurrency=self.config.max_concurrency,
+            cycle_deadline_seconds=self.config.cycle_deadline_seconds,
+            http_config=self.config.http_config,
+            decode_json=decode_json,
+            health_config=self.config.health_config,
+            stale_series_ttl_seconds=self.config.stale_series_ttl_seconds,
+            pull_interval_seconds=self._poll_interval_seconds,
+            worker_pool=start_worker_pool(self.config, json_decoder, self.model),
+            model=self.model,
+            instance_metrics=InstanceMetrics(label_names, self.registry),
+            poll_cycle_metrics=PollCycleMetrics(self.registry),
+        )
+        self._exposition_cache = ExpositionCache(
+            self.registry, sample_timestamps=self.config.sample_timestamps
+        )
+        self._stopped = threading.Event()
+        self._thread = None
+        self._server = None
+
+    @classmethod
+    def from_file(cls, config_file, registry=None):
+        return cls(
+            load_yaml_config(config_file), registry, os.path.dirname(config_file)
+        )
+
+    @property
+    def instance_count(self):
+        return self._poller.instance_count
+
+    def collect_once(self):
+        """
+        Pulls all instances which are due once, updates the metrics and returns the duration of the cycle in seconds.
+        """
+        cycle_duration = self._poller.poll_once()
+        self._exposition_cache.refresh()
+        return cycle_duration
+
+    async def collect_once_async(self):
+        """
+        Runs collect_once() on the default executor of the running event loop, so the loop isn't blocked
+        while the instances are pulled.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.collect_once)
+
+    def start(self, serve=False):
+        """
+        Starts pulling the instances every pull_frequency_seconds in a background thread. With 'serve', the
+        registry is also served on the configured port.
+        """
+        if self._thread is not None:
+            raise RuntimeError("The exporter is already started.")
+        if serve:
+            self._server = start_http_server(self.config.port, self._exposition_cache)
+            logger.info(
+                "Memgraph exporter is started on: localhost:%s", self.config.port
+            )
+        self._thread = threading.Thread(
+            target=self._poll, name="mg-exporter", daemon=True
+        )
+        self._thread.start()
+
+    def _poll(self):
+        while not self._stopped.is_set():
+            cycle_duration = self.collect_once()
+            logger.info(
+                "Poll cycle for %d instances finished in %.3fs",
+                self.instance_count,
+                cycle_duration,
+            )
+            self._stopped.wait(max(0.0, self._poll_interval_seconds - cycle_duration))
+
+    def stop(self):
+        """
+        Stops pulling and serving, and closes the connections to the instances. The exporter can't be
+        started again afterwards, its metrics stay in the registry.
+        """
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._poller.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
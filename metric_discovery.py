@@ -0,0 +1,102 @@
+import logging
+import re
+import threading
+
+from prometheus_client import REGISTRY, Gauge
+
+from self_metrics import DiscoveryMetrics
+
+logger = logging.getLogger("prometheus_handler")
+
+DEFAULT_MAX_DISCOVERED_METRICS_PER_SECTION = 100
+
+_INVALID_NAME_CHARACTERS = re.compile(r"[^a-zA-Z0-9_:]")
+
+
+def _metric_name(key):
+    name = _INVALID_NAME_CHARACTERS.sub("_", key)
+    if name[:1].isdigit():
+        name = f"_{name}"
+    return name
+
+
+class MetricDiscovery:
+    """
+    Registers gauges for Memgraph metrics which aren't listed in the static catalogs in 'metrics/'.
+    A gauge is registered the first time its key is received in a known section, and is shared by all
+    instances afterwards. At most 'max_metrics_per_section' gauges are registered per section, and keys
+    above that limit, or keys which can't be registered, are dropped and counted in the DiscoveryMetrics
+    registered in 'registry' as well.
+    """
+
+    def __init__(
+        self,
+        label_names=(),
+        max_metrics_per_section=DEFAULT_MAX_DISCOVERED_METRICS_PER_SECTION,
+        registry=REGISTRY,
+        reserved_names=(),
+    ):
+        self._label_names = list(label_names)
+        self._registry = registry
+        # Names of catalog metrics, which may not be registered yet if their section is created lazily.
+        self._reserved_names = frozenset(reserved_names)
+        self._max_metrics_per_section = max_metrics_per_section
+        self._lock = threading.Lock()
+        # Registered gauges by (section, key), or None for dropped keys.
+        self._metrics = {}
+        self._counts = {}
+        self._discovery_metrics = DiscoveryMetrics(registry)
+
+    def discover(self, section, key):
+        """
+        Returns the gauge for 'key' from 'section', or None if the key is dropped.
+        """
+        with self._lock:
+            if (section, key) in self._metrics:
+                return self._metrics[(section, key)]
+            metric = self._register(section, key)
+            self._metrics[(section, key)] = metric
+            return metric
+
+    def metrics(self):
+        """
+        Returns all gauges registered so far.
+        """
+        with self._lock:
+            return [metric for metric in self._metrics.values() if metric is not None]
+
+    def _register(self, section, key):
+        count = self._counts.get(section, 0)
+        if count >= self._max_metrics_per_section:
+            logger.warning(
+                "Metric %s from section %s is dropped, the section already has %d discovered metrics.",
+                key,
+                section,
+                count,
+            )
+            self._discovery_metrics.dropped.labels(section=section).inc()
+            return None
+        name = _metric_name(key)
+        if name in self._reserved_names:
+            logger.warning(
+                "Metric %s from section %s is dropped, it is a catalog metric of another section.",
+                key,
+                section,
+            )
+            self._discovery_metrics.dropped.labels(section=section).inc()
+            return None
+        try:
+            metric = Gauge(
+                name,
+                f"Memgraph metric {key} from section {section}.",
+                self._label_names,
+                registry=self._registry,
+            )
+        except ValueError as e:
+            logger.warning("Metric %s from section %s is dropped: %s", key, section, e)
+            self._discovery_metrics.dropped.labels(section=section).inc()
+            return None
+        logger.info("Discovered metric %s in section %s.", key, section)
+        self._counts[section] = count + 1
+        self._discovery_metrics.discovered.labels(section=section).set(count + 1)
+        return metric
@@ -0,0 +1,439 @@
+# Prometheus types of the exported metrics. Quantiles are exported as one gauge per percentile.
+GAUGE = "gauge"
+COUNTER = "counter"
+QUANTILE = "quantile"
+GAUGE_TYPES = (GAUGE, QUANTILE)
+
+# Kinds of Memgraph processes which report metrics.
+ROLE_STANDALONE = "standalone"
+ROLE_DATA_INSTANCE = "data_instance"
+ROLE_COORDINATOR = "coordinator"
+ROLES = (ROLE_STANDALONE, ROLE_DATA_INSTANCE, ROLE_COORDINATOR)
+
+_INSTANCE_ROLES = frozenset((ROLE_STANDALONE, ROLE_DATA_INSTANCE))
+_DATA_INSTANCE_ROLES = frozenset((ROLE_DATA_INSTANCE,))
+_COORDINATOR_ROLES = frozenset((ROLE_COORDINATOR,))
+_ALL_ROLES = frozenset(ROLES)
+
+# Sections of the Memgraph JSON, in the order they are updated.
+SECTIONS = [
+    "Index",
+    "Operator",
+    "Query",
+    "QueryType",
+    "Session",
+    "Snapshot",
+    "Stream",
+    "Transaction",
+    "Trigger",
+    "TTL",
+    "General",
+    "HighAvailability",
+]
+
+
+class MetricDefinition:
+    """
+    A single metric Memgraph reports under 'key' in 'section' of its JSON, and which is exported under the
+    same name. 'roles' are the kinds of Memgraph processes which report it, 'unit' is None for plain numbers.
+    """
+
+    __slots__ = ("section", "key", "type", "unit", "roles", "description")
+
+    def __init__(self, section, key, type, unit, roles, description):
+        self.section = section
+        self.key = key
+        self.type = type
+        self.unit = unit
+        self.roles = roles
+        self.description = description
+
+    @property
+    def name(self):
+        return self.key
+
+    def __repr__(self):
+        return f"MetricDefinition({self.section}.{self.key}, {self.type})"
+
+
+def _section(section, roles, *metrics):
+    return [
+        MetricDefinition(section, name, type, unit, roles, description)
+        for name, type, unit, description in metrics
+    ]
+
+
+# Every metric the exporters know, as (name, type, unit, help) by section and the roles which report it.
+# Quantiles are latencies in microseconds. The lists in the other modules of 'metrics' are derived from it.
+# fmt: off
+CATALOG = (
+    *_section(
+        "Index",
+        _INSTANCE_ROLES,
+        ("ActiveLabelIndices", GAUGE, None, "Number of active label indices in the system."),
+        ("ActiveLabelPropertyIndices", GAUGE, None, "Number of active label indices in the system."),
+        ("ActivePointIndices", GAUGE, None, "Number of active point indices in the system."),
+        ("ActiveTextIndices", GAUGE, None, "Number of active text indices in the system."),
+    ),
+    *_section(
+        "Operator",
+        _INSTANCE_ROLES,
+        ("AccumulateOperator", GAUGE, None, "Number of times AccumulateOperator has been called."),
+        ("AggregateOperator", GAUGE, None, "Number of times AggregateOperator has been called."),
+        ("ApplyOperator", GAUGE, None, "Number of times ApplyOperator has been called."),
+        ("CallProcedureOperator", GAUGE, None, "Number of times CallProcedureOperator has been called."),
+        ("CartesianOperator", GAUGE, None, "Number of times CartesianOperator has been called."),
+        ("ConstructNamedPathOperator", GAUGE, None, "Number of times ConstructNamedPathOperator has been called."),
+        ("CreateExpandOperator", GAUGE, None, "Number of times CreateExpandOperator has been called."),
+        ("CreateNodeOperator", GAUGE, None, "Number of times CreateNodeOperator has been called."),
+        ("DeleteOperator", GAUGE, None, "Number of times DeleteOperator has been called."),
+        ("DistinctOperator", GAUGE, None, "Number of times DistinctOperator has been called."),
+        ("EdgeUniquenessFilterOperator", GAUGE, None, "Number of times EdgeUniquenessFilterOperator has been called."),
+        ("EmptyResultOperator", GAUGE, None, "Number of times EmptyResultOperator has been called."),
+        ("EvaluatePatternFilterOperator", GAUGE, None,
+         "Number of times EvaluatePatternFilterOperator has been called."),
+        ("ExpandOperator", GAUGE, None, "Number of times ExpandOperator has been called."),
+        ("ExpandVariableOperator", GAUGE, None, "Number of times ExpandVariableOperator has been called."),
+        ("FilterOperator", GAUGE, None, "Number of times FilterOperator has been called."),
+        ("ForeachOperator", GAUGE, None, "Number of times ForeachOperator has been called."),
+        ("HashJoinOperator", GAUGE, None, "Number of times HashJoinOperator has been called."),
+        ("IndexedJoinOperator", GAUGE, None, "Number of times IndexedJoinOperator has been called."),
+        ("LimitOperator", GAUGE, None, "Number of times LimitOperator has been called."),
+        ("MergeOperator", GAUGE, None, "Number of times MergeOperator has been called."),
+        ("OnceOperator", GAUGE, None, "Number of times OnceOperator has been called."),
+        ("OptionalOperator", GAUGE, None, "Number of times OptionalOperator has been called."),
+        ("OrderByOperator", GAUGE, None, "Number of times OrderByOperator has been called."),
+        ("PeriodicCommitOperator", GAUGE, None, "Number of times PeriodicCommitOperator has been called."),
+        ("PeriodicSubqueryOperator", GAUGE, None, "Number of times PeriodicSubqueryOperator has been called."),
+        ("ProduceOperator", GAUGE, None, "Number of times ProduceOperator has been called."),
+        ("RemoveLabelsOperator", GAUGE, None, "Number of times RemoveLabelsOperator has been called."),
+        ("RemovePropertyOperator", GAUGE, None, "Number of times RemovePropertyOperator has been called."),
+        ("RollUpApplyOperator", GAUGE, None, "Number of times RollUpApplyOperator has been called."),
+        ("ScanAllByEdgeIdOperator", GAUGE, None, "Number of times ScanAllByEdgeIdOperator has been called."),
+        ("ScanAllByEdgeOperator", GAUGE, None, "Number of times ScanAllByEdgeOperator has been called."),
+        ("ScanAllByEdgeTypeOperator", GAUGE, None, "Number of times ScanAllByEdgeTypeOperator has been called."),
+        ("ScanAllByEdgeTypePropertyOperator", GAUGE, None,
+         "Number of times ScanAllByEdgeTypePropertyOperator has been called."),
+        ("ScanAllByEdgeTypePropertyRangeOperator", GAUGE, None,
+         "Number of times ScanAllByEdgeTypePropertyRangeOperator has been called."),
+        ("ScanAllByEdgeTypePropertyValueOperator", GAUGE, None,
+         "Number of times ScanAllByEdgeTypePropertyValueOperator has been called."),
+        ("ScanAllByIdOperator", GAUGE, None, "Number of times ScanAllByIdOperator has been called."),
+        ("ScanAllByLabelOperator", GAUGE, None, "Number of times ScanAllByLabelOperator has been called."),
+        ("ScanAllByLabelPropertyOperator", GAUGE, None,
+         "Number of times ScanAllByLabelPropertyOperator has been called."),
+        ("ScanAllByLabelPropertyRangeOperator", GAUGE, None,
+         "Number of times ScanAllByLabelPropertyRangeOperator has been called."),
+        ("ScanAllByLabelPropertyValueOperator", GAUGE, None,
+         "Number of times ScanAllByLabelPropertyValueOperator has been called."),
+        ("ScanAllByPointDistanceOperator", GAUGE, None,
+         "Number of times ScanAllByPointDistanceOperator has been called."),
+        ("ScanAllByPointWithinbboxOperator", GAUGE, None,
+         "Number of times ScanAllByPointWithinbboxOperator has been called."),
+        ("ScanAllOperator", GAUGE, None, "Number of times ScanAllOperator has been called."),
+        ("SetLabelsOperator", GAUGE, None, "Number of times SetLabelsOperator has been called."),
+        ("SetPropertiesOperator", GAUGE, None, "Number of times SetPropertiesOperator has been called."),
+        ("SetPropertyOperator", GAUGE, None, "Number of times SetPropertyOperator has been called."),
+        ("SkipOperator", GAUGE, None, "Number of times SkipOperator has been called."),
+        ("UnionOperator", GAUGE, None, "Number of times UnionOperator has been called."),
+        ("UnwindOperator", GAUGE, None, "Number of times UnwindOperator has been called."),
+    ),
+    *_section(
+        "Query",
+        _INSTANCE_ROLES,
+        ("QueryExecutionLatency_us_99p", QUANTILE, "microseconds",
+         "Query execution latency in microseconds, 99th percentile"),
+        ("QueryExecutionLatency_us_90p", QUANTILE, "microseconds",
+         "Query execution latency in microseconds, 90th percentile"),
+        ("QueryExecutionLatency_us_50p", QUANTILE, "microseconds",
+         "Query execution latency in microseconds, 50th percentile"),
+    ),
+    *_section(
+        "QueryType",
+        _INSTANCE_ROLES,
+        ("ReadQuery", GAUGE, None, "Number of read-only queries executed."),
+        ("ReadWriteQuery", GAUGE, None, "Number of write-only queries executed."),
+        ("WriteQuery", GAUGE, None, "Number of read-write queries executed."),
+    ),
+    *_section(
+        "Session",
+        _INSTANCE_ROLES,
+        ("ActiveBoltSessions", GAUGE, None, "Number of active Bolt connections."),
+        ("ActiveSSLSessions", GAUGE, None, "Number of active SSL connections."),
+        ("ActiveSessions", GAUGE, None, "Number of active connections."),
+        ("ActiveTCPSessions", GAUGE, None, "Number of active TCP connections."),
+        ("ActiveWebSocketSessions", GAUGE, None, "Number of active websocket connections."),
+        ("BoltMessages", GAUGE, None, "Number of Bolt messages sent."),
+    ),
+    *_section(
+        "Snapshot",
+        _INSTANCE_ROLES,
+        ("SnapshotCreationLatency_us_99p", QUANTILE, "microseconds",
+         "Snapshot creation latency in microseconds, 99th percentile."),
+        ("SnapshotCreationLatency_us_90p", QUANTILE, "microseconds",
+         "Snapshot creation latency in microseconds, 90th percentile."),
+        ("SnapshotCreationLatency_us_50p", QUANTILE, "microseconds",
+         "Snapshot creation latency in microseconds, 50th percentile."),
+        ("SnapshotRecoveryLatency_us_99p", QUANTILE, "microseconds",
+         "Snapshot recovery latency in microseconds, 99th percentile."),
+        ("SnapshotRecoveryLatency_us_90p", QUANTILE, "microseconds",
+         "Snapshot recovery latency in microseconds, 90th percentile."),
+        ("SnapshotRecoveryLatency_us_50p", QUANTILE, "microseconds",
+         "Snapshot recovery latency in microseconds, 50th percentile."),
+    ),
+    *_section(
+        "Stream",
+        _INSTANCE_ROLES,
+        ("MessagesConsumed", GAUGE, None, "Number of consumed streamed messages."),
+        ("StreamsCreated", GAUGE, None, "Number of Streams created."),
+    ),
+    *_section(
+        "Transaction",
+        _INSTANCE_ROLES,
+        ("ActiveTransactions", GAUGE, None, "Number of active transactions."),
+        ("CommitedTransactions", GAUGE, None, "Number of committed transactions."),
+        ("FailedPrepare", GAUGE, None, "Number of failed prepare queries."),
+        ("FailedPull", GAUGE, None, "Number of failed pulls."),
+        ("FailedQuery", GAUGE, None, "Number of times executing a query failed."),
+        ("RollbackedTransactions", GAUGE, None, "Number of rollbacked transactions."),
+        ("SuccessfulQuery", GAUGE, None, "Number of successful queries"),
+    ),
+    *_section(
+        "Trigger",
+        _INSTANCE_ROLES,
+        ("TriggersCreated", GAUGE, None, "Number of Triggers created."),
+        ("TriggersExecuted", GAUGE, None, "Number of Triggers executed."),
+    ),
+    *_section(
+        "TTL",
+        _INSTANCE_ROLES,
+        ("DeletedEdges", GAUGE, None, "Number of deleted TTL edges."),
+        ("DeletedNodes", GAUGE, None, "Number of deleted TTL nodes."),
+    ),
+    *_section(
+        "General",
+        _ALL_ROLES,
+        ("average_degree", GAUGE, None, "Average node degree."),
+        ("disk_usage", GAUGE, "bytes", "Amount of disk usage."),
+        ("edge_count", GAUGE, None, "Edge count."),
+        ("memory_usage", GAUGE, "bytes", "Amount of memory usage."),
+        ("peak_memory_usage", GAUGE, "bytes", "Peak memory usage."),
+        ("unreleased_delta_objects", GAUGE, None, "Number of unreleased delta objects."),
+        ("vertex_count", GAUGE, None, "Vertex count."),
+        ("SocketConnect_us_50p", QUANTILE, "microseconds", "Latency of connecting to the socket, 50th percentile."),
+        ("SocketConnect_us_90p", QUANTILE, "microseconds", "Latency of connecting to the socket, 90th percentile."),
+        ("SocketConnect_us_99p", QUANTILE, "microseconds", "Latency of connecting to the socket, 99th percentile."),
+    ),
+    *_section(
+        "HighAvailability",
+        _DATA_INSTANCE_ROLES,
+        ("AppendDeltasRpc_us_50p", QUANTILE, "microseconds",
+         "AppendDeltasRpc latency in microseconds, 50th percentile"),
+        ("AppendDeltasRpc_us_90p", QUANTILE, "microseconds",
+         "AppendDeltasRpc latency in microseconds, 90th percentile"),
+        ("AppendDeltasRpc_us_99p", QUANTILE, "microseconds",
+         "AppendDeltasRpc latency in microseconds, 99th percentile"),
+        ("CurrentWalRpc_us_50p", QUANTILE, "microseconds", "CurrentWalRpc latency in microseconds, 50th percentile"),
+        ("CurrentWalRpc_us_90p", QUANTILE, "microseconds", "CurrentWalRpc latency in microseconds, 90th percentile"),
+        ("CurrentWalRpc_us_99p", QUANTILE, "microseconds", "CurrentWalRpc latency in microseconds, 99th percentile"),
+        ("WalFilesRpc_us_50p", QUANTILE, "microseconds", "WalFilesRpc latency in microseconds, 50th percentile"),
+        ("WalFilesRpc_us_90p", QUANTILE, "microseconds", "WalFilesRpc latency in microseconds, 90th percentile"),
+        ("WalFilesRpc_us_99p", QUANTILE, "microseconds", "WalFilesRpc latency in microseconds, 99th percentile"),
+        ("SnapshotRpc_us_50p", QUANTILE, "microseconds", "SnapshotRpc latency in microseconds, 50th percentile"),
+        ("SnapshotRpc_us_90p", QUANTILE, "microseconds", "SnapshotRpc latency in microseconds, 90th percentile"),
+        ("SnapshotRpc_us_99p", QUANTILE, "microseconds", "SnapshotRpc latency in microseconds, 99th percentile"),
+        ("FrequentHeartbeatRpc_us_50p", QUANTILE, "microseconds",
+         "FrequentHeartbeatRpc latency in microseconds, 50th percentile"),
+        ("FrequentHeartbeatRpc_us_90p", QUANTILE, "microseconds",
+         "FrequentHeartbeatRpc latency in microseconds, 90th percentile"),
+        ("FrequentHeartbeatRpc_us_99p", QUANTILE, "microseconds",
+         "FrequentHeartbeatRpc latency in microseconds, 99th percentile"),
+        ("HeartbeatRpc_us_50p", QUANTILE, "microseconds", "HeartbeatRpc latency in microseconds, 50th percentile"),
+        ("HeartbeatRpc_us_90p", QUANTILE, "microseconds", "HeartbeatRpc latency in microseconds, 90th percentile"),
+        ("HeartbeatRpc_us_99p", QUANTILE, "microseconds", "HeartbeatRpc latency in microseconds, 99th percentile"),
+        ("ReplicaStream_us_50p", QUANTILE, "microseconds", "ReplicaStream latency in microseconds, 50th percentile"),
+        ("ReplicaStream_us_90p", QUANTILE, "microseconds", "ReplicaStream latency in microseconds, 90th percentile"),
+        ("ReplicaStream_us_99p", QUANTILE, "microseconds", "ReplicaStream latency in microseconds, 99th percentile"),
+        ("SystemRecoveryRpc_us_50p", QUANTILE, "microseconds",
+         "SystemRecoveryRpc latency in microseconds, 50th percentile"),
+        ("SystemRecoveryRpc_us_90p", QUANTILE, "microseconds",
+         "SystemRecoveryRpc latency in microseconds, 90th percentile"),
+        ("SystemRecoveryRpc_us_99p", QUANTILE, "microseconds",
+         "SystemRecoveryRpc latency in microseconds, 99th percentile"),
+        ("StartTxnReplication_us_50p", QUANTILE, "microseconds",
+         "StartTxnReplication latency in microseconds, 50th percentile"),
+        ("StartTxnReplication_us_90p", QUANTILE, "microseconds",
+         "StartTxnReplication latency in microseconds, 90th percentile"),
+        ("StartTxnReplication_us_99p", QUANTILE, "microseconds",
+         "StartTxnReplication latency in microseconds, 99th percentile"),
+        ("FinalizeTxnReplication_us_50p", QUANTILE, "microseconds",
+         "FinalizeTxnReplication latency in microseconds, 50th percentile"),
+        ("FinalizeTxnReplication_us_90p", QUANTILE, "microseconds",
+         "FinalizeTxnReplication latency in microseconds, 90th percentile"),
+        ("FinalizeTxnReplication_us_99p", QUANTILE, "microseconds",
+         "FinalizeTxnReplication latency in microseconds, 99th percentile"),
+        ("ReplicaRecoverySuccess", COUNTER, None, "Number of times the replica recovery finished successfully"),
+        ("ReplicaRecoveryFail", COUNTER, None, "Number of times the replica recovery finished unsuccessfully"),
+        ("ReplicaRecoverySkip", COUNTER, None, "Number of times the replica recovery task was skipped"),
+    ),
+    *_section(
+        "HighAvailability",
+        _COORDINATOR_ROLES,
+        ("ChooseMostUpToDateInstance_us_50p", QUANTILE, "microseconds",
+         "ChooseMostUpToDateInstance latency in microseconds, 50th percentile"),
+        ("ChooseMostUpToDateInstance_us_90p", QUANTILE, "microseconds",
+         "ChooseMostUpToDateInstance latency in microseconds, 90th percentile"),
+        ("ChooseMostUpToDateInstance_us_99p", QUANTILE, "microseconds",
+         "ChooseMostUpToDateInstance latency in microseconds, 99th percentile"),
+        ("DemoteMainToReplicaRpc_us_50p", QUANTILE, "microseconds",
+         "DemoteMainToReplicaRpc latency in microseconds, 50th percentile"),
+        ("DemoteMainToReplicaRpc_us_90p", QUANTILE, "microseconds",
+         "DemoteMainToReplicaRpc latency in microseconds, 90th percentile"),
+        ("DemoteMainToReplicaRpc_us_99p", QUANTILE, "microseconds",
+         "DemoteMainToReplicaRpc latency in microseconds, 99th percentile"),
+        ("EnableWritingOnMainRpc_us_50p", QUANTILE, "microseconds",
+         "EnableWritingOnMainRpc latency in microseconds, 50th percentile"),
+        ("EnableWritingOnMainRpc_us_90p", QUANTILE, "microseconds",
+         "EnableWritingOnMainRpc latency in microseconds, 90th percentile"),
+        ("EnableWritingOnMainRpc_us_99p", QUANTILE, "microseconds",
+         "EnableWritingOnMainRpc latency in microseconds, 99th percentile"),
+        ("GetDatabaseHistoriesRpc_us_50p", QUANTILE, "microseconds",
+         "GetDatabaseHistoriesRpc latency in microseconds, 50th percentile"),
+        ("GetDatabaseHistoriesRpc_us_90p", QUANTILE, "microseconds",
+         "GetDatabaseHistoriesRpc latency in microseconds, 90th percentile"),
+        ("GetDatabaseHistoriesRpc_us_99p", QUANTILE, "microseconds",
+         "GetDatabaseHistoriesRpc latency in microseconds, 99th percentile"),
+        ("GetHistories_us_50p", QUANTILE, "microseconds", "GetHistories latency in microseconds, 50th percentile"),
+        ("GetHistories_us_90p", QUANTILE, "microseconds", "GetHistories latency in microseconds, 90th percentile"),
+        ("GetHistories_us_99p", QUANTILE, "microseconds", "GetHistories latency in microseconds, 99th percentile"),
+        ("InstanceFailCallback_us_50p", QUANTILE, "microseconds",
+         "InstanceFailCallback latency in microseconds, 50th percentile"),
+        ("InstanceFailCallback_us_90p", QUANTILE, "microseconds",
+         "InstanceFailCallback latency in microseconds, 90th percentile"),
+        ("InstanceFailCallback_us_99p", QUANTILE, "microseconds",
+         "InstanceFailCallback latency in microseconds, 99th percentile"),
+        ("InstanceSuccCallback_us_50p", QUANTILE, "microseconds",
+         "InstanceSuccCallback latency in microseconds, 50th percentile"),
+        ("InstanceSuccCallback_us_90p", QUANTILE, "microseconds",
+         "InstanceSuccCallback latency in microseconds, 90th percentile"),
+        ("InstanceSuccCallback_us_99p", QUANTILE, "microseconds",
+         "InstanceSuccCallback latency in microseconds, 99th percentile"),
+        ("PromoteToMainRpc_us_50p", QUANTILE, "microseconds",
+         "PromoteToMainRpc latency in microseconds, 50th percentile"),
+        ("PromoteToMainRpc_us_90p", QUANTILE, "microseconds",
+         "PromoteToMainRpc latency in microseconds, 90th percentile"),
+        ("PromoteToMainRpc_us_99p", QUANTILE, "microseconds",
+         "PromoteToMainRpc latency in microseconds, 99th percentile"),
+        ("RegisterReplicaOnMainRpc_us_50p", QUANTILE, "microseconds",
+         "RegisterReplicaOnMainRpc latency in microseconds, 50th percentile"),
+        ("RegisterReplicaOnMainRpc_us_90p", QUANTILE, "microseconds",
+         "RegisterReplicaOnMainRpc latency in microseconds, 90th percentile"),
+        ("RegisterReplicaOnMainRpc_us_99p", QUANTILE, "microseconds",
+         "RegisterReplicaOnMainRpc latency in microseconds, 99th percentile"),
+        ("StateCheckRpc_us_50p", QUANTILE, "microseconds", "StateCheckRpc latency in microseconds, 50th percentile"),
+        ("StateCheckRpc_us_90p", QUANTILE, "microseconds", "StateCheckRpc latency in microseconds, 90th percentile"),
+        ("StateCheckRpc_us_99p", QUANTILE, "microseconds", "StateCheckRpc latency in microseconds, 99th percentile"),
+        ("UnregisterReplicaRpc_us_50p", QUANTILE, "microseconds",
+         "UnregisterReplicaRpc latency in microseconds, 50th percentile"),
+        ("UnregisterReplicaRpc_us_90p", QUANTILE, "microseconds",
+         "UnregisterReplicaRpc latency in microseconds, 90th percentile"),
+        ("UnregisterReplicaRpc_us_99p", QUANTILE, "microseconds",
+         "UnregisterReplicaRpc latency in microseconds, 99th percentile"),
+        ("DataFailover_us_50p", QUANTILE, "microseconds", "DataFailover latency in microseconds, 50th percentile"),
+        ("DataFailover_us_90p", QUANTILE, "microseconds", "DataFailover latency in microseconds, 90th percentile"),
+        ("DataFailover_us_99p", QUANTILE, "microseconds", "DataFailover latency in microseconds, 99th percentile"),
+        ("BecomeLeaderSuccess", COUNTER, None, "How many times coordinators successfully became leaders"),
+        ("FailedToBecomeLeader", COUNTER, None, "How many times coordinator failed to become leader"),
+        ("SuccessfulFailovers", COUNTER, None, "How many times the failover was done successfully"),
+        ("RaftFailedFailovers", COUNTER, None, "How many times failover failed because writing to Raft failed"),
+        ("NoAliveInstanceFailedFailovers", COUNTER, None,
+         "How many times failover failed because no instance was alive"),
+        ("ShowInstance", COUNTER, None, "How many times SHOW INSTANCE query was called"),
+        ("ShowInstances", COUNTER, None, "How many times SHOW INSTANCES query was called"),
+        ("DemoteInstance", COUNTER, None, "How many times the user manually demoted instance"),
+        ("UnregisterReplInstance", COUNTER, None, "How many times the user tried to unregister replication instance"),
+        ("RemoveCoordInstance", COUNTER, None, "How many times the user tried to remove coordinator instance"),
+        ("StateCheckRpcFail", COUNTER, None,
+         "How many times coordinators received unsuccessful or no response to StateCheckRpc"),
+        ("StateCheckRpcSuccess", COUNTER, None, "How many times we received successful response to StateCheckRpc"),
+        ("UnregisterReplicaRpcFail", COUNTER, None,
+         "How many times we received unsuccessful or no response to UnregisterReplicaRpc"),
+        ("UnregisterReplicaRpcSuccess", COUNTER, None,
+         "How many times we received sucessful response to UnregisterReplicaRpc"),
+        ("EnableWritingOnMainRpcFail", COUNTER, None,
+         "How many times we received unsuccessful or no response to EnableWritingOnMainRpc"),
+        ("EnableWritingOnMainRpcSuccess", COUNTER, None,
+         "How many times we received sucessful response to EnableWritingOnMainRpc"),
+        ("PromoteToMainRpcFail", COUNTER, None,
+         "How many times we received unsuccessful or no response to PromoteToMainRpc"),
+        ("PromoteToMainRpcSuccess", COUNTER, None, "How many times we received sucessful response to PromoteToMainRpc"),
+        ("DemoteMainToReplicaRpcFail", COUNTER, None,
+         "How many times we received unsuccessful or no response to DemoteMainToReplicaRpc"),
+        ("DemoteMainToReplicaRpcSuccess", COUNTER, None,
+         "How many times we received sucessful response to DemoteMainToReplicaRpc"),
+        ("RegisterReplicaOnMainRpcFail", COUNTER, None,
+         "How many times we received unsuccessful or no response to RegisterReplicaOnMainRpc"),
+        ("RegisterReplicaOnMainRpcSuccess", COUNTER, None,
+         "How many times we received sucessful response to RegisterReplicaOnMainRpc"),
+        ("SwapMainUUIDRpcFail", COUNTER, None,
+         "How many times we received unsuccessful or no response to SwapMainUUIDRpc"),
+        ("SwapMainUUIDRpcSuccess", COUNTER, None, "How many times we received sucessful response to SwapMainUUIDRpc"),
+        ("GetDatabaseHistoriesRpcFail", COUNTER, None,
+         "How many times we received unsuccessful or no response to GetDatabaseHistoriesRpc"),
+        ("GetDatabaseHistoriesRpcSuccess", COUNTER, None,
+         "How many times we received sucessful response to GetDatabaseHistoriesRpc"),
+    ),
+)
+# fmt: on
+
+
+def definitions(role=None, types=None):
+    """
+    Returns the definitions reported by 'role' and of one of 'types', all of them if not given,
+    in the order of SECTIONS.
+    """
+    return [
+        definition
+        for section in SECTIONS
+        for definition in CATALOG
+        if definition.section == section
+        and (role is None or role in definition.roles)
+        and (types is None or definition.type in types)
+    ]
+
+
+def metric_groups(types):
+    """
+    Groups the definitions of one of 'types' into metrics which are exported together, and returns
+    (section, roles, [(name, description)]) for every group, in the order of SECTIONS. Metrics of a
+    section which are reported by the same roles form a group, so a group is shared by all its roles.
+    """
+    groups = {}
+    for definition in definitions(types=types):
+        groups.setdefault((definition.section, definition.roles), []).append(
+            (definition.name, definition.description)
+        )
+    return [(section, roles, metrics) for (section, roles), metrics in groups.items()]
+
+
+def sections(role, types):
+    """
+    Returns (section, [(name, description)]) pairs of the metrics of one of 'types' which 'role' reports.
+    """
+    return [
+        (section, metrics)
+        for section, roles, metrics in metric_groups(types)
+        if role in roles
+    ]
+
+
+def section_metrics(section, role=None, types=None):
+    """
+    Returns (name, description) pairs of the metrics of 'section' reported by 'role' and of one of 'types',
+    all of them if not given.
+    """
+    return [
+        (definition.name, definition.description)
+        for definition in definitions(role, types)
+        if definition.section == section
+    ]
@@ -1,12 +1,3 @@
-general_data = [
-    ("average_degree", "Average node degree."),
-    ("disk_usage", "Amount of disk usage."),
-    ("edge_count", "Edge count."),
-    ("memory_usage", "Amount of memory usage."),
-    ("peak_memory_usage", "Peak memory usage."),
-    ("unreleased_delta_objects", "Number of unreleased delta objects."),
-    ("vertex_count", "Vertex count."),
-    ("SocketConnect_us_50p", "Latency of connecting to the socket, 50th percentile."),
-    ("SocketConnect_us_90p", "Latency of connecting to the socket, 90th percentile."),
-    ("SocketConnect_us_99p", "Latency of connecting to the socket, 99th percentile.")
-]
+from metrics.catalog import section_metrics
+
+general_data = section_metrics("General")
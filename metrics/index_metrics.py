@@ -1,6 +1,3 @@
-index_data = [
-    ("ActiveLabelIndices", "Number of active label indices in the system."),
-    ("ActiveLabelPropertyIndices", "Number of active label indices in the system."),
-    ("ActivePointIndices", "Number of active point indices in the system."),
-    ("ActiveTextIndices", "Number of active text indices in the system."),
-]
+from metrics.catalog import section_metrics
+
+index_data = section_metrics("Index")
@@ -1,52 +1,3 @@
-operator_data = [
-    "AccumulateOperator",
-    "AggregateOperator",
-    "ApplyOperator",
-    "CallProcedureOperator",
-    "CartesianOperator",
-    "ConstructNamedPathOperator",
-    "CreateExpandOperator",
-    "CreateNodeOperator",
-    "DeleteOperator",
-    "DistinctOperator",
-    "EdgeUniquenessFilterOperator",
-    "EmptyResultOperator",
-    "EvaluatePatternFilterOperator",
-    "ExpandOperator",
-    "ExpandVariableOperator",
-    "FilterOperator",
-    "ForeachOperator",
-    "HashJoinOperator",
-    "IndexedJoinOperator",
-    "LimitOperator",
-    "MergeOperator",
-    "OnceOperator",
-    "OptionalOperator",
-    "OrderByOperator",
-    "PeriodicCommitOperator",
-    "PeriodicSubqueryOperator",
-    "ProduceOperator",
-    "RemoveLabelsOperator",
-    "RemovePropertyOperator",
-    "RollUpApplyOperator",
-    "ScanAllByEdgeIdOperator",
-    "ScanAllByEdgeOperator",
-    "ScanAllByEdgeTypeOperator",
-    "ScanAllByEdgeTypePropertyOperator",
-    "ScanAllByEdgeTypePropertyRangeOperator",
-    "ScanAllByEdgeTypePropertyValueOperator",
-    "ScanAllByIdOperator",
-    "ScanAllByLabelOperator",
-    "ScanAllByLabelPropertyOperator",
-    "ScanAllByLabelPropertyRangeOperator",
-    "ScanAllByLabelPropertyValueOperator",
-    "ScanAllByPointDistanceOperator",
-    "ScanAllByPointWithinbboxOperator",
-    "ScanAllOperator",
-    "SetLabelsOperator",
-    "SetPropertiesOperator",
-    "SetPropertyOperator",
-    "SkipOperator",
-    "UnionOperator",
-    "UnwindOperator",
-]
+from metrics.catalog import section_metrics
+
+operator_data = [name for name, _ in section_metrics("Operator")]
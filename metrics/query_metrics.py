@@ -1,14 +1,3 @@
-query_data = [
-    (
-        "QueryExecutionLatency_us_99p",
-        "Query execution latency in microseconds, 99th percentile",
-    ),
-    (
-        "QueryExecutionLatency_us_90p",
-        "Query execution latency in microseconds, 90th percentile",
-    ),
-    (
-        "QueryExecutionLatency_us_50p",
-        "Query execution latency in microseconds, 50th percentile",
-    ),
-]
+from metrics.catalog import section_metrics
+
+query_data = section_metrics("Query")
@@ -1,5 +1,3 @@
-query_type_data = [
-    ("ReadQuery", "Number of read-only queries executed."),
-    ("ReadWriteQuery", "Number of write-only queries executed."),
-    ("WriteQuery", "Number of read-write queries executed."),
-]
+from metrics.catalog import section_metrics
+
+query_type_data = section_metrics("QueryType")
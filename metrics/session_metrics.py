@@ -1,8 +1,3 @@
-session_data = [
-    ("ActiveBoltSessions", "Number of active Bolt connections."),
-    ("ActiveSSLSessions", "Number of active SSL connections."),
-    ("ActiveSessions", "Number of active connections."),
-    ("ActiveTCPSessions", "Number of active TCP connections."),
-    ("ActiveWebSocketSessions", "Number of active websocket connections."),
-    ("BoltMessages", "Number of Bolt messages sent."),
-]
+from metrics.catalog import section_metrics
+
+session_data = section_metrics("Session")
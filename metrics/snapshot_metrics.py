@@ -1,26 +1,3 @@
-snapshot_data = [
-    (
-        "SnapshotCreationLatency_us_99p",
-        "Snapshot creation latency in microseconds, 99th percentile.",
-    ),
-    (
-        "SnapshotCreationLatency_us_90p",
-        "Snapshot creation latency in microseconds, 90th percentile.",
-    ),
-    (
-        "SnapshotCreationLatency_us_50p",
-        "Snapshot creation latency in microseconds, 50th percentile.",
-    ),
-    (
-        "SnapshotRecoveryLatency_us_99p",
-        "Snapshot recovery latency in microseconds, 99th percentile.",
-    ),
-    (
-        "SnapshotRecoveryLatency_us_90p",
-        "Snapshot recovery latency in microseconds, 90th percentile.",
-    ),
-    (
-        "SnapshotRecoveryLatency_us_50p",
-        "Snapshot recovery latency in microseconds, 50th percentile.",
-    ),
-]
+from metrics.catalog import section_metrics
+
+snapshot_data = section_metrics("Snapshot")
@@ -1,4 +1,3 @@
-stream_data = [
-    ("MessagesConsumed", "Number of consumed streamed messages."),
-    ("StreamsCreated", "Number of Streams created."),
-]
+from metrics.catalog import section_metrics
+
+stream_data = section_metrics("Stream")
@@ -1,9 +1,3 @@
-txn_data = [
-    ("ActiveTransactions", "Number of active transactions."),
-    ("CommitedTransactions", "Number of committed transactions."),
-    ("FailedPrepare", "Number of failed prepare queries."),
-    ("FailedPull", "Number of failed pulls."),
-    ("FailedQuery", "Number of times executing a query failed."),
-    ("RollbackedTransactions", "Number of rollbacked transactions."),
-    ("SuccessfulQuery", "Number of successful queries"),
-]
+from metrics.catalog import section_metrics
+
+txn_data = section_metrics("Transaction")
@@ -1,4 +1,3 @@
-trigger_data = [
-    ("TriggersCreated", "Number of Triggers created."),
-    ("TriggersExecuted", "Number of Triggers executed."),
-]
+from metrics.catalog import section_metrics
+
+trigger_data = section_metrics("Trigger")
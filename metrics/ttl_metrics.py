@@ -1,4 +1,3 @@
-ttl_data = [
-    ("DeletedEdges", "Number of deleted TTL edges."),
-    ("DeletedNodes", "Number of deleted TTL nodes."),
-]
+from metrics.catalog import section_metrics
+
+ttl_data = section_metrics("TTL")
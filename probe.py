@@ -0,0 +1,122 @@
+import json
+import logging
+import threading
+import time
+
+from collections import OrderedDict
+
+from prometheus_client.metrics_core import GaugeMetricFamily
+
+from exposition import Rendered
+from ha_model import convert_metrics, default_model
+from memgraph_client import MemgraphClient
+
+logger = logging.getLogger("prometheus_handler")
+
+DEFAULT_PROBE_CACHE_TTL_SECONDS = 1
+DEFAULT_MAX_PROBE_TARGETS = 256
+
+
+class Prober:
+    """
+    Pulls a single Memgraph instance on demand and converts its metrics into a snapshot of their own,
+    in the style of the blackbox exporter. The exported metrics aren't touched, so any number of targets
+    can be probed by one exporter.
+
+    Clients of the 'max_targets' most recently probed targets are kept with their connection pools,
+    and the result of a probe is reused by probes of the same target within 'cache_ttl_seconds'.
+    Concurrent probes of the same target share a single pull.
+    """
+
+    def __init__(
+        self,
+        http_config=None,
+        decode_json=json.loads,
+        cache_ttl_seconds=DEFAULT_PROBE_CACHE_TTL_SECONDS,
+        max_targets=DEFAULT_MAX_PROBE_TARGETS,
+        sample_timestamps=False,
+    ):
+        self._http_config = http_config
+        self._decode_json = decode_json
+        self._cache_ttl_seconds = cache_ttl_seconds
+        self._max_targets = max_targets
+        self._sample_timestamps = sample_timestamps
+        self._lock = threading.Lock()
+        # Per-target state, in order of use: a client, the lock of its pulls and the last results by type.
+        self._targets = OrderedDict()
+
+    def probe(self, target, instance_type):
+        """
+        Returns the rendered metrics of the instance at 'target' ("host:port" or a URL).
+        """
+        if instance_type not in default_model().instance_type_sections:
+            raise ValueError(f"Unknown instance type {instance_type}")
+        state = self._target_state(target)
+        with state.lock:
+            rendered = state.results.get(instance_type)
+            if (
+                rendered is not None
+                and time.monotonic() - rendered.rendered_at < self._cache_ttl_seconds
+            ):
+                return rendered
+            rendered = self._pull(state.client, target, instance_type)
+            state.results[instance_type] = rendered
+            return rendered
+
+    def close(self):
+        with self._lock:
+            for state in self._targets.values():
+                state.client.close()
+            self._targets.clear()
+
+    def _target_state(self, target):
+        with self._lock:
+            state = self._targets.get(target)
+            if state is not None:
+                self._targets.move_to_end(target)
+                return state
+            url = target if "://" in target else f"http://{target}"
+            state = self._targets[target] = _TargetState(
+                MemgraphClient(url, self._http_config)
+            )
+            while len(self._targets) > self._max_targets:
+                _, evicted = self._targets.popitem(last=False)
+                evicted.client.close()
+            return state
+
+    def _pull(self, client, target, instance_type):
+        started = time.perf_counter()
+        try:
+            res = client.get()
+            if res.status_code != 200:
+                raise Exception(
+                    f"Memgraph instance on {client.url} couldn't be reached."
+                )
+            families = convert_metrics(self._decode_json(res.content), instance_type)
+            success = 1
+        except Exception as e:
+            logger.error("Error occurred while probing %s: %s", target, e)
+            families = []
+            success = 0
+        families.append(
+            GaugeMetricFamily(
+                "probe_success", "Whether the probe succeeded.", value=success
+            )
+        )
+        families.append(
+            GaugeMetricFamily(
+                "probe_duration_seconds",
+                "Time taken to pull and convert the metrics of the target.",
+                value=time.perf_counter() - started,
+            )
+        )
+        return Rendered(families, time.time(), self._sample_timestamps)
+
+
+class _TargetState:
+    __slots__ = ("client", "lock", "results")
+
+    def __init__(self, client):
+        self.client = client
+        self.lock = threading.Lock()
+        self.results = {}
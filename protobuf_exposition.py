@@ -0,0 +1,205 @@
+import math
+import struct
+
+# Content type of the delimited io.prometheus.client.MetricFamily protobuf format.
+CONTENT_TYPE_PROTOBUF = (
+    "application/vnd.google.protobuf; "
+    "proto=io.prometheus.client.MetricFamily; encoding=delimited"
+)
+
+# io.prometheus.client.MetricType
+_COUNTER = 0
+_GAUGE = 1
+_SUMMARY = 2
+_UNTYPED = 3
+_HISTOGRAM = 4
+
+_WIRE_VARINT = 0
+_WIRE_FIXED64 = 1
+_WIRE_LENGTH_DELIMITED = 2
+
+_UINT64_MASK = (1 << 64) - 1
+
+
+def _varint(value):
+    value &= _UINT64_MASK
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _key(field, wire_type):
+    return _varint((field << 3) | wire_type)
+
+
+def _uint(field, value):
+    return _key(field, _WIRE_VARINT) + _varint(int(value))
+
+
+def _double(field, value):
+    return _key(field, _WIRE_FIXED64) + struct.pack("<d", value)
+
+
+def _bytes(field, value):
+    return _key(field, _WIRE_LENGTH_DELIMITED) + _varint(len(value)) + value
+
+
+def _string(field, value):
+    return _bytes(field, value.encode("utf-8"))
+
+
+def _timestamp(field, seconds):
+    # google.protobuf.Timestamp
+    whole = math.floor(seconds)
+    return _bytes(
+        field, _uint(1, whole) + _uint(2, int(round((seconds - whole) * 1e9)))
+    )
+
+
+def _labels(labels):
+    # Metric.label, repeated LabelPair
+    return b"".join(
+        _bytes(1, _string(1, name) + _string(2, value))
+        for name, value in labels.items()
+    )
+
+
+def _sample_timestamp_ms(sample, default_timestamp):
+    timestamp = sample.timestamp if sample.timestamp is not None else default_timestamp
+    if timestamp is None:
+        return b""
+    # Metric.timestamp_ms
+    return _uint(6, int(float(timestamp) * 1000))
+
+
+def _group_by_labels(samples, ignored_label=None):
+    groups = {}
+    for sample in samples:
+        labels = {k: v for k, v in sample.labels.items() if k != ignored_label}
+        groups.setdefault(tuple(labels.items()), []).append(sample)
+    return groups
+
+
+def _family(name, documentation, metric_type, metrics):
+    if not metrics:
+        return b""
+    return (
+        _string(1, name)
+        + _string(2, documentation)
+        + _uint(3, metric_type)
+        + b"".join(_bytes(4, metric) for metric in metrics)
+    )
+
+
+def _counter_family(family, timestamp):
+    metrics = []
+    for labels, samples in _group_by_labels(family.samples).items():
+        value = None
+        created = None
+        last = samples[0]
+        for sample in samples:
+            if sample.name.endswith("_created"):
+                created = sample.value
+            else:
+                value = sample.value
+                last = sample
+        counter = _double(1, value if value is not None else 0.0)
+        if created is not None:
+            counter += _timestamp(3, created)
+        metrics.append(
+            _labels(dict(labels))
+            + _bytes(3, counter)
+            + _sample_timestamp_ms(last, timestamp)
+        )
+    name = family.name if family.name.endswith("_total") else f"{family.name}_total"
+    return _family(name, family.documentation, _COUNTER, metrics)
+
+
+def _histogram_family(family, timestamp):
+    metrics = []
+    for labels, samples in _group_by_labels(family.samples, "le").items():
+        histogram = b""
+        buckets = b""
+        for sample in samples:
+            if sample.name.endswith("_bucket"):
+                upper_bound = float(sample.labels["le"])
+                buckets += _bytes(3, _uint(1, sample.value) + _double(2, upper_bound))
+            elif sample.name.endswith("_count"):
+                histogram += _uint(1, sample.value)
+            elif sample.name.endswith("_sum"):
+                histogram += _double(2, sample.value)
+            elif sample.name.endswith("_created"):
+                histogram += _timestamp(15, sample.value)
+        metrics.append(
+            _labels(dict(labels))
+            + _bytes(7, histogram + buckets)
+            + _sample_timestamp_ms(samples[0], timestamp)
+        )
+    return _family(family.name, family.documentation, _HISTOGRAM, metrics)
+
+
+def _summary_family(family, timestamp):
+    metrics = []
+    for labels, samples in _group_by_labels(family.samples, "quantile").items():
+        summary = b""
+        quantiles = b""
+        for sample in samples:
+            if sample.name == family.name:
+                quantile = float(sample.labels["quantile"])
+                quantiles += _bytes(3, _double(1, quantile) + _double(2, sample.value))
+            elif sample.name.endswith("_count"):
+                summary += _uint(1, sample.value)
+            elif sample.name.endswith("_sum"):
+                summary += _double(2, sample.value)
+            elif sample.name.endswith("_created"):
+                summary += _timestamp(4, sample.value)
+        metrics.append(
+            _labels(dict(labels))
+            + _bytes(4, summary + quantiles)
+            + _sample_timestamp_ms(samples[0], timestamp)
+        )
+    return _family(family.name, family.documentation, _SUMMARY, metrics)
+
+
+def _value_families(family, metric_type, timestamp):
+    # Gauges and untyped metrics, as well as info and stateset metrics which are exposed as gauges.
+    value_field = 2 if metric_type == _GAUGE else 5
+    by_name = {}
+    for sample in family.samples:
+        by_name.setdefault(sample.name, []).append(
+            _labels(sample.labels)
+            + _bytes(value_field, _double(1, sample.value))
+            + _sample_timestamp_ms(sample, timestamp)
+        )
+    return [
+        _family(name, family.documentation, metric_type, metrics)
+        for name, metrics in by_name.items()
+    ]
+
+
+def generate_protobuf(families, timestamp=None):
+    """
+    Encodes metric families into the delimited protobuf exposition format.
+    'timestamp', in seconds, is attached to all samples which don't have a timestamp of their own.
+    """
+    output = []
+    for family in families:
+        if family.type == "counter":
+            encoded = [_counter_family(family, timestamp)]
+        elif family.type == "histogram":
+            encoded = [_histogram_family(family, timestamp)]
+        elif family.type == "summary":
+            encoded = [_summary_family(family, timestamp)]
+        elif family.type in ("gauge", "info", "stateset"):
+            encoded = _value_families(family, _GAUGE, timestamp)
+        else:
+            encoded = _value_families(family, _UNTYPED, timestamp)
+        for message in encoded:
+            if not message:
+                continue
+            output.append(_varint(len(message)))
+            output.append(message)
+    return b"".join(output)
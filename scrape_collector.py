@@ -0,0 +1,71 @@
+import logging
+import threading
+import time
+
+from prometheus_client.registry import REGISTRY, Collector
+
+logger = logging.getLogger("prometheus_handler")
+
+COLLECTION_MODE_POLL = "poll"
+COLLECTION_MODE_SCRAPE = "scrape"
+COLLECTION_MODES = (COLLECTION_MODE_POLL, COLLECTION_MODE_SCRAPE)
+DEFAULT_SCRAPE_CACHE_TTL_SECONDS = 1
+
+
+class ScrapeCollector(Collector):
+    """
+    Collector which pulls metrics from Memgraph when the exporter is scraped, instead of on a timer.
+    Concurrent scrapes share a single refresh, and data which is younger than the cache TTL
+    is served without going to Memgraph at all.
+    """
+
+    def __init__(
+        self, refresh, metrics, cache_ttl_seconds=DEFAULT_SCRAPE_CACHE_TTL_SECONDS
+    ):
+        self._refresh = refresh
+        self._metrics = list(metrics)
+        self._cache_ttl_seconds = cache_ttl_seconds
+        self._lock = threading.Lock()
+        self._last_refresh = None
+
+    def describe(self):
+        for metric in self._metrics:
+            yield from metric.describe()
+
+    def collect(self):
+        self.refresh_if_stale()
+        for metric in self._metrics:
+            yield from metric.collect()
+
+    def refresh_if_stale(self):
+        # Scrapes arriving while a refresh is running wait on the lock and then find fresh data.
+        with self._lock:
+            if (
+                self._last_refresh is not None
+                and time.monotonic() - self._last_refresh < self._cache_ttl_seconds
+            ):
+                return
+            try:
+                self._refresh()
+            except Exception as e:
+                logger.error("Error occurred while updating metrics: %s", e)
+            finally:
+                self._last_refresh = time.monotonic()
+
+
+def register_scrape_collector(
+    refresh, metrics, cache_ttl_seconds, registry=REGISTRY, exposition_cache=None
+):
+    """
+    Replaces 'metrics' in the registry with a ScrapeCollector which refreshes them on every scrape.
+    With an 'exposition_cache', the refresh runs before the cache collects the registry, so metrics which are
+    collected ahead of the ScrapeCollector, e.g. memgraph_up, already describe the pull of the same scrape.
+    """
+    metrics = list(metrics)
+    for metric in metrics:
+        registry.unregister(metric)
+    collector = ScrapeCollector(refresh, metrics, cache_ttl_seconds)
+    registry.register(collector)
+    if exposition_cache is not None:
+        exposition_cache.refresh_before_render(collector.refresh_if_stale)
+    return collector
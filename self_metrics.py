@@ -0,0 +1,303 @@
+import threading
+import time
+
+from prometheus_client import Counter, Enum, Gauge, Histogram, Summary
+from prometheus_client.metrics_core import GaugeMetricFamily
+from prometheus_client.registry import REGISTRY, Collector
+
+from instance_health import HEALTH_STATES
+
+# Metrics describing the exporter itself. Every exporter registers them in its own registry, and the ones of
+# the exporter process are registered in the default registry the first time they are used, see _default().
+
+
+class UpdateMetrics:
+    """
+    Numbers of received Memgraph values applied and skipped by the update plans of an exporter, registered
+    in 'registry'.
+    """
+
+    def __init__(self, registry=REGISTRY):
+        updates = Counter(
+            "mg_exporter_metric_updates",
+            "Number of received Memgraph values, by whether they changed and were applied or were skipped.",
+            ["result"],
+            registry=registry,
+        )
+        self.applied = updates.labels(result="applied")
+        self.skipped = updates.labels(result="skipped")
+
+
+class DiscoveryMetrics:
+    """
+    Metrics of the metric discovery of an exporter, registered in 'registry'.
+    """
+
+    def __init__(self, registry=REGISTRY):
+        self.discovered = Gauge(
+            "mg_exporter_discovered_metrics",
+            "Number of metrics registered because they were received from Memgraph but aren't in the static catalogs.",
+            ["section"],
+            registry=registry,
+        )
+        self.dropped = Counter(
+            "mg_exporter_discovered_metrics_dropped",
+            "Number of unknown Memgraph metrics which weren't registered, because of the per-section limit or an "
+            "invalid name.",
+            ["section"],
+            registry=registry,
+        )
+
+
+def _instance_metrics(label_names, registry):
+    return (
+        Histogram(
+            "mg_exporter_instance_fetch_duration_seconds",
+            "Time taken to fetch the metrics of a Memgraph instance, including reading the response.",
+            label_names,
+            registry=registry,
+        ),
+        Gauge(
+            "mg_exporter_instance_response_bytes",
+            "Size of the last metrics response of a Memgraph instance.",
+            label_names,
+            registry=registry,
+        ),
+        Summary(
+            "mg_exporter_instance_decode_duration_seconds",
+            "Time taken to decode the JSON metrics response of a Memgraph instance.",
+            label_names,
+            registry=registry,
+        ),
+        Summary(
+            "mg_exporter_instance_apply_duration_seconds",
+            "Time taken to apply the received values of a Memgraph instance to the exported metrics.",
+            label_names,
+            registry=registry,
+        ),
+        Gauge(
+            "memgraph_up",
+            "Whether the last pull of a Memgraph instance succeeded.",
+            label_names,
+            registry=registry,
+        ),
+        Gauge(
+            "memgraph_is_leader",
+            "Whether a Memgraph coordinator is the Raft leader of its cluster.",
+            label_names,
+            registry=registry,
+        ),
+        Gauge(
+            "mg_exporter_instance_consecutive_failures",
+            "Number of pulls of a Memgraph instance which failed in a row since the last successful one.",
+            label_names,
+            registry=registry,
+        ),
+        Enum(
+            "mg_exporter_instance_health",
+            "Health of a Memgraph instance: healthy, degraded after failed pulls, or open when it is only probed with backoff.",
+            label_names,
+            states=list(HEALTH_STATES),
+            registry=registry,
+        ),
+    )
+
+
+class PollCycleMetrics:
+    """
+    Metrics of the poll cycles of an exporter, registered in 'registry'.
+    """
+
+    def __init__(self, registry=REGISTRY):
+        self.duration = Gauge(
+            "mg_exporter_poll_cycle_duration_seconds",
+            "Duration of the last poll cycle over all Memgraph instances.",
+            registry=registry,
+        )
+        self.deadline = Gauge(
+            "mg_exporter_poll_cycle_deadline_seconds",
+            "Time a poll cycle may take before pulls which are still running are given up on.",
+            registry=registry,
+        )
+        self.deadline_exceeded = Counter(
+            "mg_exporter_poll_cycle_deadline_exceeded",
+            "Number of poll cycles in which some pulls didn't finish before the cycle deadline.",
+            registry=registry,
+        )
+
+
+class LastSuccessCollector(Collector):
+    """
+    Exposes the seconds since the last successful update of every instance, computed when it is collected.
+    Instances which were never updated successfully count from when they were first tracked.
+    """
+
+    def __init__(self, label_names=("instance_name",), registry=REGISTRY):
+        self._label_names = list(label_names)
+        self._lock = threading.Lock()
+        # Time of the last success by the label values of the instance.
+        self._last_success = {}
+        if registry is not None:
+            registry.register(self)
+
+    def track(self, label_values):
+        with self._lock:
+            self._last_success.setdefault(label_values, time.monotonic())
+
+    def succeeded(self, label_values):
+        with self._lock:
+            self._last_success[label_values] = time.monotonic()
+
+    def untrack(self, label_values):
+        with self._lock:
+            self._last_success.pop(label_values, None)
+
+    def collect(self):
+        now = time.monotonic()
+        family = GaugeMetricFamily(
+            "mg_exporter_instance_seconds_since_last_success",
+            "Seconds since the metrics of a Memgraph instance were last updated successfully.",
+            labels=self._label_names,
+        )
+        with self._lock:
+            last_success = list(self._last_success.items())
+        for label_values, timestamp in last_success:
+            family.add_metric(label_values, now - timestamp)
+        yield family
+
+
+class InstanceMetrics:
+    """
+    Per-instance self-metrics of an exporter with the label names 'label_names', registered in 'registry'.
+    """
+
+    def __init__(self, label_names=("instance_name",), registry=REGISTRY):
+        self.label_names = list(label_names)
+        self._registry = registry
+        (
+            self.fetch_duration,
+            self.response_bytes,
+            self.decode_duration,
+            self.apply_duration,
+            self.up,
+            self.is_leader,
+            self.consecutive_failures,
+            self.health,
+        ) = _instance_metrics(self.label_names, registry)
+        self.last_success = LastSuccessCollector(self.label_names, registry)
+
+    def labeled_metrics(self):
+        return (
+            self.fetch_duration,
+            self.response_bytes,
+            self.decode_duration,
+            self.apply_duration,
+            self.up,
+            self.is_leader,
+            self.consecutive_failures,
+            self.health,
+        )
+
+    def unregister(self):
+        for metric in self.labeled_metrics():
+            self._registry.unregister(metric)
+        self._registry.unregister(self.last_success)
+
+
+# Self-metrics of the exporter process by their class, registered in the default registry when first used,
+# so that importing the exporter's modules, e.g. to embed a MemgraphExporter, registers nothing.
+_defaults = {}
+_defaults_lock = threading.Lock()
+
+
+def _default(metrics_class):
+    with _defaults_lock:
+        metrics = _defaults.get(metrics_class)
+        if metrics is None:
+            metrics = _defaults[metrics_class] = metrics_class()
+        return metrics
+
+
+def default_update_metrics():
+    return _default(UpdateMetrics)
+
+
+def default_poll_cycle_metrics():
+    return _default(PollCycleMetrics)
+
+
+def default_instance_metrics():
+    return _default(InstanceMetrics)
+
+
+def configure_instance_labels(label_names):
+    """
+    Sets the label names of the per-instance metrics, e.g. ["cluster", "instance_name"].
+    Has to be called before any InstanceTelemetry is created.
+    """
+    with _defaults_lock:
+        metrics = _defaults.get(InstanceMetrics)
+        if metrics is not None:
+            metrics.unregister()
+        _defaults[InstanceMetrics] = InstanceMetrics(label_names)
+
+
+class InstanceTelemetry:
+    """
+    Self-metrics of a single Memgraph instance with label values 'labels', with the labeled children
+    resolved once up front. The instance is reported to 'metrics', the ones of the exporter process if None.
+    """
+
+    def __init__(self, labels, metrics=None):
+        self._metrics = metrics if metrics is not None else default_instance_metrics()
+        self._label_values = tuple(
+            str(labels[name]) for name in self._metrics.label_names
+        )
+        self._fetch_duration = self._metrics.fetch_duration.labels(*self._label_values)
+        self._response_bytes = self._metrics.response_bytes.labels(*self._label_values)
+        self._decode_duration = self._metrics.decode_duration.labels(
+            *self._label_values
+        )
+        self._apply_duration = self._metrics.apply_duration.labels(*self._label_values)
+        self._consecutive_failures = self._metrics.consecutive_failures.labels(
+            *self._label_values
+        )
+        self._up = self._metrics.up.labels(*self._label_values)
+        # Enum which the circuit breaker of the instance reports its state to.
+        self.health = self._metrics.health.labels(*self._label_values)
+        self._metrics.last_success.track(self._label_values)
+
+    def fetched(self, duration, response_bytes):
+        self._fetch_duration.observe(duration)
+        self._response_bytes.set(response_bytes)
+
+    def decoded(self, duration):
+        self._decode_duration.observe(duration)
+
+    def applied(self, duration):
+        self._apply_duration.observe(duration)
+
+    def succeeded(self):
+        self._up.set(1)
+        self._consecutive_failures.set(0)
+        self._metrics.last_success.succeeded(self._label_values)
+
+    def failed(self):
+        self._up.set(0)
+        self._consecutive_failures.inc()
+
+    def leads(self, is_leader):
+        # Only coordinators have the series, so it's created on first use.
+        self._metrics.is_leader.labels(*self._label_values).set(1 if is_leader else 0)
+
+    def remove(self):
+        """
+        Removes the series of the instance from all per-instance metrics.
+        """
+        for metric in self._metrics.labeled_metrics():
+            try:
+                metric.remove(*self._label_values)
+            except KeyError:
+                # Older versions of prometheus_client raise if the series doesn't exist.
+                pass
+        self._metrics.last_success.untrack(self._label_values)
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+
+from prometheus_client import REGISTRY, Gauge
+
+logger = logging.getLogger("prometheus_handler")
+
+SHARD_INDEX_ENV = "HOSTNAME"
+
+
+class ShardMetrics:
+    """
+    Numbers of configured and owned instances of an exporter replica, registered in 'registry'.
+    """
+
+    def __init__(self, registry=REGISTRY):
+        self.owned = Gauge(
+            "mg_exporter_owned_instances",
+            "Number of instances pulled by this exporter replica, out of all configured instances.",
+            ["shard_index", "shard_count"],
+            registry=registry,
+        )
+        self.configured = Gauge(
+            "mg_exporter_configured_instances",
+            "Number of instances in the configuration, before they are split between exporter replicas.",
+            registry=registry,
+        )
+
+
+# Metrics of the exporter process, registered in the default registry when first used.
+_default_metrics = None
+_default_metrics_lock = threading.Lock()
+
+
+def default_shard_metrics():
+    global _default_metrics
+    with _default_metrics_lock:
+        if _default_metrics is None:
+            _default_metrics = ShardMetrics()
+        return _default_metrics
+
+
+def jump_hash(key, num_buckets):
+    """
+    Jump consistent hash (Lamping and Veach). When the number of buckets grows from n to n + 1,
+    only 1/(n + 1) of the keys move, all of them to the new bucket.
+    """
+    bucket = -1
+    j = 0
+    while j < num_buckets:
+        bucket = j
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        j = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_of(name, shard_count):
+    # Python's hash() of strings differs between processes, so replicas need a stable hash.
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+    return jump_hash(int.from_bytes(digest, "big"), shard_count)
+
+
+def _ordinal_from_hostname():
+    # Pods of a StatefulSet are named <statefulset>-<ordinal>.
+    match = re.search(r"-(\d+)$", os.environ.get(SHARD_INDEX_ENV, ""))
+    return int(match.group(1)) if match else None
+
+
+class ShardConfig:
+    """
+    Selects the instances pulled by one of 'shard_count' exporter replicas. If 'shard_index' isn't set,
+    it is the ordinal of the StatefulSet pod the exporter runs in.
+    """
+
+    def __init__(self, shard_index=None, shard_count=1):
+        if shard_count < 1:
+            raise ValueError(f"Shard count has to be at least 1, not {shard_count}.")
+        if shard_index is None:
+            shard_index = 0 if shard_count == 1 else _ordinal_from_hostname()
+        if shard_index is None:
+            raise ValueError(
+                f"Shard index isn't set and can't be derived from {SHARD_INDEX_ENV}={os.environ.get(SHARD_INDEX_ENV)}."
+            )
+        if not 0 <= shard_index < shard_count:
+            raise ValueError(
+                f"Shard index {shard_index} isn't between 0 and shard count {shard_count}."
+            )
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            shard_index=data.get("shard_index"), shard_count=data.get("shard_count", 1)
+        )
+
+    def owns(self, name):
+        return (
+            self.shard_count == 1
+            or shard_of(name, self.shard_count) == self.shard_index
+        )
+
+    def select(self, instances, metrics=None):
+        """
+        Returns the instances owned by this replica, and reports their number to 'metrics', the ShardMetrics of
+        the exporter process if None.
+        """
+        owned = [instance for instance in instances if self.owns(instance.key)]
+        metrics = metrics if metrics is not None else default_shard_metrics()
+        metrics.configured.set(len(instances))
+        metrics.owned.labels(
+            shard_index=self.shard_index, shard_count=self.shard_count
+        ).set(len(owned))
+        if self.shard_count > 1:
+            logger.info(
+                "Exporter is shard %d of %d and owns %d of %d instances",
+                self.shard_index,
+                self.shard_count,
+                len(owned),
+                len(instances),
+            )
+        return owned
@@ -1,24 +1,50 @@
 import logging
 import time
-import requests
 import yaml
 
-from yaml.loader import SafeLoader
+from typing import List, Optional
 
-from prometheus_client import start_http_server
+from yaml.loader import SafeLoader
 
-from standalone_model import update_metrics
+from json_decoder import JSON_DECODER_AUTO, get_json_decoder
+from exposition import ExpositionCache, start_http_server
+from memgraph_client import HttpConfig, MemgraphClient
+from metric_discovery import DEFAULT_MAX_DISCOVERED_METRICS_PER_SECTION
+from scrape_collector import (
+    COLLECTION_MODE_POLL,
+    COLLECTION_MODE_SCRAPE,
+    COLLECTION_MODES,
+    DEFAULT_SCRAPE_CACHE_TTL_SECONDS,
+    register_scrape_collector,
+)
+from self_metrics import InstanceTelemetry
+from standalone_model import (
+    all_metrics,
+    enable_metric_discovery,
+    select_sections,
+    update_metrics,
+)
 
 logger = logging.getLogger("prometheus_handler")
 
+# Value of the instance_name label of the exporter self-metrics.
+STANDALONE_INSTANCE_NAME = "standalone"
+
 
 class ConfigConstants:
+    COLLECTION_MODE = "collection_mode"
+    DISCOVER_METRICS = "discover_metrics"
     EXPORTER = "exporter"
+    SAMPLE_TIMESTAMPS = "sample_timestamps"
     ENDPOINT_URL = "endpoint_url"
     GENERAL = "general"
+    JSON_DECODER = "json_decoder"
+    MAX_DISCOVERED_METRICS_PER_SECTION = "max_discovered_metrics_per_section"
     MEMGRAPH = "memgraph"
     PORT = "port"
     PULL_FREQUENCY_SECONDS = "pull_frequency_seconds"
+    SCRAPE_CACHE_TTL_SECONDS = "scrape_cache_ttl_seconds"
+    SECTIONS = "sections"
 
 
 class Config:
@@ -28,21 +54,59 @@ class Config:
         memgraph_port: int,
         exporter_port: int,
         pull_frequency_seconds: int,
+        collection_mode: str = COLLECTION_MODE_POLL,
+        scrape_cache_ttl_seconds: float = DEFAULT_SCRAPE_CACHE_TTL_SECONDS,
+        http_config: HttpConfig = None,
+        sample_timestamps: bool = False,
+        discover_metrics: bool = False,
+        max_discovered_metrics_per_section: int = DEFAULT_MAX_DISCOVERED_METRICS_PER_SECTION,
+        json_decoder: str = JSON_DECODER_AUTO,
+        sections: Optional[List[str]] = None,
     ) -> None:
+        if collection_mode not in COLLECTION_MODES:
+            raise ValueError(
+                f"Unknown collection mode {collection_mode}, please choose one of {', '.join(COLLECTION_MODES)}."
+            )
         self._memgraph_endpoint_url = memgraph_endpoint_url
         self._memgraph_port = memgraph_port
         self._exporter_port = exporter_port
         self._pull_frequency_seconds = pull_frequency_seconds
+        self._collection_mode = collection_mode
+        self._scrape_cache_ttl_seconds = scrape_cache_ttl_seconds
+        self._http_config = http_config or HttpConfig()
+        self._sample_timestamps = sample_timestamps
+        self._discover_metrics = discover_metrics
+        self._max_discovered_metrics_per_section = max_discovered_metrics_per_section
+        self._json_decoder = json_decoder
+        self._sections = sections
+        self._memgraph_metrics_url = f"{memgraph_endpoint_url}:{memgraph_port}"
 
     @classmethod
     def from_yaml_file(cls, file_name: str = "standalone_config.yaml") -> "Config":
         with open(file_name) as f:
             data = yaml.load(f, Loader=SafeLoader)
+            general = data[ConfigConstants.GENERAL]
             return Config(
                 data[ConfigConstants.MEMGRAPH][ConfigConstants.ENDPOINT_URL],
                 data[ConfigConstants.MEMGRAPH][ConfigConstants.PORT],
                 data[ConfigConstants.EXPORTER][ConfigConstants.PORT],
-                data[ConfigConstants.GENERAL][ConfigConstants.PULL_FREQUENCY_SECONDS],
+                general[ConfigConstants.PULL_FREQUENCY_SECONDS],
+                general.get(ConfigConstants.COLLECTION_MODE, COLLECTION_MODE_POLL),
+                general.get(
+                    ConfigConstants.SCRAPE_CACHE_TTL_SECONDS,
+                    DEFAULT_SCRAPE_CACHE_TTL_SECONDS,
+                ),
+                HttpConfig.from_dict(data[ConfigConstants.MEMGRAPH]),
+                data[ConfigConstants.EXPORTER].get(
+                    ConfigConstants.SAMPLE_TIMESTAMPS, False
+                ),
+                general.get(ConfigConstants.DISCOVER_METRICS, False),
+                general.get(
+                    ConfigConstants.MAX_DISCOVERED_METRICS_PER_SECTION,
+                    DEFAULT_MAX_DISCOVERED_METRICS_PER_SECTION,
+                ),
+                general.get(ConfigConstants.JSON_DECODER, JSON_DECODER_AUTO),
+                general.get(ConfigConstants.SECTIONS),
             )
 
     @property
@@ -57,37 +121,112 @@ class Config:
     def memgraph_port(self) -> int:
         return self._memgraph_port
 
+    @property
+    def memgraph_metrics_url(self) -> str:
+        return self._memgraph_metrics_url
+
     @property
     def pull_frequency_seconds(self) -> int:
         return self._pull_frequency_seconds
 
+    @property
+    def collection_mode(self) -> str:
+        return self._collection_mode
 
-def pull_metrics(config: Config):
-    res = requests.get(f"{config.memgraph_endpoint_url}:{config.memgraph_port}")
+    @property
+    def scrape_cache_ttl_seconds(self) -> float:
+        return self._scrape_cache_ttl_seconds
 
-    if res.status_code != 200:
-        raise Exception(
-            f"Status code is not 200, but {res.status_code}, please check running services!"
-        )
+    @property
+    def http_config(self) -> HttpConfig:
+        return self._http_config
+
+    @property
+    def sample_timestamps(self) -> bool:
+        return self._sample_timestamps
+
+    @property
+    def discover_metrics(self) -> bool:
+        return self._discover_metrics
+
+    @property
+    def max_discovered_metrics_per_section(self) -> int:
+        return self._max_discovered_metrics_per_section
+
+    @property
+    def json_decoder(self) -> str:
+        return self._json_decoder
+
+    @property
+    def sections(self) -> Optional[List[str]]:
+        return self._sections
 
-    json_data = res.json()
 
-    update_metrics(json_data)
+def pull_metrics(client: MemgraphClient, telemetry: InstanceTelemetry, decode_json):
+    try:
+        started = time.perf_counter()
+        res = client.get()
+        telemetry.fetched(time.perf_counter() - started, len(res.content))
+
+        if res.status_code != 200:
+            raise Exception(
+                f"Status code is not 200, but {res.status_code}, please check running services!"
+            )
+
+        started = time.perf_counter()
+        json_data = decode_json(res.content)
+        telemetry.decoded(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        update_metrics(json_data)
+        telemetry.applied(time.perf_counter() - started)
+    except Exception:
+        telemetry.failed()
+        raise
+    telemetry.succeeded()
     logger.info("Sent update to Prometheus")
 
 
 def run(config_file):
     # Parse the configuration for starting the service and retrieve data from correct endpoints
     config = Config.from_yaml_file(file_name=config_file)
-    start_http_server(config.exporter_port)
+    client = MemgraphClient(config.memgraph_metrics_url, config.http_config)
+    telemetry = InstanceTelemetry({"instance_name": STANDALONE_INSTANCE_NAME})
+    json_decoder, decode_json = get_json_decoder(config.json_decoder)
+    logger.info("Decoding Memgraph responses with the %s decoder", json_decoder)
+    if config.sections is not None:
+        select_sections(config.sections)
+    if config.discover_metrics:
+        enable_metric_discovery(config.max_discovered_metrics_per_section)
+
+    if config.collection_mode == COLLECTION_MODE_SCRAPE:
+        # Memgraph is pulled only when Prometheus scrapes the exporter.
+        exposition_cache = ExpositionCache(
+            max_age_seconds=config.scrape_cache_ttl_seconds,
+            sample_timestamps=config.sample_timestamps,
+        )
+        register_scrape_collector(
+            lambda: pull_metrics(client, telemetry, decode_json),
+            all_metrics(),
+            config.scrape_cache_ttl_seconds,
+            exposition_cache=exposition_cache,
+        )
+        start_http_server(config.exporter_port, exposition_cache)
+        while True:
+            time.sleep(3600)
+
+    # The exposition is rendered once per pull and every scrape is served from it.
+    exposition_cache = ExpositionCache(sample_timestamps=config.sample_timestamps)
+    start_http_server(config.exporter_port, exposition_cache)
 
     # Continuously fetch metrics
     while True:
         try:
             time.sleep(config.pull_frequency_seconds)
-            pull_metrics(config)
+            pull_metrics(client, telemetry, decode_json)
         except Exception as e:
             logger.error("Error occurred while updating metrics: %s", e)
+        exposition_cache.refresh()
 
 
 if __name__ == "__main__":
@@ -1,126 +1,77 @@
-from functools import partial
 import logging
 from typing import Dict
 
-from prometheus_client import Gauge
+from prometheus_client import REGISTRY, Gauge
 
-from metrics.general_metrics import general_data
-from metrics.trigger_metrics import trigger_data
-from metrics.transaction_metrics import txn_data
-from metrics.session_metrics import session_data
-from metrics.ttl_metrics import ttl_data
-from metrics.stream_metrics import stream_data
-from metrics.snapshot_metrics import snapshot_data
-from metrics.query_type_metrics import query_type_data
-from metrics.query_metrics import query_data
-from metrics.index_metrics import index_data
-from metrics.operator_metrics import operator_data
+from metrics.catalog import GAUGE_TYPES, ROLE_STANDALONE, sections
+from metric_discovery import MetricDiscovery
+from update_plan import compile_update_plan
 
 logger = logging.getLogger("prometheus_handler")
 
 
-PrometheusIndexData = {name: Gauge(name, description) for name, description in index_data}
-PrometheusGeneralData = {name: Gauge(name, description) for name, description in general_data}
-PrometheusOperatorData = {name: Gauge(name, f"Number of times {name} has been called.") for name in operator_data}
-PrometheusQueryData = {name: Gauge(name, description) for name, description in query_data}
-PrometheusQueryTypeData = {name: Gauge(name, description) for name, description in query_type_data}
-PrometheusSessionData = {name: Gauge(name, description) for name, description in session_data}
-PrometheusSnapshotData = {name: Gauge(name, description) for name, description in snapshot_data}
-PrometheusStreamData = {name: Gauge(name, description) for name, description in stream_data}
-PrometheusTransactionData = {name: Gauge(name, description) for name, description in txn_data}
-PrometheusTriggerData = {name: Gauge(name, description) for name, description in trigger_data}
-PrometheusTTLData = {name: Gauge(name, description) for name, description in ttl_data}
+# Sections of the Memgraph JSON and the metrics they update, built from the catalog.
+SECTIONS = [
+    (section, {name: Gauge(name, description) for name, description in metrics})
+    for section, metrics in sections(ROLE_STANDALONE, GAUGE_TYPES)
+]
 
 
-def safe_execute(func):
-    try:
-        func()
-    except Exception as e:
-        logger.error("Error occurred while updating metrics: %s", e)
+def all_metrics():
+    """
+    Returns all metrics which the standalone exporter exposes.
+    """
+    for _, prom_data in exported_sections(SECTIONS):
+        yield from prom_data.values()
 
 
-def update_gauges(mg_data, prom_data):
-    for key, value in mg_data.items():
-        if key not in prom_data:
-            continue
-        prom_data[key].set(value)
+# Names of the exported sections, all of them unless only some are selected.
+_exported_section_names = None
+_discovery = None
+
+
+def exported_sections(sections):
+    """
+    Returns the (section, metrics) pairs of 'sections' which are exported.
+    """
+    if _exported_section_names is None:
+        return list(sections)
+    return [(section, data) for section, data in sections if section in _exported_section_names]
+
+
+def _compile_plan():
+    global _update_plan
+    _update_plan = compile_update_plan(exported_sections(SECTIONS), discovery=_discovery)
+
+
+def select_sections(section_names):
+    """
+    Exports only the metrics of the sections 'section_names'. Metrics of the other sections are removed from the
+    registry, and their values are skipped without being looked at. Can be called only once.
+    """
+    global _exported_section_names
+    unknown = set(section_names) - {section for section, _ in SECTIONS}
+    if unknown:
+        raise ValueError(f"Unknown sections {', '.join(sorted(unknown))}")
+    for section, prom_data in SECTIONS:
+        if section not in section_names:
+            for metric in prom_data.values():
+                REGISTRY.unregister(metric)
+    _exported_section_names = frozenset(section_names)
+    _compile_plan()
+
+
+def enable_metric_discovery(max_metrics_per_section):
+    """
+    Registers metrics which aren't in the static catalogs the first time Memgraph reports them.
+    """
+    global _discovery
+    _discovery = MetricDiscovery(max_metrics_per_section=max_metrics_per_section)
+    _compile_plan()
+
+
+_compile_plan()
 
 
 def update_metrics(mg_data: Dict[str, Dict[str, int]]):
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Index"],
-            PrometheusIndexData,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Operator"],
-            PrometheusOperatorData,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Query"],
-            PrometheusQueryData,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["QueryType"],
-            PrometheusQueryTypeData,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Session"],
-            PrometheusSessionData,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Snapshot"],
-            PrometheusSnapshotData,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Stream"],
-            PrometheusStreamData,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Transaction"],
-            PrometheusTransactionData,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["Trigger"],
-            PrometheusTriggerData,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["TTL"],
-            PrometheusTTLData,
-        )
-    )
-    safe_execute(
-        partial(
-            update_gauges,
-            mg_data["General"],
-            PrometheusGeneralData,
-        )
-    )
+    _update_plan.apply(mg_data)
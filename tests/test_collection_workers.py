@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import collection_workers  # noqa: E402
+from collection_workers import WorkerPool  # noqa: E402
+from ha_main import InstanceConfig  # noqa: E402
+from memgraph_client import HttpConfig  # noqa: E402
+
+
+@pytest.fixture
+def instance():
+    body = json.dumps({"General": {"vertex_count": 5}}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield InstanceConfig(
+        "instance_1", "http://127.0.0.1", server.server_address[1], "data_instance"
+    )
+    server.shutdown()
+    server.server_close()
+
+
+def test_worker_which_exited_is_replaced(instance, monkeypatch):
+    monkeypatch.setattr(collection_workers, "WORKER_RESPAWN_DELAY_SECONDS", 0)
+    pool = WorkerPool(
+        1, HttpConfig(), "auto", {"data_instance": [("General", "vertex_count")]}
+    )
+    try:
+        assert list(pool.fetch(instance).values) == [5]
+
+        dead = pool._workers[0]
+        dead.process.kill()
+        dead.process.join()
+        with pytest.raises(Exception):
+            pool.fetch(instance)
+        # Forgetting an instance of a dead worker doesn't raise.
+        pool.forget(instance)
+
+        deadline = time.monotonic() + 10
+        while pool._workers[0] is dead and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert pool._workers[0] is not dead
+        assert list(pool.fetch(instance).values) == [5]
+    finally:
+        pool.shutdown()
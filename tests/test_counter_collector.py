@@ -0,0 +1,35 @@
+import os
+import sys
+
+from prometheus_client import CollectorRegistry
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from counter_collector import CumulativeCounterCollector  # noqa: E402
+from update_plan import compile_update_plan  # noqa: E402
+
+LABELS = {"instance_name": "instance_1"}
+
+
+def _total(registry):
+    return registry.get_sample_value("SuccessfulFailovers_total", LABELS)
+
+
+def test_counter_total_stays_monotonic_across_resets_and_repeated_values():
+    registry = CollectorRegistry()
+    collector = CumulativeCounterCollector(
+        [("SuccessfulFailovers", "Failovers.")], registry=registry
+    )
+    plan = compile_update_plan(
+        [], LABELS, [("HighAvailability", collector)], discovery=None
+    )
+
+    totals = []
+    # Repeated values are skipped by the plan, 2 after 5 is a restart, and the last 5 comes after it.
+    for count in (3, 5, 5, 2, 2, 5, 0, 1):
+        plan.apply({"HighAvailability": {"SuccessfulFailovers": count}})
+        totals.append(_total(registry))
+
+    assert totals == [3, 5, 5, 7, 7, 10, 10, 11]
+    assert totals == sorted(totals)
+    assert collector.last_value("SuccessfulFailovers", LABELS) == 1
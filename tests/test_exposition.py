@@ -0,0 +1,29 @@
+import os
+import sys
+
+from prometheus_client import CollectorRegistry, Gauge
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exposition import (  # noqa: E402
+    FORMAT_OPENMETRICS,
+    FORMAT_PROTOBUF,
+    FORMAT_TEXT,
+    ExpositionCache,
+)
+
+
+def test_refresh_prerenders_openmetrics_and_requested_formats():
+    registry = CollectorRegistry()
+    Gauge("ActiveSessions", "Sessions.", registry=registry).set(1)
+    cache = ExpositionCache(registry)
+
+    rendered = cache.refresh()
+    assert (FORMAT_TEXT, True) in rendered._buffers
+    assert (FORMAT_OPENMETRICS, True) in rendered._buffers
+    assert (FORMAT_PROTOBUF, False) not in rendered._buffers
+
+    cache.body(FORMAT_PROTOBUF, False)
+    rendered = cache.refresh()
+    assert (FORMAT_PROTOBUF, False) in rendered._buffers
+    assert (FORMAT_PROTOBUF, True) not in rendered._buffers
@@ -0,0 +1,76 @@
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ha_main import parse_instances  # noqa: E402
+
+
+def _write_targets(path, groups):
+    path.write_text(json.dumps(groups))
+
+
+def _group(target, name, **labels):
+    return {
+        "targets": [target],
+        "labels": {"name": name, "type": "data_instance", **labels},
+    }
+
+
+def test_reload_skips_target_groups_which_add_labels(tmp_path, caplog):
+    config = {"file_sd_configs": [{"files": ["targets/*.json"]}]}
+    (tmp_path / "targets").mkdir()
+    _write_targets(
+        tmp_path / "targets" / "a.json",
+        [_group("10.0.0.1:9091", "data1", cluster="prod", zone="a")],
+    )
+    _, label_names = parse_instances(config, str(tmp_path))
+    assert label_names == ["cluster", "zone", "instance_name"]
+
+    # The file with the only zone label is gone, one group adds a label and another one fits.
+    (tmp_path / "targets" / "a.json").unlink()
+    _write_targets(
+        tmp_path / "targets" / "b.json",
+        [
+            _group("10.0.0.2:9091", "data2", cluster="prod", rack="r1"),
+            _group("10.0.0.3:9091", "data3", cluster="prod"),
+        ],
+    )
+    with caplog.at_level(logging.ERROR, logger="prometheus_handler"):
+        instances, reloaded_label_names = parse_instances(
+            config, str(tmp_path), label_names
+        )
+
+    assert reloaded_label_names == label_names
+    assert [instance.name for instance in instances] == ["data3"]
+    assert instances[0].labels == {
+        "cluster": "prod",
+        "zone": "",
+        "instance_name": "data3",
+    }
+    assert "b.json" in caplog.text and "rack" in caplog.text
+
+
+def test_reload_rejects_configured_instances_which_add_labels():
+    config = {
+        "clusters": [
+            {
+                "name": "prod",
+                "labels": {"zone": "a"},
+                "instances": [
+                    {
+                        "name": "d1",
+                        "url": "http://x",
+                        "port": 1,
+                        "type": "data_instance",
+                    }
+                ],
+            }
+        ]
+    }
+    with pytest.raises(ValueError, match="zone"):
+        parse_instances(config, label_names=["cluster", "instance_name"])
@@ -0,0 +1,29 @@
+import os
+import sys
+
+from prometheus_client import CollectorRegistry
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ha_model import HAModel  # noqa: E402
+
+
+def test_convert_metrics_doesnt_create_exported_metrics():
+    registry = CollectorRegistry()
+    model = HAModel(registry=registry)
+
+    families = model.convert_metrics(
+        {
+            "General": {"vertex_count": 3, "unknown": 1},
+            "HighAvailability": {"BecomeLeaderSuccess": 2},
+        },
+        "coordinator",
+    )
+
+    assert [(family.name, family.type) for family in families] == [
+        ("vertex_count", "gauge"),
+        ("BecomeLeaderSuccess", "counter"),
+    ]
+    assert families[0].samples[0].value == 3
+    assert registry.get_sample_value("vertex_count", {"instance_name": "x"}) is None
+    assert all(section.built is False for _, section in model.coordinator_sections)
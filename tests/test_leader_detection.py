@@ -0,0 +1,96 @@
+import json
+import os
+import sys
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from prometheus_client import CollectorRegistry
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ha_main import InstanceConfig, InstancePoller  # noqa: E402
+from ha_model import HAModel  # noqa: E402
+from instance_health import HEALTH_HEALTHY  # noqa: E402
+from self_metrics import InstanceMetrics, PollCycleMetrics  # noqa: E402
+
+
+def _serve(payload):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            body = json.dumps(payload).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def coordinators():
+    payloads = [
+        {
+            "General": {"vertex_count": 1},
+            "HighAvailability": {"BecomeLeaderSuccess": count},
+        }
+        for count in (2, 0)
+    ]
+    servers = [_serve(payload) for payload in payloads]
+    yield [
+        InstanceConfig(
+            f"coord{index}", "http://127.0.0.1", server.server_address[1], "coordinator"
+        )
+        for index, server in enumerate(servers, 1)
+    ], payloads
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _is_leader(registry, name):
+    return registry.get_sample_value("memgraph_is_leader", {"instance_name": name})
+
+
+def test_polled_coordinators_report_leader_and_health(coordinators):
+    coordinators, payloads = coordinators
+    registry = CollectorRegistry()
+    poller = InstancePoller(
+        coordinators,
+        max_concurrency=2,
+        cycle_deadline_seconds=5,
+        stale_series_ttl_seconds=60,
+        model=HAModel(registry=registry),
+        instance_metrics=InstanceMetrics(registry=registry),
+        poll_cycle_metrics=PollCycleMetrics(registry),
+    )
+    try:
+        poller.poll_once()
+        for instance in coordinators:
+            assert poller._in_flight[instance.key].exception() is None
+            assert poller._health[instance.key].state == HEALTH_HEALTHY
+        # The highest count doesn't tell who was elected last.
+        assert poller._leaders.leader(None) is None
+        assert _is_leader(registry, "coord1") == 0
+        assert _is_leader(registry, "coord2") == 0
+
+        payloads[1]["HighAvailability"]["BecomeLeaderSuccess"] = 1
+        poller.poll_once()
+        assert poller._leaders.leader(None) == "coord2"
+        assert _is_leader(registry, "coord1") == 0
+        assert _is_leader(registry, "coord2") == 1
+        assert (
+            registry.get_sample_value("memgraph_up", {"instance_name": "coord1"}) == 1
+        )
+        assert (
+            registry.get_sample_value("vertex_count", {"instance_name": "coord1"}) == 1
+        )
+    finally:
+        poller.shutdown()
@@ -0,0 +1,92 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from memgraph_exporter import MemgraphExporter  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def instance_port():
+    body = json.dumps({"General": {"vertex_count": 1, "edge_count": 2}}).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+def _config(port, names):
+    return {
+        "exporter": {"pull_frequency_seconds": 5},
+        "instances": [
+            {
+                "name": name,
+                "url": "http://127.0.0.1",
+                "port": port,
+                "type": "data_instance",
+            }
+            for name in names
+        ],
+    }
+
+
+def test_importing_the_exporter_registers_nothing_in_the_default_registry():
+    script = (
+        "from prometheus_client import REGISTRY\n"
+        "before = set(REGISTRY._names_to_collectors)\n"
+        "import memgraph_exporter\n"
+        "print(sorted(set(REGISTRY._names_to_collectors) - before))\n"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip() == "[]"
+
+
+def test_exporters_count_their_own_updates(instance_port):
+    exporters = [
+        MemgraphExporter(_config(instance_port, ["data1"])),
+        MemgraphExporter(_config(instance_port, ["data1", "data2", "data3"])),
+    ]
+    try:
+        for exporter in exporters:
+            exporter.collect_once()
+        applied = [
+            exporter.registry.get_sample_value(
+                "mg_exporter_metric_updates_total", {"result": "applied"}
+            )
+            for exporter in exporters
+        ]
+        assert applied == [2, 6]
+        assert [
+            exporter.registry.get_sample_value("mg_exporter_configured_instances")
+            for exporter in exporters
+        ] == [1, 3]
+    finally:
+        for exporter in exporters:
+            exporter.stop()
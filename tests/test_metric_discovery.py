@@ -0,0 +1,39 @@
+import os
+import sys
+
+from prometheus_client import CollectorRegistry
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ha_main import InstanceConfig  # noqa: E402
+from ha_model import HAModel  # noqa: E402
+
+
+def test_discovery_doesnt_take_names_of_lazy_catalog_sections():
+    registry = CollectorRegistry()
+    model = HAModel(registry=registry)
+    model.enable_metric_discovery(10)
+    coordinator = InstanceConfig("coord1", "http://127.0.0.1", 1, "coordinator")
+    data_instance = InstanceConfig("data1", "http://127.0.0.1", 2, "data_instance")
+
+    # A data-instance metric reported by a coordinator before any data instance was updated.
+    model.update_metrics(
+        {"HighAvailability": {"AppendDeltasRpc_us_50p": 5}}, coordinator
+    )
+    model.update_metrics(
+        {"HighAvailability": {"AppendDeltasRpc_us_50p": 7, "HeartbeatRpc_us_50p": 3}},
+        data_instance,
+    )
+
+    assert (
+        registry.get_sample_value("AppendDeltasRpc_us_50p", {"instance_name": "coord1"})
+        is None
+    )
+    assert (
+        registry.get_sample_value("AppendDeltasRpc_us_50p", {"instance_name": "data1"})
+        == 7
+    )
+    assert (
+        registry.get_sample_value("HeartbeatRpc_us_50p", {"instance_name": "data1"})
+        == 3
+    )
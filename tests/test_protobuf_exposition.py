@@ -0,0 +1,156 @@
+import os
+import sys
+
+import pytest
+from prometheus_client import CollectorRegistry, Counter, Gauge, Summary
+from prometheus_client.core import SummaryMetricFamily
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from protobuf_exposition import generate_protobuf  # noqa: E402
+
+descriptor_pb2 = pytest.importorskip("google.protobuf.descriptor_pb2")
+descriptor_pool = pytest.importorskip("google.protobuf.descriptor_pool")
+message_factory = pytest.importorskip("google.protobuf.message_factory")
+timestamp_pb2 = pytest.importorskip("google.protobuf.timestamp_pb2")
+
+_OPTIONAL = descriptor_pb2.FieldDescriptorProto.LABEL_OPTIONAL
+_REPEATED = descriptor_pb2.FieldDescriptorProto.LABEL_REPEATED
+_TYPES = {
+    "string": descriptor_pb2.FieldDescriptorProto.TYPE_STRING,
+    "double": descriptor_pb2.FieldDescriptorProto.TYPE_DOUBLE,
+    "uint64": descriptor_pb2.FieldDescriptorProto.TYPE_UINT64,
+    "int64": descriptor_pb2.FieldDescriptorProto.TYPE_INT64,
+    "enum": descriptor_pb2.FieldDescriptorProto.TYPE_ENUM,
+    "message": descriptor_pb2.FieldDescriptorProto.TYPE_MESSAGE,
+}
+
+# The subset of io.prometheus.client's metrics.proto which the exporter writes.
+_MESSAGES = {
+    "LabelPair": [("name", 1, "string"), ("value", 2, "string")],
+    "Gauge": [("value", 1, "double")],
+    "Counter": [
+        ("value", 1, "double"),
+        ("created_timestamp", 3, ".google.protobuf.Timestamp"),
+    ],
+    "Quantile": [("quantile", 1, "double"), ("value", 2, "double")],
+    "Summary": [
+        ("sample_count", 1, "uint64"),
+        ("sample_sum", 2, "double"),
+        ("quantile", 3, "repeated .io.prometheus.client.Quantile"),
+        ("created_timestamp", 4, ".google.protobuf.Timestamp"),
+    ],
+    "Untyped": [("value", 1, "double")],
+    "Metric": [
+        ("label", 1, "repeated .io.prometheus.client.LabelPair"),
+        ("gauge", 2, ".io.prometheus.client.Gauge"),
+        ("counter", 3, ".io.prometheus.client.Counter"),
+        ("summary", 4, ".io.prometheus.client.Summary"),
+        ("untyped", 5, ".io.prometheus.client.Untyped"),
+        ("timestamp_ms", 6, "int64"),
+    ],
+    "MetricFamily": [
+        ("name", 1, "string"),
+        ("help", 2, "string"),
+        ("type", 3, "enum .io.prometheus.client.MetricType"),
+        ("metric", 4, "repeated .io.prometheus.client.Metric"),
+    ],
+}
+
+
+def _metric_family_class():
+    pool = descriptor_pool.DescriptorPool()
+    pool.AddSerializedFile(timestamp_pb2.DESCRIPTOR.serialized_pb)
+    proto = descriptor_pb2.FileDescriptorProto(
+        name="io/prometheus/client/metrics.proto",
+        package="io.prometheus.client",
+        syntax="proto2",
+        dependency=["google/protobuf/timestamp.proto"],
+    )
+    metric_type = proto.enum_type.add(name="MetricType")
+    for number, name in enumerate(
+        ("COUNTER", "GAUGE", "SUMMARY", "UNTYPED", "HISTOGRAM")
+    ):
+        metric_type.value.add(name=name, number=number)
+    for message_name, fields in _MESSAGES.items():
+        message = proto.message_type.add(name=message_name)
+        for name, number, type_name in fields:
+            label = _OPTIONAL
+            if type_name.startswith("repeated "):
+                label = _REPEATED
+                type_name = type_name[len("repeated ") :]
+            field = message.field.add(name=name, number=number, label=label)
+            if type_name.startswith("enum "):
+                field.type = _TYPES["enum"]
+                field.type_name = type_name[len("enum ") :]
+            elif type_name.startswith("."):
+                field.type = _TYPES["message"]
+                field.type_name = type_name
+            else:
+                field.type = _TYPES[type_name]
+    pool.Add(proto)
+    return message_factory.GetMessageClass(
+        pool.FindMessageTypeByName("io.prometheus.client.MetricFamily")
+    )
+
+
+def _decode_delimited(data):
+    metric_family = _metric_family_class()
+    families = {}
+    position = 0
+    while position < len(data):
+        length = 0
+        shift = 0
+        while True:
+            byte = data[position]
+            position += 1
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        family = metric_family()
+        family.ParseFromString(data[position : position + length])
+        position += length
+        families[family.name] = family
+    return families
+
+
+def test_protobuf_exposition_round_trips():
+    registry = CollectorRegistry()
+    gauge = Gauge("ActiveSessions", "Sessions.", ["instance_name"], registry=registry)
+    gauge.labels("instance_1").set(3)
+    gauge.labels("instance_2").set(-1.5)
+    Counter("BecomeLeaderSuccess", "Elections.", registry=registry).inc(7)
+    summary = Summary("poll_seconds", "Poll.", registry=registry)
+    summary.observe(0.25)
+    summary.observe(0.5)
+
+    latency = SummaryMetricFamily("latency", "Latency.", count_value=4, sum_value=6)
+    latency.add_sample("latency", {"quantile": "0.5"}, 1.5)
+    latency.add_sample("latency", {"quantile": "0.99"}, 2.5)
+
+    families = _decode_delimited(
+        generate_protobuf(list(registry.collect()) + [latency], timestamp=1700000000.5)
+    )
+
+    sessions = families["ActiveSessions"]
+    assert sessions.help == "Sessions."
+    assert sessions.type == 1
+    assert {
+        metric.label[0].value: metric.gauge.value for metric in sessions.metric
+    } == {"instance_1": 3, "instance_2": -1.5}
+    assert all(metric.label[0].name == "instance_name" for metric in sessions.metric)
+    assert all(metric.timestamp_ms == 1700000000500 for metric in sessions.metric)
+
+    elections = families["BecomeLeaderSuccess_total"]
+    assert elections.type == 0
+    assert elections.metric[0].counter.value == 7
+    assert elections.metric[0].counter.HasField("created_timestamp")
+
+    poll = families["poll_seconds"]
+    assert poll.type == 2
+    assert poll.metric[0].summary.sample_count == 2
+    assert poll.metric[0].summary.sample_sum == 0.75
+
+    quantiles = families["latency"].metric[0].summary.quantile
+    assert [(q.quantile, q.value) for q in quantiles] == [(0.5, 1.5), (0.99, 2.5)]
@@ -0,0 +1,35 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ha_main import GeneralConfig, apply_pull_frequencies, parse_instances  # noqa: E402
+
+
+def test_coordinator_only_cluster_lowers_poll_interval():
+    config = {
+        "exporter": {
+            "pull_frequency_seconds": 10,
+            "follower_pull_frequency_seconds": 30,
+        },
+        "clusters": [
+            {
+                "name": "fast",
+                "pull_frequency_seconds": 2,
+                "instances": [
+                    {
+                        "name": "c1",
+                        "url": "http://127.0.0.1",
+                        "port": 1,
+                        "type": "coordinator",
+                    }
+                ],
+            }
+        ],
+    }
+    instances, _ = parse_instances(config)
+    general_config = GeneralConfig.from_dict(config["exporter"])
+
+    assert apply_pull_frequencies(instances, general_config, config["exporter"]) == 2
+    assert instances[0].pull_frequency_seconds == 2
+    assert instances[0].follower_pull_frequency_seconds == 30
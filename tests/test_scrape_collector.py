@@ -0,0 +1,40 @@
+import os
+import sys
+
+from prometheus_client import CollectorRegistry, Gauge
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from exposition import ExpositionCache  # noqa: E402
+from scrape_collector import register_scrape_collector  # noqa: E402
+
+
+def _sample(rendered, name):
+    return next(
+        sample.value
+        for family in rendered._families
+        for sample in family.samples
+        if sample.name == name
+    )
+
+
+def test_scrape_refreshes_before_metrics_ahead_of_the_collector():
+    registry = CollectorRegistry()
+    # Registered before the scrape collector, like memgraph_up.
+    up = Gauge("memgraph_up", "Up.", registry=registry)
+    value = Gauge("ActiveSessions", "Sessions.", registry=registry)
+    pulls = []
+
+    def pull():
+        pulls.append(None)
+        up.set(1)
+        value.set(len(pulls))
+
+    cache = ExpositionCache(registry, max_age_seconds=0)
+    register_scrape_collector(pull, [value], 60, registry, exposition_cache=cache)
+
+    rendered = cache.get()
+
+    assert len(pulls) == 1
+    assert _sample(rendered, "memgraph_up") == 1
+    assert _sample(rendered, "ActiveSessions") == 1
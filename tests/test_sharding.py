@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sharding import ShardConfig, jump_hash, shard_of  # noqa: E402
+
+NAMES = [
+    f"cluster_{cluster}/instance_{index}"
+    for cluster in range(20)
+    for index in range(50)
+]
+
+
+def test_assignment_is_stable_across_processes():
+    # Replicas are separate processes, so the assignment can't depend on Python's per-process string hashing.
+    expected = [shard_of(name, 7) for name in NAMES]
+    for seed in ("0", "1"):
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import sys; from sharding import shard_of; "
+                "print(','.join(str(shard_of(name, 7)) for name in sys.argv[1:]))",
+                *NAMES,
+            ],
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        assert [int(shard) for shard in output.split(",")] == expected
+    pinned = [shard_of(f"instance_{index}", 4) for index in range(8)]
+    assert pinned == [0, 2, 1, 0, 3, 2, 3, 2]
+
+
+def test_every_instance_is_owned_by_exactly_one_replica():
+    replicas = [ShardConfig(index, 5) for index in range(5)]
+    for name in NAMES:
+        assert sum(replica.owns(name) for replica in replicas) == 1
+
+
+def test_adding_a_replica_only_moves_instances_to_it():
+    for shard_count in range(1, 12):
+        before = [shard_of(name, shard_count) for name in NAMES]
+        after = [shard_of(name, shard_count + 1) for name in NAMES]
+        moved = [new for old, new in zip(before, after) if old != new]
+        assert set(moved) <= {shard_count}
+        # About 1/(n + 1) of the instances move.
+        expected = len(NAMES) / (shard_count + 1)
+        assert abs(len(moved) - expected) < 0.25 * expected
+
+
+def test_jump_hash_stays_in_range():
+    for key in range(1000):
+        assert jump_hash(key, 1) == 0
+        assert 0 <= jump_hash(key * 7919, 13) < 13
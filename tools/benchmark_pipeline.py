@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the exporter ingestion pipeline: JSON decoding, applying updates in standalone and
+HA mode, and rendering the exposition, for clusters of 1 to 1000 instances.
+
+Every suite runs in its own process, since the standalone and HA models register metrics with the
+same names. Results are written as JSON, and can be compared against an earlier run:
+
+    python3 tools/benchmark_pipeline.py --out bench.json
+    python3 tools/benchmark_pipeline.py --out new.json --compare bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from importlib import metadata
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+_REPO_DIR = Path(__file__).resolve().parent.parent
+_TOOLS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(_REPO_DIR))
+sys.path.insert(0, str(_TOOLS_DIR))
+
+from synthetic_payloads import (  # noqa: E402
+    COORDINATOR,
+    DATA_INSTANCE,
+    STANDALONE,
+    PayloadGenerator,
+    payload_keys,
+)
+
+SUITES = ("json", "standalone", "ha")
+DEFAULT_SIZES = (1, 10, 100, 1000)
+
+
+def _measure(fn: Callable[[], None], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return {
+        "median_seconds": statistics.median(timings),
+        "min_seconds": min(timings),
+        "repeat": repeat,
+    }
+
+
+def _result(name: str, params: Dict[str, int], timing: Dict[str, float]) -> dict:
+    return {"name": name, "params": params, **timing}
+
+
+def suite_json(repeat: int, sizes: Sequence[int]) -> List[dict]:
+    from json_decoder import JSON_DECODERS
+
+    results = []
+    for kind in (STANDALONE, DATA_INSTANCE, COORDINATOR):
+        payload = PayloadGenerator(kind, seed=1).step()
+        encoded = json.dumps(payload).encode("utf-8")
+        number = 1000
+
+        for decoder, loads in JSON_DECODERS.items():
+
+            def decode() -> None:
+                for _ in range(number):
+                    loads(encoded)
+
+            timing = _measure(decode, repeat)
+            timing = {k: v / number if k != "repeat" else v for k, v in timing.items()}
+            results.append(
+                _result(
+                    "json.decode",
+                    {
+                        "kind": kind,
+                        "decoder": decoder,
+                        "bytes": len(encoded),
+                        "keys": payload_keys(payload),
+                    },
+                    timing,
+                )
+            )
+    return results
+
+
+def suite_standalone(repeat: int, sizes: Sequence[int]) -> List[dict]:
+    import standalone_model
+
+    generator = PayloadGenerator(STANDALONE, seed=1)
+    payloads = [generator.step() for _ in range(repeat + 1)]
+    standalone_model.update_metrics(payloads[0])
+    remaining = iter(payloads[1:])
+
+    return [
+        _result(
+            "standalone.update_metrics",
+            {"keys": payload_keys(payloads[0])},
+            _measure(lambda: standalone_model.update_metrics(next(remaining)), repeat),
+        )
+    ]
+
+
+def suite_ha(repeat: int, sizes: Sequence[int]) -> List[dict]:
+    import ha_model
+    from prometheus_client import REGISTRY
+
+    from exposition import (
+        FORMAT_OPENMETRICS,
+        FORMAT_PROTOBUF,
+        ExpositionCache,
+        Rendered,
+    )
+    from ha_main import InstanceConfig
+
+    results = []
+    cache = ExpositionCache()
+    # Sizes run in ascending order and reuse instance names, so the registry holds exactly
+    # the instances of the current size.
+    for size in sorted(sizes):
+        instances = [
+            InstanceConfig(
+                name=f"instance{i}",
+                url="http://127.0.0.1",
+                port=7444,
+                type=COORDINATOR if i % 10 == 0 else DATA_INSTANCE,
+            )
+            for i in range(size)
+        ]
+        generators = [PayloadGenerator(i.type, seed=n) for n, i in enumerate(instances)]
+        cycles = [[g.step() for g in generators] for _ in range(repeat + 1)]
+        for instance, payload in zip(instances, cycles[0]):
+            ha_model.update_metrics(payload, instance)
+        remaining = iter(cycles[1:])
+
+        def update_cycle() -> None:
+            for instance, payload in zip(instances, next(remaining)):
+                ha_model.update_metrics(payload, instance)
+
+        params = {"instances": size}
+        results.append(
+            _result("ha.update_metrics", params, _measure(update_cycle, repeat))
+        )
+        results.append(
+            _result("render.text_gzip", params, _measure(cache.refresh, repeat))
+        )
+        families = list(REGISTRY.collect())
+        for fmt in (FORMAT_OPENMETRICS, FORMAT_PROTOBUF):
+
+            def render() -> None:
+                Rendered(families, time.time(), True).get(fmt, False)
+
+            results.append(_result(f"render.{fmt}", params, _measure(render, repeat)))
+    return results
+
+
+_SUITE_FUNCTIONS = {
+    "json": suite_json,
+    "standalone": suite_standalone,
+    "ha": suite_ha,
+}
+
+
+def _run_suite_in_subprocess(
+    suite: str, repeat: int, sizes: Sequence[int]
+) -> List[dict]:
+    output = subprocess.check_output(
+        [
+            sys.executable,
+            __file__,
+            "--suite",
+            suite,
+            "--repeat",
+            str(repeat),
+            "--sizes",
+            *[str(size) for size in sizes],
+        ]
+    )
+    return json.loads(output)
+
+
+def _metadata() -> dict:
+    try:
+        prometheus_client_version = metadata.version("prometheus-client")
+    except metadata.PackageNotFoundError:
+        prometheus_client_version = None
+    try:
+        revision = subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=_REPO_DIR,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        revision = None
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "prometheus_client": prometheus_client_version,
+    }
+
+
+def _key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{params}]"
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> bool:
+    """
+    Prints the change against the baseline and returns whether anything got slower than the threshold.
+    """
+    baseline_by_key = {_key(result): result for result in baseline}
+    regressed = False
+    for result in results:
+        key = _key(result)
+        before = baseline_by_key.get(key)
+        if before is None:
+            print(f"  {key:60s} new")
+            continue
+        ratio = result["median_seconds"] / before["median_seconds"]
+        marker = ""
+        if ratio > 1 + threshold:
+            marker = "  REGRESSION"
+            regressed = True
+        print(f"  {key:60s} {ratio:6.2f}x{marker}")
+    return regressed
+
+
+def _print_results(results: List[dict]) -> None:
+    for result in results:
+        print(f"  {_key(result):60s} {result['median_seconds'] * 1e3:10.3f} ms")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--suite", choices=SUITES, help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--suites",
+        nargs="+",
+        choices=SUITES,
+        default=list(SUITES),
+        help="Suites to run.",
+    )
+    parser.add_argument(
+        "--sizes",
+        nargs="+",
+        type=int,
+        default=list(DEFAULT_SIZES),
+        help="Numbers of HA instances to benchmark.",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Measurements per benchmark."
+    )
+    parser.add_argument("--out", help="Write the results to this JSON file.")
+    parser.add_argument(
+        "--compare", help="Compare the results with this earlier JSON file."
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="Relative slowdown reported as a regression when comparing, 0.2 is 20%%.",
+    )
+    args = parser.parse_args(argv)
+
+    logging.getLogger("prometheus_handler").setLevel(logging.CRITICAL)
+
+    if args.suite:
+        # Running a single suite on behalf of the parent process.
+        json.dump(_SUITE_FUNCTIONS[args.suite](args.repeat, args.sizes), sys.stdout)
+        return 0
+
+    results = []
+    for suite in args.suites:
+        results.extend(_run_suite_in_subprocess(suite, args.repeat, args.sizes))
+    print("Median time per operation:")
+    _print_results(results)
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"metadata": _metadata(), "results": results}, f, indent=2)
+            f.write("\n")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        print(f"Change against {args.compare}:")
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Measures how fast `python3 mg_exporter.py --type=HA` comes up against simulated Memgraph instances:
+the time until the HA modules are imported, until `/metrics` answers and until the first poll cycle
+finished, each from the start of the process. Exporter pods restart on every node drain, so this
+is how long Prometheus sees a gap:
+
+    python3 tools/benchmark_startup.py --data-instances 200 --runs 10 --budget-seconds 1
+
+With `--budget-seconds` the script exits with a non-zero code if the median time until `/metrics`
+answers is over the budget. Options not listed, such as `--latency-ms`, are passed on to the simulator.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import yaml
+
+_REPO_DIR = Path(__file__).resolve().parent.parent
+_TOOLS_DIR = Path(__file__).resolve().parent
+
+_FIRST_CYCLE = "Poll cycle for"
+
+
+def _wait_for_metrics(url: str, started: float, timeout: float) -> float:
+    deadline = started + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return time.monotonic() - started
+        except OSError:
+            time.sleep(0.01)
+    raise SystemExit(f"{url} didn't come up in {timeout}s")
+
+
+def measure_import() -> float:
+    started = time.monotonic()
+    subprocess.run([sys.executable, "-c", "import ha_main"], cwd=_REPO_DIR, check=True)
+    return time.monotonic() - started
+
+
+def measure_startup(config_file: str, port: int, timeout: float) -> Dict[str, float]:
+    started = time.monotonic()
+    exporter = subprocess.Popen(
+        [
+            sys.executable,
+            str(_REPO_DIR / "mg_exporter.py"),
+            "--type=HA",
+            f"--config-file={config_file}",
+        ],
+        cwd=_REPO_DIR,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+    first_cycle = threading.Event()
+    first_cycle_seconds: List[float] = []
+
+    def read_log() -> None:
+        for line in exporter.stderr:
+            if _FIRST_CYCLE in line and not first_cycle.is_set():
+                first_cycle_seconds.append(time.monotonic() - started)
+                first_cycle.set()
+
+    threading.Thread(target=read_log, daemon=True).start()
+    try:
+        serving = _wait_for_metrics(
+            f"http://127.0.0.1:{port}/metrics", started, timeout
+        )
+        if not first_cycle.wait(timeout):
+            raise SystemExit(f"No poll cycle finished in {timeout}s")
+        return {"serving": serving, "first_poll": first_cycle_seconds[0]}
+    finally:
+        exporter.terminate()
+        try:
+            exporter.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            exporter.kill()
+
+
+def _summary(values: Sequence[float]) -> Dict[str, float]:
+    return {
+        "p50": statistics.median(values),
+        "min": min(values),
+        "max": max(values),
+    }
+
+
+def run(args: argparse.Namespace, simulator_args: List[str]) -> dict:
+    config_file = tempfile.NamedTemporaryFile(suffix=".yaml", delete=False).name
+    simulator = subprocess.Popen(
+        [
+            sys.executable,
+            str(_TOOLS_DIR / "memgraph_simulator.py"),
+            "--base-port",
+            str(args.base_port),
+            "--coordinators",
+            str(args.coordinators),
+            "--data-instances",
+            str(args.data_instances),
+            "--write-config",
+            config_file,
+            "--exporter-port",
+            str(args.exporter_port),
+            *simulator_args,
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        # The simulator writes the configuration before it prints its first line.
+        print(simulator.stdout.readline().strip())
+        if args.collection_workers:
+            with open(config_file, encoding="utf-8") as f:
+                config = yaml.safe_load(f)
+            config["exporter"]["collection_workers"] = args.collection_workers
+            with open(config_file, "w", encoding="utf-8") as f:
+                yaml.safe_dump(config, f, sort_keys=False)
+        imports = [measure_import() for _ in range(args.runs)]
+        startups = [
+            measure_startup(config_file, args.exporter_port, args.timeout)
+            for _ in range(args.runs)
+        ]
+        return {
+            "instances": args.coordinators + args.data_instances,
+            "runs": args.runs,
+            "collection_workers": args.collection_workers,
+            "import_seconds": _summary(imports),
+            "serving_seconds": _summary([s["serving"] for s in startups]),
+            "first_poll_seconds": _summary([s["first_poll"] for s in startups]),
+        }
+    finally:
+        simulator.terminate()
+        try:
+            simulator.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            simulator.kill()
+        os.unlink(config_file)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--coordinators", type=int, default=3)
+    parser.add_argument("--data-instances", type=int, default=100)
+    parser.add_argument("--base-port", type=int, default=20000)
+    parser.add_argument("--exporter-port", type=int, default=19115)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--timeout", type=float, default=60, help="Seconds to wait for each step."
+    )
+    parser.add_argument(
+        "--collection-workers",
+        type=int,
+        default=0,
+        help="Worker processes of the exporter, none if 0.",
+    )
+    parser.add_argument(
+        "--budget-seconds",
+        type=float,
+        help="Fail if the median time until /metrics answers is over this.",
+    )
+    parser.add_argument("--out", help="Write the report to this JSON file.")
+    args, simulator_args = parser.parse_known_args(argv)
+
+    report = run(args, simulator_args)
+
+    print(f"{report['instances']} instances, {args.runs} runs (p50 / min / max)")
+    for name, key in (
+        ("import", "import_seconds"),
+        ("serving", "serving_seconds"),
+        ("first poll", "first_poll_seconds"),
+    ):
+        summary = report[key]
+        print(
+            f"  {name + ':':12s} {summary['p50']:.3f}s / {summary['min']:.3f}s / {summary['max']:.3f}s"
+        )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+    if (
+        args.budget_seconds is not None
+        and report["serving_seconds"]["p50"] > args.budget_seconds
+    ):
+        print(f"Startup is over the budget of {args.budget_seconds:.3f}s")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
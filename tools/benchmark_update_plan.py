@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark comparing the per-section safe_execute/partial update chain with compiled update plans.
+
+Every simulated instance receives a data instance payload of `--keys` metrics (known metrics padded
+with metrics the exporter doesn't export), and the CPU time of one poll cycle over all instances is reported.
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+import time
+from functools import partial
+from pathlib import Path
+
+_REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_REPO_DIR))
+
+import ha_model  # noqa: E402
+from ha_main import InstanceConfig  # noqa: E402
+
+
+def _legacy_safe_execute(func):
+    try:
+        func()
+    except Exception:
+        pass
+
+
+def _legacy_update_gauges(mg_data, prom_data, instance_name):
+    for key, value in mg_data.items():
+        if key not in prom_data:
+            continue
+        prom_data[key].labels(instance_name=instance_name).set(value)
+
+
+def _legacy_update(mg_data, instance_name):
+    # The update path before compiled plans: one partial and one safe_execute per section on every pull.
+    for section, prom_data in ha_model.DATA_INSTANCE_SECTIONS:
+        _legacy_safe_execute(
+            partial(_legacy_update_gauges, mg_data[section], prom_data, instance_name)
+        )
+
+
+def build_payload(num_keys: int) -> dict:
+    payload = {}
+    for section, prom_data in ha_model.DATA_INSTANCE_SECTIONS:
+        values = payload.setdefault(section, {})
+        for i, key in enumerate(prom_data):
+            values[key] = i
+    for section, collector in ha_model.DATA_INSTANCE_COUNTER_SECTIONS:
+        values = payload.setdefault(section, {})
+        for i, key in enumerate(collector.keys()):
+            values[key] = i
+    total = sum(len(values) for values in payload.values())
+    extra = 0
+    while total < num_keys:
+        payload["Operator"][f"UnexportedOperator{extra}"] = extra
+        extra += 1
+        total += 1
+    return payload
+
+
+def _changed_payload(payload: dict) -> dict:
+    return {
+        section: {key: value + 1 for key, value in values.items()}
+        for section, values in payload.items()
+    }
+
+
+def _cycle_cpu_seconds(update, instances, payloads, cycles: int) -> float:
+    started = time.process_time()
+    for cycle in range(cycles):
+        payload = payloads[cycle % len(payloads)]
+        for instance in instances:
+            update(payload, instance)
+    return (time.process_time() - started) / cycles
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, default=300, help="Metrics per payload.")
+    parser.add_argument(
+        "--instances", type=int, default=100, help="Number of instances."
+    )
+    parser.add_argument("--cycles", type=int, default=20, help="Measured poll cycles.")
+    args = parser.parse_args()
+
+    # Errors are expected for sections whose metrics can't be labeled, don't let logging skew the numbers.
+    logging.getLogger("prometheus_handler").setLevel(logging.CRITICAL)
+
+    payload = build_payload(args.keys)
+    instances = [
+        InstanceConfig(f"data{i}", "http://127.0.0.1", 7444, "data_instance")
+        for i in range(args.instances)
+    ]
+    for instance in instances:
+        ha_model.compile_instance_update_plan(instance)
+
+    # Values change on every cycle unless they are unchanged on purpose.
+    changing = [payload, _changed_payload(payload)]
+    unchanged = [payload]
+
+    # Warm up so both variants update already existing labeled children.
+    _cycle_cpu_seconds(ha_model.update_metrics, instances, changing, 1)
+
+    before = _cycle_cpu_seconds(
+        lambda data, instance: _legacy_update(data, instance.name),
+        instances,
+        changing,
+        args.cycles,
+    )
+    after = _cycle_cpu_seconds(
+        ha_model.update_metrics, instances, changing, args.cycles
+    )
+    after_unchanged = _cycle_cpu_seconds(
+        ha_model.update_metrics, instances, unchanged, args.cycles
+    )
+
+    print(
+        f"{args.keys} keys x {args.instances} instances, {args.cycles} cycles\n"
+        f"  safe_execute/partial:                  {before * 1e3:8.2f} ms CPU per cycle\n"
+        f"  compiled update plan:                  {after * 1e3:8.2f} ms CPU per cycle\n"
+        f"  compiled update plan, unchanged values: {after_unchanged * 1e3:7.2f} ms CPU per cycle\n"
+        f"  speedup:                               {before / after:8.2f}x"
+    )
+
+
+if __name__ == "__main__":
+    main()
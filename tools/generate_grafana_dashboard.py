@@ -12,44 +12,73 @@ import re
 import sys
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Tuple, Union
+from typing import Dict, List, Optional, Sequence, Tuple
 
 # Allow running this script from the repo root by adding the Prometheus exporter
 # package path (which contains the `metrics/` module) to PYTHONPATH.
 _REPO_DIR = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(_REPO_DIR))
 
-from metrics.general_metrics import general_data
-from metrics.ha_metrics import (
-    ha_coordinator_metrics,
-    ha_coordinators_agg_metrics,
-    ha_data_instances_counter_metrics,
-    ha_data_instances_metrics,
+from metrics.catalog import (
+    CATALOG,
+    COUNTER,
+    GAUGE_TYPES,
+    QUANTILE,
+    ROLE_COORDINATOR,
+    ROLE_DATA_INSTANCE,
+    MetricDefinition,
+    definitions,
 )
-from metrics.index_metrics import index_data
-from metrics.operator_metrics import operator_data
-from metrics.query_metrics import query_data
-from metrics.query_type_metrics import query_type_data
-from metrics.session_metrics import session_data
-from metrics.snapshot_metrics import snapshot_data
-from metrics.stream_metrics import stream_data
-from metrics.transaction_metrics import txn_data
-from metrics.trigger_metrics import trigger_data
-from metrics.ttl_metrics import ttl_data
-
-
-MetricDef = Union[str, Tuple[str, str]]
 
 
 @dataclass(frozen=True)
 class MetricGroup:
     title: str
-    metrics: Sequence[MetricDef]
-    # "gauge" metrics are queried directly; "counter" metrics are queried via rate(<name>_total[]).
-    kind: str = "gauge"  # "gauge" | "counter"
+    # Gauges and quantiles are queried directly; counters are queried via rate(<name>_total[]).
+    metrics: Sequence[MetricDefinition]
     legend_format: str = "__auto"
 
 
+# Rows of the dashboard: title, catalog section, role whose metrics are shown (all if None) and metric types.
+ROWS: List[Tuple[str, str, Optional[str], Sequence[str]]] = [
+    ("General metrics", "General", None, GAUGE_TYPES),
+    ("Index metrics", "Index", None, GAUGE_TYPES),
+    ("Operator metrics", "Operator", None, GAUGE_TYPES),
+    ("Query metrics", "Query", None, GAUGE_TYPES),
+    ("Query type metrics", "QueryType", None, GAUGE_TYPES),
+    ("Session metrics", "Session", None, GAUGE_TYPES),
+    ("Snapshot metrics", "Snapshot", None, GAUGE_TYPES),
+    ("Stream metrics", "Stream", None, GAUGE_TYPES),
+    ("Transaction metrics", "Transaction", None, GAUGE_TYPES),
+    ("Trigger metrics", "Trigger", None, GAUGE_TYPES),
+    ("TTL metrics", "TTL", None, GAUGE_TYPES),
+    (
+        "HA data instances — latency (p50/p90/p99)",
+        "HighAvailability",
+        ROLE_DATA_INSTANCE,
+        GAUGE_TYPES,
+    ),
+    (
+        "HA data instances — counters (rate/s)",
+        "HighAvailability",
+        ROLE_DATA_INSTANCE,
+        (COUNTER,),
+    ),
+    (
+        "HA coordinators — latency (p50/p90/p99)",
+        "HighAvailability",
+        ROLE_COORDINATOR,
+        GAUGE_TYPES,
+    ),
+    (
+        "HA coordinators — counters (rate/s)",
+        "HighAvailability",
+        ROLE_COORDINATOR,
+        (COUNTER,),
+    ),
+]
+
+
 _LATENCY_RE = re.compile(r"^(?P<base>.+)_us_(?P<pct>\d+)p$")
 
 # Legend support that works for both HA and standalone:
@@ -67,14 +96,6 @@ PANEL_W = 24 // PANEL_COLS  # 6
 PANEL_H = 8
 
 
-def _metric_name(m: MetricDef) -> str:
-    return m if isinstance(m, str) else m[0]
-
-
-def _metric_desc(m: MetricDef) -> str:
-    return "" if isinstance(m, str) else (m[1] or "")
-
-
 def _split_camel(s: str) -> str:
     s = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", s)
     s = re.sub(r"([A-Z]+)([A-Z][a-z])", r"\1 \2", s)
@@ -116,46 +137,21 @@ def _nice_title_for_metric(name: str) -> str:
 
 
 def _build_title_map() -> Dict[str, str]:
-    metric_names: List[str] = []
-
-    def add_metrics(ms: Sequence[MetricDef]) -> None:
-        for m in ms:
-            metric_names.append(_metric_name(m))
-
-    add_metrics(general_data)
-    add_metrics(index_data)
-    add_metrics(query_data)
-    add_metrics(query_type_data)
-    add_metrics(session_data)
-    add_metrics(snapshot_data)
-    add_metrics(stream_data)
-    add_metrics(txn_data)
-    add_metrics(trigger_data)
-    add_metrics(ttl_data)
-    metric_names.extend(list(operator_data))
-    add_metrics(ha_data_instances_metrics)
-    add_metrics(ha_data_instances_counter_metrics)
-    add_metrics(ha_coordinator_metrics)
-    add_metrics(ha_coordinators_agg_metrics)
-
-    out: Dict[str, str] = {}
-    for name in metric_names:
-        out[name] = _nice_title_for_metric(name)
-    return out
+    return {
+        definition.name: _nice_title_for_metric(definition.name)
+        for definition in CATALOG
+    }
 
 
 TITLE_MAP: Dict[str, str] = _build_title_map()
 
 
-def _infer_unit(name: str) -> Optional[str]:
-    if _LATENCY_RE.match(name):
-        return "s"
+# Grafana units by catalog unit. Latencies in microseconds are shown in seconds.
+_GRAFANA_UNITS = {"microseconds": "s", "bytes": "bytes"}
 
-    lower = name.lower()
-    if "memory_usage" in lower or "disk_usage" in lower:
-        return "bytes"
 
-    return "sishort"
+def _grafana_unit(definition: MetricDefinition) -> Optional[str]:
+    return _GRAFANA_UNITS.get(definition.unit, "sishort")
 
 
 def _row_panel(*, panel_id: int, title: str, y: int) -> dict:
@@ -315,13 +311,14 @@ def _with_mg_instance(expr: str, *, fallback: str) -> str:
     return out
 
 
-def _prom_expr_for_metric(*, name: str, kind: str) -> str:
+def _prom_expr_for_metric(definition: MetricDefinition) -> str:
+    name = definition.name
     selector = '{job=~"$job", instance=~"$instance"}'
 
-    if _LATENCY_RE.match(name):
+    if definition.type == QUANTILE and definition.unit == "microseconds":
         return f"({name}{selector}) / 1e6"
 
-    if kind == "counter":
+    if definition.type == COUNTER:
         return f'rate({name}_total{selector}[$__rate_interval])'
 
     return f"{name}{selector}"
@@ -343,24 +340,21 @@ def build_dashboard(
 
         i = 0
         line_y = y
-        for m in group.metrics:
+        for definition in group.metrics:
             x = (i % PANEL_COLS) * PANEL_W
             if i > 0 and i % PANEL_COLS == 0:
                 line_y += PANEL_H
 
-            metric = _metric_name(m)
-            desc = _metric_desc(m)
-
-            expr = _prom_expr_for_metric(name=metric, kind=group.kind)
+            expr = _prom_expr_for_metric(definition)
             expr = _with_mg_instance(expr, fallback=mg_instance_fallback)
-            unit = _infer_unit(metric)
-            title = TITLE_MAP.get(metric, metric)
+            unit = _grafana_unit(definition)
+            title = TITLE_MAP.get(definition.name, definition.name)
 
             panels.append(
                 _timeseries_panel(
                     panel_id=panel_id,
                     title=title,
-                    description=desc,
+                    description=definition.description or "",
                     expr=expr,
                     y=line_y,
                     x=x,
@@ -426,41 +420,16 @@ def main() -> None:
     args = parser.parse_args()
 
     groups: List[MetricGroup] = [
-        MetricGroup("General metrics", general_data, legend_format=LEGEND),
-        MetricGroup("Index metrics", index_data, legend_format=LEGEND),
-        MetricGroup("Operator metrics", operator_data, legend_format=LEGEND),
-        MetricGroup("Query metrics", query_data, legend_format=LEGEND),
-        MetricGroup("Query type metrics", query_type_data, legend_format=LEGEND),
-        MetricGroup("Session metrics", session_data, legend_format=LEGEND),
-        MetricGroup("Snapshot metrics", snapshot_data, legend_format=LEGEND),
-        MetricGroup("Stream metrics", stream_data, legend_format=LEGEND),
-        MetricGroup("Transaction metrics", txn_data, legend_format=LEGEND),
-        MetricGroup("Trigger metrics", trigger_data, legend_format=LEGEND),
-        MetricGroup("TTL metrics", ttl_data, legend_format=LEGEND),
-        MetricGroup(
-            "HA data instances — latency (p50/p90/p99)",
-            ha_data_instances_metrics,
-            kind="gauge",
-            legend_format=LEGEND,
-        ),
         MetricGroup(
-            "HA data instances — counters (rate/s)",
-            ha_data_instances_counter_metrics,
-            kind="counter",
+            title,
+            [
+                definition
+                for definition in definitions(role, types)
+                if definition.section == section
+            ],
             legend_format=LEGEND,
-        ),
-        MetricGroup(
-            "HA coordinators — latency (p50/p90/p99)",
-            ha_coordinator_metrics,
-            kind="gauge",
-            legend_format=LEGEND,
-        ),
-        MetricGroup(
-            "HA coordinators — aggregate counters (rate/s)",
-            ha_coordinators_agg_metrics,
-            kind="counter",
-            legend_format=LEGEND,
-        ),
+        )
+        for title, section, role, types in ROWS
     ]
 
     dashboard = build_dashboard(
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test of the HA exporter against simulated Memgraph instances.
+
+Starts `tools/memgraph_simulator.py` and `mg_exporter.py --type=HA` pointed at it, hits `/metrics`
+from concurrent scrapers for a while and reports poll cycle durations (from the exporter log),
+scrape latencies, and the exporter CPU usage and RSS (from /proc, so Linux only):
+
+    python3 tools/load_harness.py --data-instances 200 --scrapers 4 --duration 60
+
+Options not listed below, such as `--latency-ms`, `--error-rate` or `--hang-rate`, are passed on
+to the simulator.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import yaml
+
+_REPO_DIR = Path(__file__).resolve().parent.parent
+_TOOLS_DIR = Path(__file__).resolve().parent
+
+_CYCLE_RE = re.compile(r"Poll cycle for \d+ instances finished in (?P<seconds>[\d.]+)s")
+
+ACCEPT_HEADERS = {
+    "text": "text/plain;version=0.0.4",
+    "openmetrics": "application/openmetrics-text;version=1.0.0",
+    "protobuf": "application/vnd.google.protobuf;proto=io.prometheus.client.MetricFamily;encoding=delimited",
+}
+
+
+def _percentile(values: Sequence[float], percentile: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _summary(values: Sequence[float]) -> Dict[str, Optional[float]]:
+    return {
+        "count": len(values),
+        "p50": _percentile(values, 50),
+        "p99": _percentile(values, 99),
+        "max": max(values) if values else None,
+    }
+
+
+def _stat_fields(pid: int) -> List[str]:
+    with open(f"/proc/{pid}/stat") as f:
+        # The process name can contain spaces, fields are counted after its closing parenthesis.
+        return f.read().rsplit(")", 1)[1].split()
+
+
+class ProcessSampler(threading.Thread):
+    """
+    Samples the CPU time and RSS of a process and its child processes, such as collection
+    workers, once per interval.
+    """
+
+    def __init__(self, pid: int, interval: float = 1.0) -> None:
+        super().__init__(daemon=True)
+        self._pid = pid
+        self._interval = interval
+        self._stop_event = threading.Event()
+        self._clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.rss_bytes: List[int] = []
+        self.cpu_seconds: List[float] = []
+        self.wall_seconds: List[float] = []
+
+    def _children(self) -> List[int]:
+        children = []
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                if int(_stat_fields(int(entry))[1]) == self._pid:
+                    children.append(int(entry))
+            except OSError:
+                continue
+        return children
+
+    def _read(self) -> None:
+        cpu_ticks = 0
+        rss_bytes = 0
+        for i, pid in enumerate([self._pid, *self._children()]):
+            try:
+                fields = _stat_fields(pid)
+                with open(f"/proc/{pid}/status") as f:
+                    status = f.read()
+            except OSError:
+                if i == 0:
+                    raise
+                # The child exited in the meantime.
+                continue
+            cpu_ticks += int(fields[11]) + int(fields[12])
+            for line in status.splitlines():
+                if line.startswith("VmRSS:"):
+                    rss_bytes += int(line.split()[1]) * 1024
+                    break
+        self.cpu_seconds.append(cpu_ticks / self._clock_ticks)
+        self.rss_bytes.append(rss_bytes)
+        self.wall_seconds.append(time.monotonic())
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self._interval):
+            try:
+                self._read()
+            except OSError:
+                return
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+    def report(self) -> Dict[str, Optional[float]]:
+        if len(self.cpu_seconds) < 2:
+            return {"cpu_percent": None, "rss_max_bytes": None, "rss_last_bytes": None}
+        cpu = self.cpu_seconds[-1] - self.cpu_seconds[0]
+        wall = self.wall_seconds[-1] - self.wall_seconds[0]
+        return {
+            "cpu_percent": 100 * cpu / wall,
+            "rss_max_bytes": max(self.rss_bytes),
+            "rss_last_bytes": self.rss_bytes[-1],
+        }
+
+
+class Scraper(threading.Thread):
+    def __init__(
+        self, url: str, accept: str, gzip: bool, deadline: float, interval: float
+    ) -> None:
+        super().__init__(daemon=True)
+        self._url = url
+        self._headers = {"Accept": accept}
+        if gzip:
+            self._headers["Accept-Encoding"] = "gzip"
+        self._deadline = deadline
+        self._interval = interval
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.bytes = 0
+
+    def run(self) -> None:
+        while time.monotonic() < self._deadline:
+            started = time.monotonic()
+            try:
+                request = urllib.request.Request(self._url, headers=self._headers)
+                with urllib.request.urlopen(request, timeout=30) as response:
+                    self.bytes += len(response.read())
+                self.latencies.append(time.monotonic() - started)
+            except OSError:
+                self.errors += 1
+            remaining = self._interval - (time.monotonic() - started)
+            if remaining > 0:
+                time.sleep(remaining)
+
+
+def _wait_for_port(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise SystemExit(f"{url} didn't come up in {timeout}s")
+
+
+def run(args: argparse.Namespace, simulator_args: List[str]) -> dict:
+    config_file = tempfile.NamedTemporaryFile(suffix=".yaml", delete=False).name
+    simulator = subprocess.Popen(
+        [
+            sys.executable,
+            str(_TOOLS_DIR / "memgraph_simulator.py"),
+            "--base-port",
+            str(args.base_port),
+            "--coordinators",
+            str(args.coordinators),
+            "--data-instances",
+            str(args.data_instances),
+            "--write-config",
+            config_file,
+            "--exporter-port",
+            str(args.exporter_port),
+            "--pull-frequency-seconds",
+            str(args.pull_frequency_seconds),
+            *simulator_args,
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    exporter = None
+    try:
+        # The simulator writes the configuration before it prints its first line.
+        print(simulator.stdout.readline().strip())
+        if args.collection_workers:
+            with open(config_file, encoding="utf-8") as f:
+                config = yaml.safe_load(f)
+            config["exporter"]["collection_workers"] = args.collection_workers
+            with open(config_file, "w", encoding="utf-8") as f:
+                yaml.safe_dump(config, f, sort_keys=False)
+        exporter = subprocess.Popen(
+            [
+                sys.executable,
+                str(_REPO_DIR / "mg_exporter.py"),
+                "--type=HA",
+                f"--config-file={config_file}",
+            ],
+            cwd=_REPO_DIR,
+            stderr=subprocess.PIPE,
+            text=True,
+        )
+        cycles: List[float] = []
+
+        def read_log() -> None:
+            for line in exporter.stderr:
+                match = _CYCLE_RE.search(line)
+                if match:
+                    cycles.append(float(match.group("seconds")))
+
+        threading.Thread(target=read_log, daemon=True).start()
+
+        url = f"http://127.0.0.1:{args.exporter_port}/metrics"
+        _wait_for_port(url, timeout=30)
+        if args.warmup > 0:
+            time.sleep(args.warmup)
+        del cycles[:]
+
+        sampler = ProcessSampler(exporter.pid)
+        sampler.start()
+        deadline = time.monotonic() + args.duration
+        scrapers = [
+            Scraper(
+                url,
+                ACCEPT_HEADERS[args.format],
+                args.gzip,
+                deadline,
+                args.scrape_interval,
+            )
+            for _ in range(args.scrapers)
+        ]
+        for scraper in scrapers:
+            scraper.start()
+        for scraper in scrapers:
+            scraper.join()
+        sampler.stop()
+
+        latencies = [latency for scraper in scrapers for latency in scraper.latencies]
+        return {
+            "instances": args.coordinators + args.data_instances,
+            "duration_seconds": args.duration,
+            "pull_frequency_seconds": args.pull_frequency_seconds,
+            "collection_workers": args.collection_workers,
+            "poll_cycle_seconds": _summary(cycles),
+            "scrape_seconds": _summary(latencies),
+            "scrape_errors": sum(scraper.errors for scraper in scrapers),
+            "scrape_mean_bytes": (
+                statistics.mean(
+                    scraper.bytes / max(1, len(scraper.latencies))
+                    for scraper in scrapers
+                )
+            ),
+            "exporter": sampler.report(),
+        }
+    finally:
+        for process in (exporter, simulator):
+            if process is not None:
+                process.terminate()
+                try:
+                    process.wait(timeout=10)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+        os.unlink(config_file)
+
+
+def _format(value: Optional[float], scale: float = 1.0, unit: str = "") -> str:
+    return "n/a" if value is None else f"{value * scale:.2f}{unit}"
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--coordinators", type=int, default=3)
+    parser.add_argument("--data-instances", type=int, default=100)
+    parser.add_argument("--base-port", type=int, default=20000)
+    parser.add_argument("--exporter-port", type=int, default=19115)
+    parser.add_argument("--pull-frequency-seconds", type=int, default=5)
+    parser.add_argument(
+        "--duration", type=float, default=30.0, help="Seconds of scraping."
+    )
+    parser.add_argument(
+        "--warmup", type=float, default=5.0, help="Seconds before measuring."
+    )
+    parser.add_argument("--scrapers", type=int, default=2, help="Concurrent scrapers.")
+    parser.add_argument(
+        "--scrape-interval",
+        type=float,
+        default=1.0,
+        help="Seconds between scrapes of a scraper.",
+    )
+    parser.add_argument("--format", choices=sorted(ACCEPT_HEADERS), default="text")
+    parser.add_argument(
+        "--gzip", action="store_true", help="Ask for gzip-compressed scrapes."
+    )
+    parser.add_argument(
+        "--collection-workers",
+        type=int,
+        default=0,
+        help="Worker processes of the exporter, none if 0.",
+    )
+    parser.add_argument("--out", help="Write the report to this JSON file.")
+    args, simulator_args = parser.parse_known_args(argv)
+
+    report = run(args, simulator_args)
+
+    cycle = report["poll_cycle_seconds"]
+    scrape = report["scrape_seconds"]
+    exporter = report["exporter"]
+    print(
+        f"{report['instances']} instances, {args.scrapers} scrapers for {args.duration:.0f}s\n"
+        f"  poll cycle:  p50 {_format(cycle['p50'], unit='s')}, p99 {_format(cycle['p99'], unit='s')}, "
+        f"max {_format(cycle['max'], unit='s')} over {cycle['count']} cycles "
+        f"(interval {args.pull_frequency_seconds}s)\n"
+        f"  scrape:      p50 {_format(scrape['p50'], 1e3, 'ms')}, p99 {_format(scrape['p99'], 1e3, 'ms')}, "
+        f"{scrape['count']} scrapes, {report['scrape_errors']} errors, "
+        f"{report['scrape_mean_bytes'] / 1024:.0f} KiB each\n"
+        f"  exporter:    CPU {_format(exporter['cpu_percent'], unit='%')}, "
+        f"RSS max {_format(exporter['rss_max_bytes'], 1 / 2**20, ' MiB')}"
+    )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
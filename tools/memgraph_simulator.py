@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Simulates the monitoring HTTP endpoints of many Memgraph instances, for testing the exporter at scale.
+
+Every simulated instance listens on its own local port and serves evolving JSON shaped like a
+coordinator or a data instance. Responses can be delayed, fail or hang, and instances can restart,
+which resets their counters. A matching HA exporter configuration can be written with `--write-config`:
+
+    python3 tools/memgraph_simulator.py --coordinators 3 --data-instances 200 --write-config /tmp/ha.yaml
+    python3 mg_exporter.py --type=HA --config-file=/tmp/ha.yaml
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence
+
+import yaml
+
+_TOOLS_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(_TOOLS_DIR))
+
+from synthetic_payloads import (  # noqa: E402
+    COORDINATOR,
+    DATA_INSTANCE,
+    PayloadGenerator,
+)
+
+
+class SimulatedInstance:
+    def __init__(
+        self, name: str, kind: str, port: int, args: argparse.Namespace, seed: int
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.port = port
+        self._args = args
+        self._rng = random.Random(seed)
+        self._generator = PayloadGenerator(
+            kind, seed=seed, extra_keys=args.extra_keys, change_ratio=args.change_ratio
+        )
+        self._body = b""
+        self._stepped_at = 0.0
+
+    def elect(self) -> None:
+        self._generator.elect()
+        self._body = b""
+
+    def body(self) -> bytes:
+        now = time.monotonic()
+        if not self._body or now - self._stepped_at >= self._args.step_seconds:
+            if self._rng.random() < self._args.restart_rate:
+                self._generator.restart()
+            self._body = json.dumps(self._generator.step()).encode("utf-8")
+            self._stepped_at = now
+        return self._body
+
+    async def handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request = await reader.readuntil(b"\r\n\r\n")
+                if not request:
+                    break
+                if not await self._respond(writer):
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer: asyncio.StreamWriter) -> bool:
+        args = self._args
+        rng = self._rng
+        if rng.random() < args.hang_rate:
+            # Never answer, the client has to give up on its own.
+            await asyncio.sleep(args.hang_seconds)
+            return False
+        delay = (
+            max(0.0, args.latency_ms + rng.uniform(-args.jitter_ms, args.jitter_ms))
+            / 1000
+        )
+        if delay:
+            await asyncio.sleep(delay)
+        if rng.random() < args.error_rate:
+            status = b"500 Internal Server Error"
+            body = b"simulated error"
+        else:
+            status = b"200 OK"
+            body = self.body()
+        writer.write(
+            b"HTTP/1.1 " + status + b"\r\n"
+            b"Content-Type: application/json\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n"
+            b"Connection: keep-alive\r\n\r\n" + body
+        )
+        await writer.drain()
+        return True
+
+
+def build_instances(args: argparse.Namespace) -> List[SimulatedInstance]:
+    instances = []
+    port = args.base_port
+    for i in range(args.coordinators):
+        instances.append(
+            SimulatedInstance(f"coord{i + 1}", COORDINATOR, port, args, seed=port)
+        )
+        port += 1
+    for i in range(args.data_instances):
+        instances.append(
+            SimulatedInstance(f"data{i + 1}", DATA_INSTANCE, port, args, seed=port)
+        )
+        port += 1
+    return instances
+
+
+def write_exporter_config(
+    path: str,
+    instances: Sequence[SimulatedInstance],
+    host: str,
+    exporter_port: int,
+    pull_frequency_seconds: int,
+) -> None:
+    config = {
+        "exporter": {
+            "port": exporter_port,
+            "pull_frequency_seconds": pull_frequency_seconds,
+        },
+        "instances": [
+            {"name": i.name, "url": f"http://{host}", "port": i.port, "type": i.kind}
+            for i in instances
+        ],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(config, f, sort_keys=False)
+
+
+async def rotate_leader(
+    coordinators: Sequence[SimulatedInstance], leader_change_seconds: float
+) -> None:
+    """
+    Elects the first coordinator, then hands leadership to the next one every
+    `leader_change_seconds`, if set.
+    """
+    leader = 0
+    coordinators[leader].elect()
+    while leader_change_seconds > 0:
+        await asyncio.sleep(leader_change_seconds)
+        leader = (leader + 1) % len(coordinators)
+        coordinators[leader].elect()
+        print(f"{coordinators[leader].name} became leader", flush=True)
+
+
+async def serve(
+    instances: Sequence[SimulatedInstance], host: str, leader_change_seconds: float
+) -> None:
+    servers = [await asyncio.start_server(i.handle, host, i.port) for i in instances]
+    print(
+        f"Simulating {len(instances)} Memgraph instances on ports "
+        f"{instances[0].port}-{instances[-1].port}",
+        flush=True,
+    )
+    tasks = [server.serve_forever() for server in servers]
+    coordinators = [i for i in instances if i.kind == COORDINATOR]
+    if coordinators:
+        tasks.append(rotate_leader(coordinators, leader_change_seconds))
+    await asyncio.gather(*tasks)
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--base-port", type=int, default=20000, help="Port of the first instance."
+    )
+    parser.add_argument("--coordinators", type=int, default=3)
+    parser.add_argument("--data-instances", type=int, default=2)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Mean response delay."
+    )
+    parser.add_argument(
+        "--jitter-ms", type=float, default=0.0, help="Uniform jitter around the delay."
+    )
+    parser.add_argument(
+        "--error-rate", type=float, default=0.0, help="Share of HTTP 500 responses."
+    )
+    parser.add_argument(
+        "--hang-rate", type=float, default=0.0, help="Share of requests never answered."
+    )
+    parser.add_argument(
+        "--hang-seconds",
+        type=float,
+        default=3600.0,
+        help="How long hung requests are held.",
+    )
+    parser.add_argument(
+        "--restart-rate", type=float, default=0.0, help="Chance of a restart per step."
+    )
+    parser.add_argument(
+        "--step-seconds", type=float, default=1.0, help="How often the values change."
+    )
+    parser.add_argument(
+        "--change-ratio",
+        type=float,
+        default=1.0,
+        help="Share of values changing per step.",
+    )
+    parser.add_argument(
+        "--extra-keys",
+        type=int,
+        default=0,
+        help="Unknown metrics added to every payload.",
+    )
+    parser.add_argument(
+        "--leader-change-seconds",
+        type=float,
+        default=0.0,
+        help="Hand leadership to the next coordinator this often, never if 0.",
+    )
+    parser.add_argument(
+        "--write-config",
+        help="Write an HA exporter configuration for the instances here.",
+    )
+    parser.add_argument("--exporter-port", type=int, default=9115)
+    parser.add_argument("--pull-frequency-seconds", type=int, default=5)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    args = parse_args(argv)
+    instances = build_instances(args)
+    if not instances:
+        raise SystemExit("Nothing to simulate, add coordinators or data instances.")
+    if args.write_config:
+        write_exporter_config(
+            args.write_config,
+            instances,
+            args.host,
+            args.exporter_port,
+            args.pull_frequency_seconds,
+        )
+    try:
+        asyncio.run(serve(instances, args.host, args.leader_change_seconds))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Synthetic Memgraph monitoring payloads, shaped like the JSON the exporter reads.
+
+Payloads are generated from the catalog in `metrics/catalog.py`, so they contain every metric the
+exporter knows about, in the sections `standalone_model` and `ha_model` read them from.
+Counters grow between steps, latencies and other gauges move around.
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+from pathlib import Path
+from typing import Dict, Optional
+
+_REPO_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(_REPO_DIR))
+
+from metrics.catalog import QUANTILE, definitions  # noqa: E402
+
+Payload = Dict[str, Dict[str, float]]
+
+COORDINATOR = "coordinator"
+DATA_INSTANCE = "data_instance"
+STANDALONE = "standalone"
+
+# Latencies, which move around instead of growing.
+_QUANTILES = {
+    definition.name for definition in definitions() if definition.type == QUANTILE
+}
+
+# Gauges which aren't latencies, but which shouldn't grow like counters.
+_GAUGES = {
+    "average_degree",
+    "memory_usage",
+    "peak_memory_usage",
+    "disk_usage",
+    "unreleased_delta_objects",
+    "ActiveTransactions",
+    "ActiveBoltSessions",
+    "ActiveSSLSessions",
+    "ActiveSessions",
+    "ActiveTCPSessions",
+    "ActiveWebSocketSessions",
+}
+
+# Counters which only grow on Raft elections, see `PayloadGenerator.elect()`.
+_ELECTION_COUNTERS = {"BecomeLeaderSuccess"}
+
+
+class PayloadGenerator:
+    """
+    Generates evolving payloads of a single instance. Every call to `step()` advances the
+    instance state and returns the next payload. `extra_keys` unknown metrics are added to the
+    `Operator` section (or `General` for coordinators), to model newer Memgraph versions.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        seed: Optional[int] = None,
+        extra_keys: int = 0,
+        change_ratio: float = 1.0,
+    ) -> None:
+        self._kind = kind
+        self._rng = random.Random(seed)
+        self._change_ratio = change_ratio
+        self._state: Payload = {}
+        for definition in definitions(kind):
+            self._state.setdefault(definition.section, {})[definition.name] = 0
+        extra_section = "General" if kind == COORDINATOR else "Operator"
+        for i in range(extra_keys):
+            self._state[extra_section][f"SyntheticMetric{i}"] = 0
+
+    @property
+    def kind(self) -> str:
+        return self._kind
+
+    def restart(self) -> None:
+        """Resets all counters, like a restarted Memgraph process."""
+        for values in self._state.values():
+            for key in values:
+                values[key] = 0
+
+    def elect(self) -> None:
+        """Makes the coordinator the Raft leader, which counts in BecomeLeaderSuccess."""
+        self._state["HighAvailability"]["BecomeLeaderSuccess"] += 1
+
+    def step(self) -> Payload:
+        rng = self._rng
+        for values in self._state.values():
+            for key, value in values.items():
+                if key in _ELECTION_COUNTERS or rng.random() >= self._change_ratio:
+                    continue
+                if key in _QUANTILES:
+                    values[key] = rng.randint(50, 50_000)
+                elif key in _GAUGES:
+                    values[key] = rng.randint(0, 1 << 30)
+                else:
+                    values[key] = value + rng.randint(0, 10)
+        return {section: dict(values) for section, values in self._state.items()}
+
+
+def payload_keys(payload: Payload) -> int:
+    return sum(len(values) for values in payload.values())
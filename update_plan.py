@@ -0,0 +1,220 @@
+import logging
+
+from array import array
+from functools import partial
+
+from self_metrics import default_update_metrics
+
+logger = logging.getLogger("prometheus_handler")
+
+
+class UpdatePlan:
+    """
+    Precompiled table which maps every Memgraph metric of a single instance to the method that updates
+    its Prometheus metric. Labeled metric children are resolved the first time their metric is received,
+    so that metrics Memgraph doesn't report are never exposed. Sections are updated independently,
+    so an error in one of them doesn't prevent the others from being updated.
+
+    The last applied value of every metric is kept in a flat array, and values which didn't change since
+    the previous update are skipped. Counters ignore a value equal to the last one anyway, so skipping it
+    doesn't hide a counter reset.
+
+    If 'discovery' is given, unknown keys are registered through it and added to the plan, and keys it drops
+    are remembered so they are only looked up once. Applied and skipped values are counted in 'update_metrics'.
+    """
+
+    def __init__(
+        self,
+        sections,
+        resolvers,
+        resolve_gauge=None,
+        discovery=None,
+        update_metrics=None,
+    ):
+        # List of (section, {key: slot}) pairs. Slots index the resolvers, setters and last values.
+        self._sections = sections
+        self._resolvers = resolvers
+        self._setters = [None] * len(resolvers)
+        self._last = array("d", [float("nan")]) * len(resolvers)
+        self._resolve_gauge = resolve_gauge
+        self._discovery = discovery
+        # Keys dropped by discovery, as (section, key) pairs.
+        self._ignored = set()
+        self._update_metrics = (
+            update_metrics if update_metrics is not None else default_update_metrics()
+        )
+
+    def apply(self, mg_data):
+        applied = 0
+        skipped = 0
+        for section, slots in self._sections:
+            try:
+                section_data = mg_data[section]
+            except Exception as e:
+                logger.error("Error occurred while updating metrics: %s", e)
+                continue
+            section_applied, section_skipped = self._apply_section(
+                section, slots, section_data
+            )
+            applied += section_applied
+            skipped += section_skipped
+        self._count_updates(applied, skipped)
+
+    def apply_values(self, values, extras=None):
+        """
+        Applies values received as a flat sequence with one value per slot of the layout, see layout().
+        NaN values weren't received and are left out. 'extras' are received keys which aren't in the layout,
+        as {section: {key: value}}, e.g. keys which are discovered.
+        """
+        applied = 0
+        skipped = 0
+        last = self._last
+        for slot, value in enumerate(values):
+            if value != value:
+                continue
+            if last[slot] == value:
+                skipped += 1
+                continue
+            try:
+                self._setter(slot)(value)
+            except Exception as e:
+                logger.error("Error occurred while updating metrics: %s", e)
+                continue
+            last[slot] = value
+            applied += 1
+        for section, slots in self._sections if extras else ():
+            if section not in extras:
+                continue
+            section_applied, section_skipped = self._apply_section(
+                section, slots, extras[section]
+            )
+            applied += section_applied
+            skipped += section_skipped
+        self._count_updates(applied, skipped)
+
+    def _apply_section(self, section, slots, section_data):
+        applied = 0
+        skipped = 0
+        last = self._last
+        try:
+            for key, value in section_data.items():
+                slot = slots.get(key)
+                if slot is None:
+                    if self._discovery is None:
+                        continue
+                    slot = self._discover(section, slots, key)
+                    if slot is None:
+                        continue
+                if last[slot] == value:
+                    skipped += 1
+                    continue
+                self._setter(slot)(value)
+                last[slot] = value
+                applied += 1
+        except Exception as e:
+            logger.error("Error occurred while updating metrics: %s", e)
+        return applied, skipped
+
+    def layout(self):
+        """
+        Returns the (section, key) pair of every slot, in slot order.
+        """
+        layout = [None] * len(self._resolvers)
+        for section, slots in self._sections:
+            for key, slot in slots.items():
+                layout[slot] = (section, key)
+        return layout
+
+    def _discover(self, section, slots, key):
+        if (section, key) in self._ignored:
+            return None
+        metric = self._discovery.discover(section, key)
+        if metric is None:
+            self._ignored.add((section, key))
+            return None
+        slot = len(self._resolvers)
+        self._resolvers.append(partial(self._resolve_gauge, metric))
+        self._setters.append(None)
+        self._last.append(float("nan"))
+        slots[key] = slot
+        return slot
+
+    def _count_updates(self, applied, skipped):
+        if applied:
+            self._update_metrics.applied.inc(applied)
+        if skipped:
+            self._update_metrics.skipped.inc(skipped)
+
+    def _setter(self, slot):
+        setter = self._setters[slot]
+        if setter is None:
+            try:
+                setter = self._resolvers[slot]()
+            except Exception:
+                # Report the metric which can't be updated once, and ignore its values afterwards.
+                self._setters[slot] = _ignore
+                raise
+            self._setters[slot] = setter
+        return setter
+
+
+def _ignore(value):
+    pass
+
+
+def _labeled_setter(metric, labels):
+    return metric.labels(**labels).set
+
+
+def _setter(metric):
+    return metric.set
+
+
+def _gauge_setter(resolve_gauge, prom_data, key):
+    return resolve_gauge(prom_data[key])
+
+
+def _counter_setter(collector, key, labels):
+    return collector.setter(key, labels)
+
+
+def compile_update_plan(
+    gauge_sections,
+    labels=None,
+    counter_sections=(),
+    discovery=None,
+    update_metrics=None,
+):
+    """
+    Compiles an update plan.
+    Parameters:
+    gauge_sections: (section, prom_data) pairs whose metrics are set to the received values.
+    labels: Label values bound to the metrics in 'gauge_sections', e.g. {"instance_name": "data1"}.
+    counter_sections: (section, collector) pairs where the collector is a CumulativeCounterCollector whose
+        counter totals are set to the received values, labeled with 'labels'.
+    discovery: Optional MetricDiscovery which registers unknown keys as gauges.
+    update_metrics: UpdateMetrics which count the applied and skipped values, the ones of the exporter process
+        if None.
+    """
+    resolvers = []
+    compiled = {}
+
+    def add_slot(section, key, resolver):
+        compiled.setdefault(section, {})[key] = len(resolvers)
+        resolvers.append(resolver)
+
+    resolve_gauge = partial(_labeled_setter, labels=labels) if labels else _setter
+    for section, prom_data in gauge_sections:
+        # Metrics are looked up when their key is first received, so sections which create their metrics
+        # lazily only do so once they are used.
+        for key in prom_data:
+            add_slot(
+                section, key, partial(_gauge_setter, resolve_gauge, prom_data, key)
+            )
+    for section, collector in counter_sections:
+        for key in collector.keys():
+            add_slot(section, key, partial(_counter_setter, collector, key, labels))
+
+    return UpdatePlan(
+        list(compiled.items()), resolvers, resolve_gauge, discovery, update_metrics
+    )